@@ -0,0 +1 @@
+"""Performance benchmarks for the backend (run with `python -m benchmarks.<name>`)."""
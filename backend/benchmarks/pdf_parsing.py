@@ -0,0 +1,105 @@
+"""Benchmark PDF text extraction: PyPDFLoader vs the process-pool parser.
+
+Usage (from the backend directory):
+
+    python -m benchmarks.pdf_parsing --pdf data/uploads/paper.pdf
+    python -m benchmarks.pdf_parsing --synthetic-pages 400 --workers 1 2 4 8
+
+Reports pages per second for the current loader (`PyPDFLoader(mode="page")`)
+and for `iter_pdf_pages` at each worker count. Pool start-up is excluded by
+a warm-up pass, matching the long-lived pool used by the API and workers.
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from typing import Callable, Iterable, List
+
+from langchain_community.document_loaders import PyPDFLoader
+
+from src.app.services.pdf_parser import iter_pdf_pages, shutdown_pdf_parse_pool
+
+_LINE = "Vector databases index embeddings with HNSW graphs, IVF lists and product quantization."
+
+
+def write_synthetic_pdf(path: str, pages: int, lines_per_page: int = 45) -> None:
+    """Write a text-only PDF with `pages` pages (no third-party writer needed)."""
+    objects: List[str] = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        "",  # page tree, filled in once the page objects exist
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    page_refs = []
+    for page in range(pages):
+        lines = " ".join(f"(p{page} l{line}: {_LINE}) '" for line in range(lines_per_page))
+        stream = f"BT /F1 9 Tf 36 806 Td 11 TL {lines} ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(
+            "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>"
+        )
+        page_refs.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(page_refs)}] /Count {pages} >>"
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += b"".join(f"{offset:010d} 00000 n \n".encode() for offset in offsets)
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+
+    with open(path, "wb") as f:
+        f.write(out)
+
+
+def _time(parse: Callable[[], Iterable], repeat: int) -> tuple[int, float]:
+    """Return (pages, median seconds) over `repeat` full passes."""
+    timings = []
+    pages = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        pages = sum(1 for _ in parse())
+        timings.append(time.perf_counter() - start)
+    return pages, statistics.median(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark PDF parsing throughput.")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--pdf", help="PDF file to parse")
+    source.add_argument("--synthetic-pages", type=int, default=200, help="generate a text PDF with this many pages")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4], help="process pool sizes to compare")
+    parser.add_argument("--pages-per-task", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=3, help="passes per configuration (median is reported)")
+    args = parser.parse_args()
+
+    path = args.pdf
+    if path is None:
+        path = os.path.join(tempfile.mkdtemp(), "synthetic.pdf")
+        write_synthetic_pdf(path, args.synthetic_pages)
+
+    print(f"PDF: {path} ({os.path.getsize(path) / 1024:.0f} KiB), cpus={os.cpu_count()}")
+    print(f"{'parser':<32}{'pages':>8}{'seconds':>10}{'pages/s':>10}{'speedup':>9}")
+
+    pages, baseline = _time(lambda: PyPDFLoader(path, mode="page").lazy_load(), args.repeat)
+    print(f"{'PyPDFLoader(mode=page)':<32}{pages:>8}{baseline:>10.3f}{pages / baseline:>10.1f}{1.0:>8.2f}x")
+
+    try:
+        for workers in args.workers:
+            parse = lambda: iter_pdf_pages(path, workers=workers, pages_per_task=args.pages_per_task)
+            if workers != 1:
+                sum(1 for _ in parse())  # warm up the pool
+            pages, seconds = _time(parse, args.repeat)
+            label = f"iter_pdf_pages(workers={workers})"
+            print(f"{label:<32}{pages:>8}{seconds:>10.3f}{pages / seconds:>10.1f}{baseline / seconds:>8.2f}x")
+    finally:
+        shutdown_pdf_parse_pool()
+
+
+if __name__ == "__main__":
+    main()
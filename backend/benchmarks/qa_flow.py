@@ -0,0 +1,553 @@
+"""End-to-end benchmark of the QA graph, PDF indexing and the HTTP API.
+
+Usage (from the backend directory):
+
+    python -m benchmarks.qa_flow --db none --output results.json
+    python -m benchmarks.qa_flow --scenarios qa history http-conversation --concurrency 1 4 16
+    python -m benchmarks.qa_flow --db none --baseline results.json
+
+Everything runs in-process against local stand-ins: the fake chat and
+embedding models (`llm_provider="fake"`, `embedding_provider="fake"`, with
+`--llm-latency-ms` simulating the model) and the local vector store, filled
+from a synthetic PDF before the scenarios run. Scenarios:
+
+- `index`: `index_pdf_file` on a fresh synthetic PDF per operation.
+- `qa`: `run_qa_flow` (stateless questions).
+- `history`: `run_qa_flow_with_history`, `--turns` turns per conversation.
+- `http-qa`: POST /ask/qa through the ASGI app.
+- `http-conversation`: POST /conversations/ and then `--turns` POST
+  /conversations/{id}/ask per conversation (needs Postgres).
+
+`--db postgres` (the default) uses DATABASE_URL for the checkpointer, the
+conversation tables and the persistent cache tiers. `--db none` runs without
+a database: conversations are checkpointed in memory, indexed files are not
+registered, retrieval is dense-only (no full-text index), the scope gate is
+off (no file centroids) and `http-conversation` is skipped.
+
+For every scenario and concurrency level it reports p50/p95/p99 latency,
+throughput, the per-stage time taken from the trace spans of each operation,
+DB statements and pool checkouts per operation, LLM tokens per operation and
+the process's peak RSS. DB statements are counted by wrapping psycopg's cursor
+`execute`/`executemany`, so pipelined statements (the checkpointer's) count
+once each even though they share a round trip. `--output` writes the results
+as JSON, and `--baseline` prints the change against an earlier results file.
+"""
+
+import argparse
+import asyncio
+import functools
+import inspect
+import json
+import math
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import psycopg
+
+from benchmarks.pdf_parsing import write_synthetic_pdf
+from src.app.core.tracing import current_span, get_tracer, span
+
+SCENARIOS = ("index", "qa", "history", "http-qa", "http-conversation")
+# scenarios that need the conversation tables
+_DB_SCENARIOS = ("http-conversation",)
+
+_CORPUS_FILE_ID = "benchmark-corpus"
+_USER_ID = "benchmark-user"
+_TOPICS = (
+    "HNSW graphs", "IVF lists", "product quantization", "vector databases",
+    "index embeddings", "graph search", "quantization error", "embedding indexes",
+)
+
+
+@dataclass
+class Sample:
+    """One timed operation and the trace its spans were recorded under."""
+
+    trace_id: Optional[str]
+    latency_ms: float
+    error: Optional[str] = None
+
+
+def _configure_environment(args: argparse.Namespace) -> None:
+    """Point the settings at the local stand-ins (must run before the first `get_settings()`)."""
+    os.environ.update(
+        LLM_PROVIDER="fake",
+        EMBEDDING_PROVIDER="fake",
+        FAKE_LLM_LATENCY_MS=str(args.llm_latency_ms),
+        FAKE_LLM_LATENCY_JITTER_MS=str(args.llm_latency_jitter_ms),
+        FAKE_EMBEDDING_LATENCY_MS=str(args.embedding_latency_ms),
+        VECTOR_STORE_BACKEND="local",
+        LOCAL_VECTOR_STORE_PATH=os.path.join(tempfile.mkdtemp(prefix="ikms-bench-"), "vector_store"),
+        RETRIEVAL_MODE=args.retrieval_mode,
+        TRACING_ENABLED="true",
+        TRACING_EXPORTER="memory",
+        TRACING_BUFFER_SIZE="1000000",
+    )
+
+    caches = "true" if args.caches else "false"
+    persistent = "true" if args.caches and args.db == "postgres" else "false"
+    os.environ.update(
+        LLM_CACHE_ENABLED=caches,
+        EMBEDDING_CACHE_ENABLED=caches,
+        ANSWER_CACHE_ENABLED=caches,
+        LLM_CACHE_PERSISTENT=persistent,
+        EMBEDDING_CACHE_PERSISTENT=persistent,
+    )
+
+    os.environ.setdefault("JWT_SECRET_KEY", "benchmark-jwt-secret-key-not-for-production")
+    if args.db == "none":
+        # required by the settings, never connected to
+        os.environ.setdefault("DATABASE_URL", "postgresql://localhost/unused")
+        # the full-text index and the scope gate's file centroids live in Postgres
+        os.environ.update(LEXICAL_INDEX_ENABLED="false", RETRIEVAL_SEARCH_MODE="dense", SCOPE_GATE_ENABLED="false")
+
+
+def _use_memory_checkpointer() -> None:
+    """Compile the history graphs with an in-memory checkpointer instead of Postgres."""
+    from langgraph.checkpoint.memory import InMemorySaver
+    import src.app.core.agents.graph as graph_module
+
+    saver = InMemorySaver()
+
+    async def aget_saver():
+        return saver
+
+    graph_module.get_postgres_checkpointer = lambda: saver
+    graph_module.get_async_postgres_checkpointer = aget_saver
+
+
+def _count_db_statements() -> None:
+    """Count every psycopg statement on the current span (as `db_statements`)."""
+
+    def counting(method: Callable) -> Callable:
+        if inspect.iscoroutinefunction(method):
+            @functools.wraps(method)
+            async def async_wrapper(self, *args, **kwargs):
+                _add_statement()
+                return await method(self, *args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            _add_statement()
+            return method(self, *args, **kwargs)
+        return wrapper
+
+    for cursor_class in (psycopg.Cursor, psycopg.AsyncCursor):
+        for name in ("execute", "executemany"):
+            setattr(cursor_class, name, counting(getattr(cursor_class, name)))
+
+
+def _add_statement() -> None:
+    current = current_span()
+    if current is not None:
+        current.add("db_statements")
+
+
+def _peak_rss_mib(who: int = resource.RUSAGE_SELF) -> float:
+    """Peak resident set size so far (ru_maxrss is KiB on Linux, bytes on macOS)."""
+    peak = resource.getrusage(who).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _git_revision() -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True, text=True).stdout.strip())
+        return {"commit": commit, "dirty": dirty}
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": None, "dirty": None}
+
+
+def _question(index: int, pages: int, lines_per_page: int = 45) -> str:
+    """A question about one line of the synthetic PDF."""
+    page, line = index % pages, (index * 7) % lines_per_page
+    return f"What does p{page} l{line} say about {_TOPICS[index % len(_TOPICS)]}?"
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    """Linear-interpolated percentile (q in [0, 100]) of sorted values."""
+    if not sorted_values:
+        return 0.0
+    rank = (len(sorted_values) - 1) * q / 100
+    low, high = math.floor(rank), math.ceil(rank)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (rank - low)
+
+
+def _timed(name: str, call: Callable[[], Any]) -> Sample:
+    started = time.perf_counter()
+    error = None
+    with span(f"benchmark.{name}", "internal") as root:
+        try:
+            call()
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+    return Sample(root.trace_id if root else None, (time.perf_counter() - started) * 1000, error)
+
+
+async def _atimed(name: str, call: Callable[[], Awaitable[Any]]) -> Sample:
+    started = time.perf_counter()
+    error = None
+    with span(f"benchmark.{name}", "internal") as root:
+        try:
+            await call()
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+    return Sample(root.trace_id if root else None, (time.perf_counter() - started) * 1000, error)
+
+
+def _run_sessions(name: str, session: Callable[[int], List[Sample]], sessions: int, concurrency: int) -> tuple[List[Sample], float]:
+    """Run `sessions` sessions on `concurrency` threads; return their samples and the wall time."""
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix=f"bench-{name}") as pool:
+        results = list(pool.map(session, range(sessions)))
+    return [sample for samples in results for sample in samples], time.perf_counter() - started
+
+
+async def _arun_sessions(session: Callable[[int], Awaitable[List[Sample]]], sessions: int, concurrency: int) -> tuple[List[Sample], float]:
+    """Async counterpart of `_run_sessions()`: at most `concurrency` sessions at a time."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def limited(index: int) -> List[Sample]:
+        async with semaphore:
+            return await session(index)
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(limited(index) for index in range(sessions)))
+    return [sample for samples in results for sample in samples], time.perf_counter() - started
+
+
+def _summarize(scenario: str, concurrency: int, samples: List[Sample], seconds: float, **extra: Any) -> Dict[str, Any]:
+    """Aggregate the samples of one run with the spans recorded under their traces."""
+    tracer = get_tracer()
+    spans_by_trace = defaultdict(list)
+    for finished in tracer.recent():
+        spans_by_trace[finished.trace_id].append(finished)
+    tracer.buffer.clear()
+
+    operations = len(samples)
+    stages: Dict[str, List[float]] = defaultdict(lambda: [0.0, 0])
+    db_statements = db_connections = prompt_tokens = completion_tokens = 0
+    for sample in samples:
+        for finished in spans_by_trace.get(sample.trace_id, ()):
+            db_statements += finished.attributes.get("db_statements", 0)
+            if finished.name.startswith("benchmark."):
+                continue
+            if finished.kind == "llm":
+                stage = f"llm:{finished.attributes.get('node') or finished.name}"
+                prompt_tokens += finished.attributes.get("prompt_tokens", 0)
+                completion_tokens += finished.attributes.get("completion_tokens", 0)
+            else:
+                stage = f"{finished.kind}:{finished.name}"
+            if finished.name == "db.connection":
+                db_connections += 1
+            stages[stage][0] += finished.duration_ms
+            stages[stage][1] += 1
+
+    latencies = sorted(sample.latency_ms for sample in samples)
+    errors = [sample.error for sample in samples if sample.error]
+    per_op = max(operations, 1)
+    return {
+        "scenario": scenario,
+        "concurrency": concurrency,
+        "operations": operations,
+        "errors": len(errors),
+        "first_error": errors[0] if errors else None,
+        "seconds": round(seconds, 4),
+        "throughput_per_s": round(operations / seconds, 3) if seconds else 0.0,
+        "latency_ms": {
+            "p50": round(_percentile(latencies, 50), 3),
+            "p95": round(_percentile(latencies, 95), 3),
+            "p99": round(_percentile(latencies, 99), 3),
+            "mean": round(sum(latencies) / per_op, 3),
+            "max": round(latencies[-1], 3) if latencies else 0.0,
+        },
+        "db_statements_per_op": round(db_statements / per_op, 3),
+        "db_connections_per_op": round(db_connections / per_op, 3),
+        "llm_tokens_per_op": {
+            "prompt": round(prompt_tokens / per_op, 1),
+            "completion": round(completion_tokens / per_op, 1),
+        },
+        # nested stages overlap (a node's time includes its llm and retrieval spans)
+        "stages": {
+            stage: {"ms_per_op": round(total / per_op, 3), "calls_per_op": round(calls / per_op, 3)}
+            for stage, (total, calls) in sorted(stages.items(), key=lambda item: -item[1][0])
+        },
+        "peak_rss_mib": round(_peak_rss_mib(), 1),
+        "peak_rss_children_mib": round(_peak_rss_mib(resource.RUSAGE_CHILDREN), 1),
+        **extra,
+    }
+
+
+class Benchmark:
+    """Runs the scenarios against the app configured by `_configure_environment()`."""
+
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.run_id = uuid.uuid4().hex[:8]
+        self.workdir = tempfile.mkdtemp(prefix="ikms-bench-pdf-")
+        self.results: List[Dict[str, Any]] = []
+
+    # --- setup
+
+    def setup(self) -> None:
+        from src.app.services.indexing_service import index_pdf_file
+
+        if self.args.db == "postgres":
+            from src.app.db.connection import init_database
+            from src.app.services.user_service import get_user_service
+
+            init_database()
+            get_user_service().create_or_update_user(_USER_ID, f"{_USER_ID}@example.com", name="Benchmark")
+        else:
+            _use_memory_checkpointer()
+
+        path = os.path.join(self.workdir, "corpus.pdf")
+        write_synthetic_pdf(path, self.args.corpus_pages)
+        chunks = index_pdf_file(path, _CORPUS_FILE_ID, "corpus.pdf", user_id=_USER_ID, register_file=self.args.db == "postgres")
+        print(f"Indexed corpus: {self.args.corpus_pages} pages, {chunks} chunks")
+
+    def _record(self, result: Dict[str, Any]) -> None:
+        self.results.append(result)
+        latency = result["latency_ms"]
+        print(
+            f"{result['scenario']:<18}{result['concurrency']:>6}{result['operations']:>6}{result['errors']:>5}"
+            f"{latency['p50']:>10.1f}{latency['p95']:>10.1f}{latency['p99']:>10.1f}{result['throughput_per_s']:>10.2f}"
+            f"{result['db_statements_per_op']:>9.1f}{result['peak_rss_mib']:>10.1f}"
+        )
+        if result["first_error"]:
+            print(f"  first error: {result['first_error']}")
+
+    def _sessions(self, turns: int) -> int:
+        return max(1, math.ceil(self.args.requests / turns))
+
+    # --- sync scenarios
+
+    def bench_index(self, concurrency: int) -> Dict[str, Any]:
+        from src.app.services.indexing_service import index_pdf_file
+
+        pages = self.args.index_pages
+        path = os.path.join(self.workdir, f"index-{pages}.pdf")
+        if not os.path.exists(path):
+            write_synthetic_pdf(path, pages)
+        register = self.args.db == "postgres"
+
+        def session(index: int) -> List[Sample]:
+            file_id = f"bench-{self.run_id}-c{concurrency}-{index}"
+            return [_timed("index", lambda: index_pdf_file(path, file_id, "index.pdf", user_id=_USER_ID, register_file=register))]
+
+        sessions = max(1, self.args.index_runs)
+        samples, seconds = _run_sessions("index", session, sessions, concurrency)
+        return _summarize("index", concurrency, samples, seconds, pages_per_s=round(sessions * pages / seconds, 1))
+
+    def bench_qa(self, concurrency: int) -> Dict[str, Any]:
+        from src.app.core.agents.graph import run_qa_flow
+
+        def session(index: int) -> List[Sample]:
+            question = _question(index, self.args.corpus_pages)
+            return [_timed("qa", lambda: run_qa_flow(question))]
+
+        samples, seconds = _run_sessions("qa", session, self._sessions(1), concurrency)
+        return _summarize("qa", concurrency, samples, seconds)
+
+    def bench_history(self, concurrency: int) -> Dict[str, Any]:
+        from src.app.core.agents.graph import run_qa_flow_with_history
+
+        turns = self.args.turns
+
+        def session(index: int) -> List[Sample]:
+            thread_id = f"bench-{self.run_id}-c{concurrency}-{index}"
+            return [
+                _timed("history", lambda: run_qa_flow_with_history(
+                    _question(index * turns + turn, self.args.corpus_pages), thread_id, file_id=_CORPUS_FILE_ID
+                ))
+                for turn in range(turns)
+            ]
+
+        samples, seconds = _run_sessions("history", session, self._sessions(turns), concurrency)
+        return _summarize("history", concurrency, samples, seconds, turns_per_conversation=turns)
+
+    # --- HTTP scenarios (one event loop for all of them, so the async pools stay usable)
+
+    async def _http_qa(self, client, concurrency: int) -> Dict[str, Any]:
+        async def ask(question: str) -> None:
+            response = await client.post("/ask/qa", json={"question": question})
+            response.raise_for_status()
+
+        async def session(index: int) -> List[Sample]:
+            return [await _atimed("http-qa", lambda: ask(_question(index, self.args.corpus_pages)))]
+
+        samples, seconds = await _arun_sessions(session, self._sessions(1), concurrency)
+        return _summarize("http-qa", concurrency, samples, seconds)
+
+    async def _http_conversation(self, client, concurrency: int) -> Dict[str, Any]:
+        turns = self.args.turns
+
+        async def create() -> str:
+            response = await client.post("/conversations/", params={"file_id": _CORPUS_FILE_ID})
+            response.raise_for_status()
+            return response.json()["session_id"]
+
+        async def ask(session_id: str, question: str) -> None:
+            response = await client.post(f"/conversations/{session_id}/ask", json={"question": question})
+            response.raise_for_status()
+
+        async def session(index: int) -> List[Sample]:
+            session_id = await create()
+            return [
+                await _atimed("http-conversation", lambda: ask(session_id, _question(index * turns + turn, self.args.corpus_pages)))
+                for turn in range(turns)
+            ]
+
+        samples, seconds = await _arun_sessions(session, self._sessions(turns), concurrency)
+        return _summarize("http-conversation", concurrency, samples, seconds, turns_per_conversation=turns)
+
+    async def run_http(self, scenarios: List[str]) -> None:
+        import httpx
+        from src.app.core.auth import create_access_token
+        from src.app.main import server
+
+        token = create_access_token(_USER_ID, f"{_USER_ID}@example.com")
+        transport = httpx.ASGITransport(app=server)
+        try:
+            async with httpx.AsyncClient(
+                transport=transport,
+                base_url="http://benchmark",
+                headers={"Authorization": f"Bearer {token}"},
+                timeout=None,
+            ) as client:
+                for scenario in scenarios:
+                    bench = self._http_qa if scenario == "http-qa" else self._http_conversation
+                    await bench(client, 1)  # warm up
+                    get_tracer().buffer.clear()
+                    for concurrency in self.args.concurrency:
+                        self._record(await bench(client, concurrency))
+        finally:
+            await self._close_async()
+
+    async def _close_async(self) -> None:
+        from src.app.core.agents.memory import shutdown_memory_summaries
+        from src.app.core.llm.factory import close_http_clients
+
+        await shutdown_memory_summaries()
+        await close_http_clients()
+        if self.args.db == "postgres":
+            from src.app.db.checkpointer import close_async_checkpointer
+            from src.app.db.connection import close_async_connection_pool
+
+            await close_async_checkpointer()
+            await close_async_connection_pool()
+
+    # ---
+
+    def run(self) -> None:
+        scenarios = list(self.args.scenarios)
+        if self.args.db == "none":
+            skipped = [s for s in scenarios if s in _DB_SCENARIOS]
+            if skipped:
+                print(f"Skipping {', '.join(skipped)} (needs --db postgres)")
+            scenarios = [s for s in scenarios if s not in _DB_SCENARIOS]
+
+        _count_db_statements()
+        self.setup()
+        get_tracer().buffer.clear()
+
+        print(f"{'scenario':<18}{'conc':>6}{'ops':>6}{'err':>5}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'ops/s':>10}{'db/op':>9}{'rss MiB':>10}")
+        for scenario in (s for s in scenarios if not s.startswith("http-")):
+            bench = getattr(self, f"bench_{scenario}")
+            if scenario != "index":
+                bench(1)  # warm up (graph compilation, first imports)
+                get_tracer().buffer.clear()
+            for concurrency in self.args.concurrency:
+                self._record(bench(concurrency))
+
+        http_scenarios = [s for s in scenarios if s.startswith("http-")]
+        if http_scenarios:
+            asyncio.run(self.run_http(http_scenarios))
+
+        from src.app.services.pdf_parser import shutdown_pdf_parse_pool
+        shutdown_pdf_parse_pool()
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "benchmark": "qa_flow",
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "git": _git_revision(),
+            "environment": {
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpus": os.cpu_count(),
+            },
+            "config": {key: value for key, value in vars(self.args).items() if key not in ("output", "baseline")},
+            "results": self.results,
+        }
+
+
+def _compare(results: List[Dict[str, Any]], baseline_path: str) -> None:
+    """Print the latency and throughput change of each run against a baseline results file."""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    previous = {(r["scenario"], r["concurrency"]): r for r in baseline.get("results", [])}
+
+    def change(new: float, old: float) -> str:
+        return f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+
+    print(f"\nAgainst {baseline_path} (commit {(baseline.get('git') or {}).get('commit')}):")
+    print(f"{'scenario':<18}{'conc':>6}{'p50':>10}{'p95':>10}{'p99':>10}{'ops/s':>10}{'db/op':>10}")
+    for result in results:
+        old = previous.get((result["scenario"], result["concurrency"]))
+        if old is None:
+            continue
+        print(
+            f"{result['scenario']:<18}{result['concurrency']:>6}"
+            + "".join(f"{change(result['latency_ms'][p], old['latency_ms'][p]):>10}" for p in ("p50", "p95", "p99"))
+            + f"{change(result['throughput_per_s'], old['throughput_per_s']):>10}"
+            + f"{change(result['db_statements_per_op'], old['db_statements_per_op']):>10}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the QA graph, PDF indexing and the HTTP API end to end.")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--db", choices=["postgres", "none"], default="postgres", help="Postgres from DATABASE_URL, or no database")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4], help="concurrent operations to measure")
+    parser.add_argument("--requests", type=int, default=40, help="operations per scenario and concurrency level")
+    parser.add_argument("--turns", type=int, default=4, help="turns per conversation in history scenarios")
+    parser.add_argument("--corpus-pages", type=int, default=20, help="pages of the synthetic PDF the questions are about")
+    parser.add_argument("--index-pages", type=int, default=20, help="pages per PDF in the index scenario")
+    parser.add_argument("--index-runs", type=int, default=4, help="PDFs indexed per concurrency level")
+    parser.add_argument("--retrieval-mode", choices=["agentic", "direct"], default="agentic")
+    parser.add_argument("--llm-latency-ms", type=float, default=50.0, help="simulated chat model latency")
+    parser.add_argument("--llm-latency-jitter-ms", type=float, default=50.0)
+    parser.add_argument("--embedding-latency-ms", type=float, default=10.0, help="simulated embedding latency")
+    parser.add_argument("--caches", action="store_true", help="enable the LLM, embedding and answer caches")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="compare with an earlier results file")
+    args = parser.parse_args()
+
+    _configure_environment(args)
+    benchmark = Benchmark(args)
+    benchmark.run()
+
+    report = benchmark.report()
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.output}")
+    if args.baseline:
+        _compare(benchmark.results, args.baseline)
+
+
+if __name__ == "__main__":
+    main()
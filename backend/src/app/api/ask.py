@@ -2,7 +2,7 @@ from fastapi import APIRouter
 from fastapi import  HTTPException,  status
 from ...app.models import QAResponse, QuestionRequest
 from fastapi.responses import JSONResponse
-from ..services.qa_service import answer_question
+from ..services.qa_service import aanswer_question
 
 ask_router = APIRouter(prefix="/ask")
 
@@ -26,7 +26,7 @@ async def qa_endpoint(payload: QuestionRequest) -> QAResponse:
         )
     
     # Delegate to the service layer which runs the multi-agent QA graph
-    result = answer_question(question)
+    result = await aanswer_question(question, retrieval_mode=payload.retrieval_mode)
 
     return QAResponse(
         answer=result.get("answer", ""),
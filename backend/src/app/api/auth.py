@@ -1,6 +1,8 @@
 """Authentication API endpoints."""
 
+import logging
 from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import Response
 from pydantic import BaseModel
 from typing import Optional
@@ -8,6 +10,8 @@ import httpx
 from ..core.auth import verify_google_token, create_access_token, get_current_user
 from ..services.user_service import get_user_service
 
+logger = logging.getLogger(__name__)
+
 auth_router = APIRouter(prefix="/auth")
 
 # In-memory cache for profile images
@@ -46,11 +50,12 @@ async def google_auth(payload: GoogleAuthRequest) -> AuthResponse:
     """
     try:
         # Verify Google token and get user info
-        user_info = verify_google_token(payload.token)
+        user_info = await run_in_threadpool(verify_google_token, payload.token)
         
         # Create or update user in database
         user_service = get_user_service()
-        user = user_service.create_or_update_user(
+        user = await run_in_threadpool(
+            user_service.create_or_update_user,
             user_id=user_info["user_id"],
             email=user_info["email"],
             name=user_info.get("name"),
@@ -71,10 +76,10 @@ async def google_auth(payload: GoogleAuthRequest) -> AuthResponse:
         )
     except HTTPException as e:
         # Re-raise HTTPException with original status and detail
-        print(f"Authentication error: {e.detail}")
+        logger.info("Authentication error: %s", e.detail)
         raise
     except Exception as e:
-        print(f"Unexpected authentication error: {str(e)}")
+        logger.exception("Unexpected authentication error: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Authentication failed: {str(e)}"
@@ -89,7 +94,7 @@ async def get_current_user_info(current_user: dict = Depends(get_current_user))
     """
     try:
         user_service = get_user_service()
-        user = user_service.get_user(current_user["user_id"])
+        user = await run_in_threadpool(user_service.get_user, current_user["user_id"])
         
         if not user:
             raise HTTPException(
@@ -144,7 +149,7 @@ async def get_profile_image(user_id: str):
 
         # Get user from database to retrieve the Google picture URL
         user_service = get_user_service()
-        user = user_service.get_user(user_id)
+        user = await run_in_threadpool(user_service.get_user, user_id)
 
         if not user or not user.picture:
             raise HTTPException(
@@ -1,9 +1,12 @@
 """API endpoints for conversational multi-turn QA."""
 
-from fastapi import APIRouter, HTTPException, status, Response, Depends
+import json
+from fastapi import APIRouter, HTTPException, status, Response, Depends, Query
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, AsyncGenerator, AsyncIterator, Literal
 from ..services.conversation_service import get_conversation_service
+from ..db.pagination import InvalidCursorError
 from ..core.auth import get_current_user
 
 conversation_router = APIRouter(prefix="/conversations", tags=["conversations"])
@@ -17,6 +20,7 @@ class CreateConversationResponse(BaseModel):
 class ConversationQuestionRequest(BaseModel):
     """Request body for asking a question in a conversation."""
     question: str
+    retrieval_mode: Optional[Literal["agentic", "direct"]] = None
 
 class ConversationQuestionResponse(BaseModel):
     """Response for a conversation question."""
@@ -43,6 +47,9 @@ class ConversationHistoryResponse(BaseModel):
     conversation_history: str
     active_file_id: Optional[str] = None  
     filename: Optional[str] = None  
+    # cursors for the older (`before`) and newer (`after`) pages; None when there are none
+    before_cursor: Optional[str] = None
+    after_cursor: Optional[str] = None
 
 class DeleteConversationResponse(BaseModel):
     """Response for deleting a conversation."""
@@ -85,7 +92,7 @@ async def create_conversation(
     try:
         service = get_conversation_service()
         user_id = current_user["user_id"]
-        session_id = service.create_conversation(file_id=file_id, user_id=user_id)
+        session_id = await service.acreate_conversation(file_id=file_id, user_id=user_id)
 
         return CreateConversationResponse(
             session_id=session_id,
@@ -150,22 +157,22 @@ async def ask_in_conversation(
     service = get_conversation_service()
 
     try:
-        # Verify user owns this conversation
-        user_id = current_user["user_id"]
-        if not service.verify_conversation_ownership(session_id, user_id):
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="You don't have access to this conversation"
-            )
-
-        result = service.ask_question(
+        # ownership is checked while loading the conversation
+        result = await service.aask_question(
             session_id=session_id,
-            question=question
+            question=question,
+            retrieval_mode=payload.retrieval_mode,
+            user_id=current_user["user_id"]
         )
 
         # ** unpacks a dictionary into keyword arguments
         return ConversationQuestionResponse(**result)
 
+    except PermissionError as e:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=str(e)
+        )
     except ConnectionError as e:
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
@@ -183,6 +190,97 @@ async def ask_in_conversation(
         )
     
 
+def _format_sse(event: Dict[str, Any]) -> str:
+    """Format an event dictionary as a Server-Sent Events message."""
+    return f"event: {event['event']}\ndata: {json.dumps(event.get('data', {}), default=str)}\n\n"
+
+async def _sse_stream(events: AsyncGenerator[Dict[str, Any], None]) -> AsyncIterator[str]:
+    """Serialize pipeline events to SSE, reporting failures as an `error` event."""
+    try:
+        async for event in events:
+            yield _format_sse(event)
+    except Exception as e:
+        yield _format_sse({"event": "error", "data": {"detail": f"Failed to ask question: {str(e)}"}})
+    finally:
+        # closing the turn's generator stores the question if the client disconnected
+        await events.aclose()
+
+
+# ask questions (streaming)
+@conversation_router.post(
+        "/{session_id}/ask/stream",
+        status_code=status.HTTP_200_OK
+)
+async def ask_in_conversation_stream(
+    session_id: str,
+    payload: ConversationQuestionRequest,
+    current_user: dict = Depends(get_current_user)
+) -> StreamingResponse:
+    """Ask a question within a conversation and stream the answer (requires authentication).
+
+    Returns a `text/event-stream` response. Events are emitted as the pipeline
+    progresses: `retrieved`, `drafting`, `verifying`, then `token` events with the
+    final answer as it is generated, `answer` with the complete answer and a final
+    `done` event (same fields as the non-streaming endpoint). Failures after the
+    stream has started are reported as an `error` event.
+
+    Args:
+        session_id: The conversation session identifier.
+        payload: Question and retrieval preferences.
+        current_user: Authenticated user information
+
+    Raises:
+        404: If session_id is not found.
+        400: If question is empty.
+        403: If user doesn't own this conversation.
+    """
+
+    question = payload.question.strip()
+    if not question:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="`question` must be a non-empty string."
+        )
+
+    service = get_conversation_service()
+
+    try:
+        # ownership is checked while loading the conversation
+        events = await service.astream_question(
+            session_id=session_id,
+            question=question,
+            retrieval_mode=payload.retrieval_mode,
+            user_id=current_user["user_id"]
+        )
+
+    except PermissionError as e:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=str(e)
+        )
+    except ConnectionError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Database connection failed: {str(e)}"
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to ask question: {str(e)}"
+        )
+
+    return StreamingResponse(
+        _sse_stream(events),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 # get full conversation history for a session
 @conversation_router.get(
     "/{session_id}",
@@ -191,20 +289,30 @@ async def ask_in_conversation(
 )
 async def get_conversation_history(
     session_id: str,
-    limit: Optional[int] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    before: Optional[str] = None,
+    after: Optional[str] = None,
     current_user: dict = Depends(get_current_user)
 ) -> ConversationHistoryResponse:
-    """Retrieve the full conversation history for a session (requires authentication).
+    """Retrieve the conversation history for a session (requires authentication).
+
+    Messages are paginated with cursors: without one, `limit` returns the
+    latest messages; pass a page's `before_cursor` as `before` for the older
+    messages, or its `after_cursor` as `after` for the newer ones.
     
     Args:
         session_id: The conversation session identifier.
         limit: Optional limit on number of messages to return.
+        before: Cursor: return messages older than it.
+        after: Cursor: return messages newer than it.
         current_user: Authenticated user information
     
     Returns:
-        Complete conversation history with metadata and messages.
+        Conversation metadata and one page of messages (oldest first) with
+        the cursors to the adjacent pages.
     
     Raises:
+        400: If a cursor is invalid, or both `before` and `after` are given.
         404: If session_id is not found.
         403: If user doesn't own this conversation.
     """
@@ -214,13 +322,13 @@ async def get_conversation_history(
     try:
         # Verify user owns this conversation
         user_id = current_user["user_id"]
-        if not service.verify_conversation_ownership(session_id, user_id):
+        if not await service.averify_conversation_ownership(session_id, user_id):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="You don't have access to this conversation"
             )
         
-        history = service.get_conversation_history(session_id, limit=limit)
+        history = await service.aget_conversation_history(session_id, limit=limit, before=before, after=after)
 
         return ConversationHistoryResponse(
             session_id=history["session_id"],
@@ -231,9 +339,16 @@ async def get_conversation_history(
             current_state=history["current_state"],
             conversation_history=history["conversation_history"],
             active_file_id=history.get("active_file_id"),
-            filename=history.get("filename")
+            filename=history.get("filename"),
+            before_cursor=history.get("before_cursor"),
+            after_cursor=history.get("after_cursor")
         )
         
+    except InvalidCursorError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -278,13 +393,13 @@ async def delete_conversation(
     try:
         # Verify user owns this conversation
         user_id = current_user["user_id"]
-        if not service.verify_conversation_ownership(session_id, user_id):
+        if not await service.averify_conversation_ownership(session_id, user_id):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="You don't have access to this conversation"
             )
         
-        deleted = service.delete_conversation(session_id)
+        deleted = await service.adelete_conversation(session_id)
 
         if not deleted:
             raise HTTPException(
@@ -323,28 +438,44 @@ async def delete_conversation(
 async def list_conversations(
     response: Response,
     limit: Optional[int] = 50,
+    cursor: Optional[str] = None,
     current_user: dict = Depends(get_current_user)
 ) -> List[ConversationSummary]:
-    """List all active conversations for authenticated user.
+    """List the authenticated user's conversations, most recently updated first.
+
+    Results are paginated with cursors: when there are more conversations,
+    the `X-Next-Cursor` response header holds the cursor to pass as `cursor`
+    for the next page.
     
     Args:
         limit: Optional limit on number of conversations to return (default: 50 for performance).
+        cursor: Optional `X-Next-Cursor` of an earlier page.
         current_user: Authenticated user information
     
     Returns:
         List of conversation summaries for this user.
+
+    Raises:
+        400: If the cursor is invalid.
     """
     service = get_conversation_service()
 
     try:
         user_id = current_user["user_id"]
-        conversations = service.list_conversations(limit=limit, user_id=user_id)
+        page = await service.alist_conversations(limit=limit, user_id=user_id, cursor=cursor)
         
         # Add cache control headers to reduce unnecessary requests
         response.headers["Cache-Control"] = "private, max-age=10"
+        if page["next_cursor"]:
+            response.headers["X-Next-Cursor"] = page["next_cursor"]
         
-        return [ConversationSummary(**conv) for conv in conversations]
+        return [ConversationSummary(**conv) for conv in page["conversations"]]
     
+    except InvalidCursorError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except ConnectionError as e:
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
@@ -1,11 +1,13 @@
 from fastapi import APIRouter, Response, Depends
+from fastapi.concurrency import run_in_threadpool
 from pathlib import Path
 from fastapi import  File, HTTPException, UploadFile, status
-from ..services.indexing_service import index_pdf_file
 from pydantic import BaseModel
-from typing import List
+from typing import List, Optional
+from datetime import datetime
 import uuid
-from ..db.db_service import get_conversation_db_service
+from ..db.async_db_service import get_async_conversation_db_service
+from ..db.job_queue import get_async_job_queue
 from ..core.auth import get_current_user
 
 file_router = APIRouter(prefix="/files")
@@ -15,6 +17,22 @@ class IndexResponse(BaseModel):
     message: str
     chunks_indexed: int
     file_id: str
+    job_id: Optional[str] = None
+
+class IngestionJobResponse(BaseModel):
+    """Status and progress of a PDF indexing job."""
+    job_id: str
+    file_id: str
+    filename: str
+    status: str
+    attempts: int
+    pages_total: Optional[int] = None
+    pages_processed: int
+    chunks_indexed: int
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
 
 class FileListItem(BaseModel):
     """Response model for a file in the list."""
@@ -30,19 +48,21 @@ class FilesListResponse(BaseModel):
 
 
 # index the file 
-@file_router.post("/index-pdf", status_code=status.HTTP_200_OK)
+@file_router.post("/index-pdf", status_code=status.HTTP_202_ACCEPTED)
 async def index_pdf(
     file: UploadFile = File(...),
     current_user: dict = Depends(get_current_user)
 ) -> IndexResponse:
-    """Upload a PDF and index it into the vector database.
+    """Upload a PDF and queue it for indexing into the vector database.
 
     This endpoint:
     - Accepts a PDF file upload (requires authentication)
     - Saves it to the local `data/uploads/` directory
     - Associates the file with the authenticated user
-    - Uses PyPDFLoader to load the document into LangChain `Document` objects
-    - Indexes those documents into the configured Pinecone vector store
+    - Queues an ingestion job and returns its `job_id` right away
+
+    A worker then loads the document with PyPDFLoader and indexes it into the
+    configured vector store. Poll `GET /files/jobs/{job_id}` for progress.
     """
 
     if file.content_type not in ("application/pdf"):
@@ -58,27 +78,58 @@ async def index_pdf(
     file_path = upload_dir / file.filename
     contents = await file.read()
 
-    file_path.write_bytes(contents)
+    await run_in_threadpool(file_path.write_bytes, contents)
 
     file_id = str(uuid.uuid4())
     user_id = current_user["user_id"]
 
-    # index the saved file 
-    chunks_indexed = index_pdf_file(
-        file_path, 
-        file_id=file_id, 
+    # queue the saved file for indexing
+    job = await get_async_job_queue().enqueue(
+        job_id=str(uuid.uuid4()),
+        file_id=file_id,
         filename=file.filename,
-        user_id=user_id
+        file_path=str(file_path),
+        user_id=user_id,
+        metadata={"uploaded_at": datetime.utcnow().isoformat()}
     )
 
     return IndexResponse(
-        status= "success",
-        message= f"PDF '{file.filename}' uploaded and indexed successfully",
-        chunks_indexed = chunks_indexed,
+        status= "queued",
+        message= f"PDF '{file.filename}' uploaded and queued for indexing",
+        chunks_indexed = 0,
         file_id = file_id,
+        job_id = job.job_id,
     )
 
 
+# get the progress of an indexing job
+@file_router.get("/jobs/{job_id}", response_model=IngestionJobResponse, status_code=status.HTTP_200_OK)
+async def get_ingestion_job(
+    job_id: str,
+    current_user: dict = Depends(get_current_user)
+) -> IngestionJobResponse:
+    """Get the status and progress (pages and chunks) of an indexing job.
+
+    Raises:
+        404: If the job does not exist or belongs to another user.
+    """
+    try:
+        job = await get_async_job_queue().get_job(job_id)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to retrieve job: {str(e)}"
+        )
+
+    if not job or job.user_id != current_user["user_id"]:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Job {job_id} not found"
+        )
+
+    return IngestionJobResponse(**job.model_dump())
+
+
 # Get list of all uploaded files for the authenticated user
 @file_router.get("/", response_model=FilesListResponse, status_code=status.HTTP_200_OK)
 async def list_files(
@@ -91,11 +142,11 @@ async def list_files(
         List of files with their metadata (file_id, filename, uploaded_at).
     """
     try:
-        db_service = get_conversation_db_service()
+        db_service = get_async_conversation_db_service()
         user_id = current_user["user_id"]
         
         # Filter files by user_id
-        files = db_service.list_files(user_id=user_id)
+        files = await db_service.list_files(user_id=user_id)
         
         file_items = [
             FileListItem(
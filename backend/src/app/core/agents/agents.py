@@ -1,23 +1,61 @@
 """Agent implementations for the multi-agent RAG flow.
 
 This module defines three LangChain agents (Retrieval, Summarization,
-Verification) and thin node functions that LangGraph uses to invoke them.
+Verification) and thin node functions that LangGraph uses to invoke them,
+plus a local grounding check that decides whether verification is needed.
+Each node has an async counterpart (`a<name>`) used by the async graph.
 """
 
+import logging
+import re
 from typing import List
 
 from langchain.agents import create_agent
 from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
 
 from .prompts import (
+    OFF_TOPIC_ANSWER,
     RETRIEVAL_SYSTEM_PROMPT,
     SUMMARIZATION_SYSTEM_PROMPT,
     VERIFICATION_SYSTEM_PROMPT,
     MEMORY_SUMMARIZATION_SYSTEM_PROMPT
 )    
 from ..llm.factory import create_chat_model
+from ..config import get_settings
+from ..tracing import annotate
 from .state import QAState
-from .tools import retrieval_tool
+from .turns import Turn, make_turn, remove_turns, render_turns
+from .prompt_budget import assemble_prompt
+from .grounding import grounding_score, is_refusal
+from .scope_gate import ScopeDecision, check_scope, acheck_scope
+from .tools import retrieval_tool, RETRIEVAL_TOOL_K
+from ..retrieval.vector_store import retrieve, aretrieve
+from ..retrieval.serialization import serialize_chunks
+
+logger = logging.getLogger(__name__)
+
+# Pronouns and demonstratives that can refer back to the previous turn
+_FOLLOWUP_REFERENCE_WORDS = frozenset((
+    "it", "its", "this", "that", "these", "those", "they", "them", "their",
+    "he", "him", "his", "she", "her", "former", "latter",
+))
+# Words that do not form a topic of their own: question words, auxiliaries, articles,
+# prepositions, request verbs and the pieces of contractions ("what's" -> "what", "s")
+_FOLLOWUP_FUNCTION_WORDS = frozenset((
+    "what", "which", "who", "whom", "whose", "why", "how", "when", "where",
+    "is", "are", "was", "were", "be", "been", "do", "does", "did", "can", "could",
+    "would", "should", "will", "shall", "may", "might", "must", "has", "have", "had",
+    "a", "an", "the", "of", "in", "on", "at", "to", "for", "from", "with", "about", "by",
+    "and", "or", "but", "so", "not", "more", "also", "there", "then", "please",
+    "i", "me", "you", "we", "us", "tell", "explain", "describe", "elaborate",
+    "s", "t", "re", "ll", "ve", "d", "m",
+))
+# Openers of an elliptical follow-up ("what about France?")
+_FOLLOWUP_OPENERS = ("what about", "how about", "and ", "tell me more", "more on", "elaborate", "explain more")
+_FOLLOWUP_MAX_WORDS = 8
+# content words a follow-up may have besides the reference (the verb in "how does it work?")
+_FOLLOWUP_MAX_CONTENT_WORDS = 1
+_WORD_PATTERN = re.compile(r"[a-z]+")
 
 def _extract_last_ai_content(messages: List[object]) -> str:
     """Extract the content of the last AIMessage in a messages list."""
@@ -26,79 +64,118 @@ def _extract_last_ai_content(messages: List[object]) -> str:
             return str(msg.content)
     return ""
 
-def _build_conversation_context(state: QAState):
-    """Build optimized conversation context using summary + ALL recent history.
-    
-    Strategy:
-    - If conversation_summary exists: Use summary + ALL current conversation_history
-    - Otherwise: Use full conversation_history
-    
-    This ensures NO turns are ever dropped while still optimizing token usage.
-    The memory_summarizer_node handles truncation AFTER summarization.
+def _last_user_question(conversation_turns: List[Turn] | None) -> str:
+    """Return the most recent user question recorded in the conversation turns."""
+    if not conversation_turns:
+        return ""
+    return conversation_turns[-1]["question"].strip()
+
+def _rewrite_followup_query(question: str, conversation_turns: List[Turn] | None) -> str:
+    """Deterministically expand a follow-up question into a standalone search query.
+
+    A question counts as a follow-up when it starts with an elliptical opener
+    ("what about", "tell me more", ...), or when it is short, has at most one
+    content word of its own and either refers back with a pronoun or
+    demonstrative ("how does it work?") or has no content word at all ("why?").
+    Follow-ups are prefixed with the previous user question so the vector
+    search sees the topic being referred to. No LLM call.
     """
-    conversation_history = state.get("conversation_history", '')
-    conversation_summary = state.get("conversation_summary", '')
-
-    # If we have a summary, combine it with ALL current history
-    if conversation_summary:
-        if conversation_history:
-            print(f"-- _build_conversation_context: Using summary ({len(conversation_summary)} chars) + ALL recent history ({len(conversation_history)} chars)")
-            return f"[Previous Context Summary]\n{conversation_summary}\n\n[Recent Conversation]\n{conversation_history}"
-        else:
-            print(f"-- _build_conversation_context: Using summary only ({len(conversation_summary)} chars)")
-            return f"[Previous Context Summary]\n{conversation_summary}"
-
-    if conversation_history:
-        print(f"-- _build_conversation_context: Using full history ({len(conversation_history)} chars)")
-        return conversation_history
-    
-    print("-- _build_conversation_context: No history or summary found")
-    return ""       
+    previous_question = _last_user_question(conversation_turns)
+    if not previous_question:
+        return question
+
+    normalized = question.strip().lower()
+    words = _WORD_PATTERN.findall(normalized)
+    content_words = [
+        word for word in words
+        if word not in _FOLLOWUP_FUNCTION_WORDS and word not in _FOLLOWUP_REFERENCE_WORDS
+    ]
+    refers_back = any(word in _FOLLOWUP_REFERENCE_WORDS for word in words)
+    is_followup = normalized.startswith(_FOLLOWUP_OPENERS) or (
+        len(words) <= _FOLLOWUP_MAX_WORDS
+        and len(content_words) <= _FOLLOWUP_MAX_CONTENT_WORDS
+        and (refers_back or not content_words)
+    )
+
+    if not is_followup:
+        return question
+    return f"{previous_question} {question}"
 
 
 # retrieval_agent
 retrieval_agent = create_agent(
-    model=create_chat_model(),
+    model=create_chat_model("retrieval"),
     tools=[retrieval_tool],
     system_prompt=RETRIEVAL_SYSTEM_PROMPT
 )
 
 # summarization_agent
 summarization_agent = create_agent(
-    model=create_chat_model(),
+    model=create_chat_model("summarization"),
     tools=[],
     system_prompt=SUMMARIZATION_SYSTEM_PROMPT
 )
 
 # verification_agent
 verification_agent = create_agent(
-    model=create_chat_model(),
+    model=create_chat_model("verification"),
     tools=[],
     system_prompt=VERIFICATION_SYSTEM_PROMPT
 )
 
 # memory_summarization_agent
 memory_summarization_agent = create_agent(
-    model=create_chat_model(),
+    model=create_chat_model("memory"),
     tools=[],
     system_prompt=MEMORY_SUMMARIZATION_SYSTEM_PROMPT
 )
 
-# retrieval_agent node
-def retrieval_node(state: QAState) -> QAState:
-    """Retrieval Agent node: gathers context from vector store.
+# the scope gate node
+def _scope_gate_applies(state: QAState) -> bool:
+    """Follow-ups ("what about it?") are judged by the agents, not by embedding similarity."""
+    return get_settings().scope_gate_enabled and not state.get("conversation_turns") and not state.get("conversation_summary")
+
+def _scope_gate_update(state: QAState, decision: ScopeDecision) -> dict:
+    annotate(
+        in_scope=decision.in_scope,
+        centroid_similarity=decision.centroid_similarity,
+        best_match_score=decision.best_match_score,
+    )
+    if decision.in_scope:
+        return {}
 
-    This node:
-    - Sends the user's question to the Retrieval Agent.
-    - Considers conversation history for better query formulation.
-    - Uses file_id (if provided) to limit search to specific uploaded file.
-    - The agent uses the attached retrieval tool to fetch document chunks.
-    - Extracts the tool's content (CONTEXT string) from the ToolMessage.
-    - Stores the consolidated context string in `state["context"]`.
+    return {
+        "context": "",
+        "draft_answer": None,
+        "grounding_score": None,
+        "verification_path": "out_of_scope",
+        **_verification_update(state, OFF_TOPIC_ANSWER),
+    }
+
+def scope_gate_node(state: QAState) -> dict:
+    """Scope gate node: refuses questions unrelated to the document before any LLM call.
+
+    For questions without conversation history, compares the question embedding
+    with the file's chunk centroid and its best-matching chunk. If neither is
+    similar enough, stores the canned refusal as the answer (path "out_of_scope")
+    and the graph skips retrieval, summarization and verification.
     """
+    if not _scope_gate_applies(state):
+        return {}
+    return _scope_gate_update(state, check_scope(state.get("question", ""), state.get("file_id")))
+
+async def ascope_gate_node(state: QAState) -> dict:
+    """Async counterpart of `scope_gate_node`."""
+    if not _scope_gate_applies(state):
+        return {}
+    return _scope_gate_update(state, await acheck_scope(state.get("question", ""), state.get("file_id")))
+
+# retrieval_agent node
+def _retrieval_query_message(state: QAState) -> str:
+    """Build the Retrieval Agent's query from the question, history and file scope."""
     question = state['question']
     file_id = state.get('file_id')
-    conversation_context = _build_conversation_context(state)
+    conversation_context = assemble_prompt(state, "retrieval", include_context=False).conversation_context
 
     # Build enhanced query with conversation 
     query_message = question
@@ -108,19 +185,33 @@ def retrieval_node(state: QAState) -> QAState:
     if file_id:
         query_message = f"[Search only in file_id: {file_id}]\n\n{query_message}" 
 
-    # execute the retrieval_agent with the user msg
-    result = retrieval_agent.invoke({"messages":[HumanMessage(content=query_message)]})
-
-    messages = result.get("messages",[])
-    print("-- retrieval_agent_node messages : ", messages)
-
-    context = ""
+    return query_message
 
+def _context_from_retrieval_messages(messages: List[object]) -> str:
+    """Extract the CONTEXT string from the last ToolMessage of the Retrieval Agent."""
     for msg in reversed(messages):
         # is msg an object created from the ToolMessage class?
         if isinstance(msg, ToolMessage):
-            context = str(msg.content)
-            break
+            return str(msg.content)
+    return ""
+
+def retrieval_node(state: QAState) -> QAState:
+    """Retrieval Agent node: gathers context from vector store.
+
+    This node:
+    - Sends the user's question to the Retrieval Agent.
+    - Considers conversation history for better query formulation.
+    - Uses file_id (if provided) to limit search to specific uploaded file.
+    - The agent uses the attached retrieval tool to fetch document chunks.
+    - Extracts the tool's content (CONTEXT string) from the ToolMessage.
+    - Stores the consolidated context string in `state["context"]`.
+    """
+    query_message = _retrieval_query_message(state)
+
+    # execute the retrieval_agent with the user msg
+    result = retrieval_agent.invoke({"messages":[HumanMessage(content=query_message)]})
+
+    messages = result.get("messages",[])
 
     # Node functions return partial state updates, not full state
     # new_state = {
@@ -130,59 +221,105 @@ def retrieval_node(state: QAState) -> QAState:
     #   "answer": None
     #}
     return {
-        "context" : context
+        "context" : _context_from_retrieval_messages(messages)
     }   
 
-# summarization agent node
-def summarization_node(state: QAState) -> QAState:
-    """Summarization Agent node: generates draft answer from context.
+async def aretrieval_node(state: QAState) -> QAState:
+    """Async counterpart of `retrieval_node`."""
+    query_message = _retrieval_query_message(state)
+
+    result = await retrieval_agent.ainvoke({"messages":[HumanMessage(content=query_message)]})
+
+    return {
+        "context" : _context_from_retrieval_messages(result.get("messages",[]))
+    }
+
+# direct retrieval node (no LLM call)
+def direct_retrieval_node(state: QAState) -> QAState:
+    """Direct Retrieval node: gathers context without the Retrieval Agent.
 
     This node:
-    - Sends question + context + conversation history to the Summarization Agent.
-    - Agent responds with a draft answer grounded only in the context.
-    - Stores the draft answer in `state["draft_answer"]`.
+    - Rewrites follow-up questions into a standalone query using the previous turn.
+    - Calls `retrieve()` directly, filtering by `file_id` (if provided).
+    - Serializes the chunks into the same CONTEXT format as `retrieval_tool`.
+    - Stores the context string in `state["context"]`.
     """
+    question = state['question']
+    file_id = state.get('file_id')
 
-    print("-- State in the summarization_node : ", state)
+    query = _rewrite_followup_query(question, state.get("conversation_turns"))
+    docs = retrieve(query, k=RETRIEVAL_TOOL_K, file_id=file_id)
+
+    return {
+        "context": serialize_chunks(docs)
+    }
+
+async def adirect_retrieval_node(state: QAState) -> QAState:
+    """Async counterpart of `direct_retrieval_node`."""
+    query = _rewrite_followup_query(state['question'], state.get("conversation_turns"))
+    docs = await aretrieve(query, k=RETRIEVAL_TOOL_K, file_id=state.get('file_id'))
+
+    return {
+        "context": serialize_chunks(docs)
+    }
 
+# summarization agent node
+def _summarization_user_content(state: QAState) -> str:
+    """Build the Summarization Agent's input from question, context and history."""
     question = state.get("question", "")
-    context = state.get("context", "")
-    conversation_context = _build_conversation_context(state)
+    prompt = assemble_prompt(state, "summarization")
+    context = prompt.context
+    conversation_context = prompt.conversation_context
     
     if not context:
-        print("WARNING: Context is empty or None!")
+        logger.warning("Summarization Agent called without context")
 
-    # if conversation_history available send it also to generate answer 
+    # if conversation history available send it also to generate answer 
     user_content = f"Question: {question} \n\nContext:\n{context}"
     if conversation_context:
         user_content = f"Conversation History:\n{conversation_context}\n\n{user_content}"
 
+    return user_content
+
+def summarization_node(state: QAState) -> QAState:
+    """Summarization Agent node: generates draft answer from context.
+
+    This node:
+    - Sends question + context + conversation history to the Summarization Agent.
+    - Agent responds with a draft answer grounded only in the context.
+    - Stores the draft answer in `state["draft_answer"]`.
+    """
+
+    user_content = _summarization_user_content(state)
+
     # pass the question and retrieved chunks to the summarization_agent and execute
     result = summarization_agent.invoke({"messages": [HumanMessage(content=user_content)]})
 
     messages = result.get("messages", [])
     draft_answer = _extract_last_ai_content(messages)
-    print("-- Summarization_node (Draft Answer) : ", draft_answer)
 
     return {
         "draft_answer": draft_answer,
     }
 
-# the verification agent node
-def verification_node(state: QAState) -> QAState:
-    """Verification Agent node: verifies and corrects the draft answer.
+async def asummarization_node(state: QAState) -> QAState:
+    """Async counterpart of `summarization_node`."""
+    user_content = _summarization_user_content(state)
 
-    This node:
-    - Sends question + context + draft_answer + conversation history to the Verification Agent.
-    - Agent checks for hallucinations and unsupported claims.
-    - Stores the final verified answer in `state["answer"]`.
-    - Updates conversation history with the current Q&A turn.
-    """
+    result = await summarization_agent.ainvoke({"messages": [HumanMessage(content=user_content)]})
 
+    return {
+        "draft_answer": _extract_last_ai_content(result.get("messages", [])),
+    }
+
+# the verification agent node
+def _verification_user_content(state: QAState) -> str:
+    """Build the Verification Agent's input from question, context, draft and history."""
     question = state.get("question", "")
-    context = state.get("context", "")
     draft_answer = state.get("draft_answer")
-    conversation_context = _build_conversation_context(state)
+    prompt = assemble_prompt(state, "verification")
+    context = prompt.context
+    conversation_context = prompt.conversation_context
 
     user_content = f"""Question: {question}
     Context:
@@ -196,85 +333,112 @@ def verification_node(state: QAState) -> QAState:
     if conversation_context:
         user_content = f"Conversation History:\n{conversation_context}\n\n{user_content}"
 
+    return user_content
+
+def _verification_update(state: QAState, answer: str) -> dict:
+    """Build the state update for a verified answer, appending the turn to history."""
+    question = state.get("question", "")
+
+    # the reducer appends this turn to conversation_turns
+    return {
+        "answer": answer,
+        "conversation_turns": [make_turn(question, answer)]
+    }
+
+def verification_node(state: QAState) -> QAState:
+    """Verification Agent node: verifies and corrects the draft answer.
+
+    This node:
+    - Sends question + context + draft_answer + conversation history to the Verification Agent.
+    - Agent checks for hallucinations and unsupported claims.
+    - Stores the final verified answer in `state["answer"]`.
+    - Updates conversation history with the current Q&A turn.
+    """
+
+    user_content = _verification_user_content(state)
+
     # pass the question, retrieved chunks and generated draft answer to the verification_agent and execute
     result = verification_agent.invoke({"messages": [HumanMessage(content=user_content)]})
 
     messages = result.get("messages", [])
     answer = _extract_last_ai_content(messages)
 
-    # Update conversation history with this turn
-    current_history = state.get("conversation_history")
-    new_history = current_history
-    if new_history:
-        new_history += f"\n\nUser: {question}\nAssistant: {answer}"
-    else:
-        new_history = f"User: {question}\nAssistant: {answer}"    
+    return _verification_update(state, answer)
 
+async def averification_node(state: QAState) -> QAState:
+    """Async counterpart of `verification_node`."""
+    user_content = _verification_user_content(state)
 
-    return {
-        "answer": answer,
-        "conversation_history": new_history
-    }
+    result = await verification_agent.ainvoke({"messages": [HumanMessage(content=user_content)]})
+
+    return _verification_update(state, _extract_last_ai_content(result.get("messages", [])))
+
+# the grounding check node
+def grounding_check_node(state: QAState) -> dict:
+    """Grounding check node: decides locally whether the draft needs the Verification Agent.
 
-# the memory_summarizer node
-def memory_summarizer_node(state: QAState) -> dict:
-    """Memory Summarization node: compresses conversation history when it gets long.
-    
     This node:
-    - Parses turns robustly using 'User:' markers to count actual conversation turns.
-    - Checks if conversation history has more than 5 turns (configurable threshold).
-    - If yes, uses the Memory Summarization Agent to create a concise summary.
-    - Stores the summary in conversation_summary field.
-    - Truncates old conversation_history, keeping only recent turns.
-    - This actively reduces token usage for very long conversations.
-    
-    The summary is used by all agents via _build_conversation_context() which combines
-    summary + ALL current history to ensure NO turns are dropped.
+    - Accepts an exact off-topic refusal as the answer (path "refusal").
+    - Otherwise scores the draft's sentence-level token overlap with the context.
+    - Accepts the draft as the answer when the score reaches
+      `settings.verification_skip_threshold` (path "grounded").
+    - Leaves the answer to the Verification Agent below it (path "needs_verification").
+    - Stores `grounding_score` and `verification_path` for the turn.
     """
 
-    conversation_history = state.get('conversation_history', '')
+    settings = get_settings()
+    draft_answer = state.get("draft_answer") or ""
+
+    if is_refusal(draft_answer):
+        score, path = 1.0, "refusal"
+    else:
+        score = grounding_score(draft_answer, state.get("context"), settings.grounding_sentence_support)
+        path = "grounded" if score >= settings.verification_skip_threshold else "needs_verification"
+
+    annotate(grounding_score=score, verification_path=path)
+
+    update = {"grounding_score": score, "verification_path": path}
+    if path != "needs_verification":
+        update.update(_verification_update(state, draft_answer))
+    return update
+
+async def agrounding_check_node(state: QAState) -> dict:
+    """Async counterpart of `grounding_check_node` (pure CPU, no model call)."""
+    return grounding_check_node(state)
+
+# memory summarization (run in the background, off the graph)
+def needs_memory_summary(state: QAState) -> bool:
+    """Return True if the history is long enough to be summarized."""
+    return _memory_summary_request(state) is not None
+
+def _memory_summary_request(state: QAState) -> tuple[str, List[Turn]] | None:
+    """Decide whether the history needs summarizing and build the summary prompt.
+
+    Returns:
+        Tuple of (summary prompt, older turns being summarized), or None when the
+        history is under the threshold and nothing needs to be summarized.
+    """
+
+    conversation_turns = state.get('conversation_turns') or []
     existing_summary = state.get('conversation_summary', '')
     
-    if not conversation_history:
-        print("-- memory_summarizer_node: No history to summarize")
-        return {}
+    if not conversation_turns:
+        return None
     
-    import re
-    user_pattern = r'(?m)^User:\s'
-    user_turns = re.split(user_pattern, conversation_history)
-    # Filter empty strings and count actual turns
-    user_turns = [t.strip() for t in user_turns if t.strip()]
-    turn_count = len(user_turns) 
-
-    print(f"-- memory_summarizer_node: Counted {turn_count} turns using User: markers") 
-        
+    turn_count = len(conversation_turns)
+
     SUMMARIZATION_THRESHOLD = 5
     RECENT_TURNS_TO_KEEP = 3
 
     if turn_count <= SUMMARIZATION_THRESHOLD:
-        print(f"-- memory_summarizer_node: History under threshold ({turn_count} <= {SUMMARIZATION_THRESHOLD}), no summary needed")
-        return {}
+        return None
     
-    print(f"-- memory_summarizer_node: History exceeds threshold ({turn_count} > {SUMMARIZATION_THRESHOLD}), generating summary...")
+    annotate(history_turns=turn_count, summarized_turns=turn_count - RECENT_TURNS_TO_KEEP)
 
-    # Find all positions where "User: " appears (position where the "User: " begins)
-    turn_positions = [m.start() for m in re.finditer(user_pattern, conversation_history)]
-    
-    if len(turn_positions) >= RECENT_TURNS_TO_KEEP:
-        truncate_position = turn_positions[-RECENT_TURNS_TO_KEEP]
-        recent_history = conversation_history[truncate_position:]
-        older_history = conversation_history[:truncate_position].strip()
-    else:
-        recent_history = conversation_history
-        older_history = ""    
+    older_turns = conversation_turns[:-RECENT_TURNS_TO_KEEP]
 
-    # Nothing to summarize if no older history
-    if not older_history:
-        print(f"-- memory_summarizer_node: No older history to summarize (only {turn_count} turns)")
-        return {}
-        
     # Build content to summarize: existing summary (if any) + older history
-    content_to_summarize = older_history
+    content_to_summarize = render_turns(older_turns)
     if existing_summary:
         content_to_summarize = f"Previous Summary:\n{existing_summary}\n\nAdditional History:\n{content_to_summarize}"  
 
@@ -284,14 +448,50 @@ def memory_summarizer_node(state: QAState) -> dict:
 
     Provide a brief summary (3-5 sentences) highlighting key topics, questions, and important information discussed."""
 
+    return summary_prompt, older_turns
+
+def summarize_memory(state: QAState) -> dict:
+    """Memory Summarization: compresses conversation history when it gets long.
+
+    Runs in the background after a turn has been answered (see `memory.py`):
+    - Checks if conversation_turns has more than 5 turns (configurable threshold).
+    - If yes, uses the Memory Summarization Agent to create a concise summary
+      of all but the 3 most recent turns.
+    - Returns the summary (conversation_summary) and removals of the summarized
+      turns, which the `conversation_turns` reducer applies by turn id.
+    - This actively reduces token usage for very long conversations.
+
+    The summary is used by all agents via assemble_prompt(), which combines
+    it with the most recent turns that fit each agent's token budget.
+    """
+
+    request = _memory_summary_request(state)
+    if request is None:
+        return {}
+    summary_prompt, older_turns = request
+
     # Generate summary
     result = memory_summarization_agent.invoke({"messages": [HumanMessage(content=summary_prompt)]})
 
     summary = _extract_last_ai_content(result.get("messages",[]))
 
-    print(f"-- memory_summarizer_node: Generated summary {summary}")
+    annotate(summary_chars=len(summary))
 
     return {
         "conversation_summary": summary,
-        "conversation_history": recent_history
-    }
\ No newline at end of file
+        "conversation_turns": remove_turns(older_turns)
+    }
+
+async def asummarize_memory(state: QAState) -> dict:
+    """Async counterpart of `summarize_memory`."""
+    request = _memory_summary_request(state)
+    if request is None:
+        return {}
+    summary_prompt, older_turns = request
+
+    result = await memory_summarization_agent.ainvoke({"messages": [HumanMessage(content=summary_prompt)]})
+
+    return {
+        "conversation_summary": _extract_last_ai_content(result.get("messages",[])),
+        "conversation_turns": remove_turns(older_turns)
+    }
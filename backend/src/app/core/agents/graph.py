@@ -1,30 +1,114 @@
 """LangGraph orchestration for the linear multi-agent QA flow."""
-from typing import Any,Dict
+import asyncio
+import contextvars
+import logging
+import queue
+import threading
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Set
 from functools import lru_cache
 
 from langgraph.graph import StateGraph
 from langgraph.constants import START, END
+from langchain_core.messages import AIMessageChunk
+from langchain_core.runnables import RunnableLambda
 
-from .utils import is_connection_closed_error, reset_graph_cache
+from .utils import is_connection_closed_error, reset_graph_cache, reset_async_graph_cache
 
 from .state import QAState
-from .agents import retrieval_node, summarization_node, verification_node, memory_summarizer_node
-from ...db.checkpointer import get_postgres_checkpointer
+from .turns import merge_turns, turns_from_history, turns_token_count
+from .agents import (
+    scope_gate_node, ascope_gate_node,
+    retrieval_node, aretrieval_node,
+    direct_retrieval_node, adirect_retrieval_node,
+    summarization_node, asummarization_node,
+    grounding_check_node, agrounding_check_node,
+    verification_node, averification_node,
+    _verification_update,
+)
+from ..config import get_settings
+from ..tracing import annotate, traced
+from ..cache.answer_cache import AnswerLookup, SemanticAnswerCache, get_answer_cache
+from ..retrieval.serialization import count_serialized_chunks
+from ...db.checkpointer import get_postgres_checkpointer, get_async_postgres_checkpointer
+from .memory import thread_lock, athread_lock, schedule_memory_summary, aschedule_memory_summary
+
+logger = logging.getLogger(__name__)
+
+RETRIEVAL_MODES = ("agentic", "direct")
+
+# end of a streamed turn's event queue
+_STREAM_DONE = object()
+# streamed turns running as event-loop tasks
+_stream_tasks: Set[asyncio.Task] = set()
+
+def _resolve_retrieval_mode(retrieval_mode: str | None) -> str:
+    """Return the requested retrieval mode, falling back to `settings.retrieval_mode`."""
+    mode = (retrieval_mode or get_settings().retrieval_mode).lower()
+    if mode not in RETRIEVAL_MODES:
+        raise ValueError(f"Unknown retrieval mode '{mode}'. Expected one of: {', '.join(RETRIEVAL_MODES)}")
+    return mode
+
+def _turn_started(on_start: Optional[Callable[[datetime], None]]) -> None:
+    """Report the time the turn took the thread's lock (the question's timestamp)."""
+    if on_start is not None:
+        on_start(datetime.now(timezone.utc))
+
+def route_retrieval(state: QAState) -> str:
+    """Pick the retrieval node for this turn based on `state["retrieval_mode"]`."""
+    if state.get("retrieval_mode") == "direct":
+        return "direct_retrieval"
+    return "retrieval"
+
+def route_scope(state: QAState) -> str:
+    """End the turn early for out-of-scope questions, otherwise pick the retrieval node."""
+    if state.get("verification_path") == "out_of_scope":
+        return "done"
+    return route_retrieval(state)
+
+def route_verification(state: QAState) -> str:
+    """Send the draft to the Verification Agent unless the grounding check accepted it."""
+    if state.get("verification_path") == "needs_verification":
+        return "verification"
+    return "done"
+
+def _node(func, afunc) -> RunnableLambda:
+    """Wrap a node's sync and async implementations so the graph can run either way (traced as "node" spans)."""
+    return RunnableLambda(
+        traced(func.__name__, "node")(func),
+        afunc=traced(func.__name__, "node")(afunc),
+        name=func.__name__
+    )
 
 # create graph
-def create_qa_graph() -> Any:
+def create_qa_graph(checkpointer: Any = None, stateless: bool = False) -> Any:
     """Create and compile the linear multi-agent QA graph.
 
     The graph executes in order:
-    1. Retrieval Agent: gathers context from vector store
+    0. Scope gate: refuses history-free questions unrelated to the document
+       (embedding similarity only, no LLM call) and ends the turn early
+    1. Retrieval: gathers context from vector store, either through the Retrieval
+       Agent ("agentic") or by calling retrieve() directly ("direct")
     2. Summarization Agent: generates draft answer from context
-    3. Verification Agent: verifies and corrects the answer
-    4. Memory Summarizer: compresses long conversation histories (optional)
+    3. Grounding check: local sentence-level overlap score of the draft against
+       the context; well-grounded drafts and exact refusals skip step 4
+    4. Verification Agent: verifies and corrects the answer
+
+    Long conversation histories are compressed by the Memory Summarizer in the
+    background after the turn (see `memory.py`), not by a graph node.
 
     Uses PostgreSQL checkpointer for persistent conversation history across turns and sessions.
+    Every node has sync and async implementations, so the compiled graph supports
+    both `invoke`/`stream` and `ainvoke`/`astream`.
+
+    Args:
+        checkpointer: Checkpointer to compile with (defaults to the sync PostgresSaver).
+            Pass an AsyncPostgresSaver for a graph driven with `ainvoke`/`astream`.
+        stateless: Build the single-question variant instead: no checkpointer,
+            so a run never touches the checkpoint tables.
 
     Returns:
-        Compiled graph ready for execution with PostgreSQL checkpointer.
+        Compiled graph ready for execution (with PostgreSQL checkpointer unless stateless).
     """
 
     # graph state
@@ -32,25 +116,36 @@ def create_qa_graph() -> Any:
     # context: str | None
     # draft_answer: str | None
     # answer: str | None    
-    # conversation_history: str | None
+    # conversation_turns: list[Turn] (merged by turn id)
     # conversation_summary: str | None
     builder = StateGraph(QAState)
 
     # add nodes
-    builder.add_node("retrieval", retrieval_node)
-    builder.add_node("summarization", summarization_node)
-    builder.add_node("verification", verification_node)
-    builder.add_node("memory_summarizer", memory_summarizer_node)
-
-    # Define linear flow: START -> retrieval -> summarization -> verification -> memory_summarizer -> END
-    builder.add_edge(START, "retrieval")
+    builder.add_node("scope_gate", _node(scope_gate_node, ascope_gate_node))
+    builder.add_node("retrieval", _node(retrieval_node, aretrieval_node))
+    builder.add_node("direct_retrieval", _node(direct_retrieval_node, adirect_retrieval_node))
+    builder.add_node("summarization", _node(summarization_node, asummarization_node))
+    builder.add_node("grounding_check", _node(grounding_check_node, agrounding_check_node))
+    builder.add_node("verification", _node(verification_node, averification_node))
+
+    # Define flow: START -> scope_gate -> (retrieval | direct_retrieval) -> summarization -> grounding_check
+    #   -> [verification] -> END
+    # (out-of-scope questions go from scope_gate straight to END)
+    builder.add_edge(START, "scope_gate")
+    builder.add_conditional_edges("scope_gate", route_scope, {"retrieval": "retrieval", "direct_retrieval": "direct_retrieval", "done": END})
     builder.add_edge("retrieval", "summarization")
-    builder.add_edge("summarization","verification")
-    builder.add_edge("verification", "memory_summarizer")
-    builder.add_edge("memory_summarizer", END)
+    builder.add_edge("direct_retrieval", "summarization")
+    builder.add_edge("summarization", "grounding_check")
+    builder.add_conditional_edges("grounding_check", route_verification, {"verification": "verification", "done": END})
+    builder.add_edge("verification", END)
+
+    # stateless questions have nothing to persist
+    if stateless:
+        return builder.compile()
 
     # Compile with PostgreSQL checkpointer for persistent conversation storage
-    checkpointer = get_postgres_checkpointer()
+    if checkpointer is None:
+        checkpointer = get_postgres_checkpointer()
     return builder.compile(checkpointer=checkpointer)
 
 # Compile graph (with cache)
@@ -59,8 +154,24 @@ def get_qa_graph() -> Any:
     """Get the compiled QA graph instance (singleton via LRU cache)."""
     return create_qa_graph()
 
+@lru_cache(maxsize=1)
+def get_stateless_qa_graph() -> Any:
+    """Get the compiled checkpoint-free QA graph used for stateless questions (singleton)."""
+    return create_qa_graph(stateless=True)
+
+_async_qa_graph: Any = None
+
+async def get_async_qa_graph() -> Any:
+    """Get the compiled QA graph backed by the async PostgreSQL checkpointer (singleton)."""
+    global _async_qa_graph
+    if _async_qa_graph is None:
+        checkpointer = await get_async_postgres_checkpointer()
+        _async_qa_graph = create_qa_graph(checkpointer=checkpointer)
+    return _async_qa_graph
+
 # run the qa flow
-def run_qa_flow(question : str) -> Dict[str, Any]:
+@traced("run_qa_flow", "internal")
+def run_qa_flow(question : str, retrieval_mode: str | None = None) -> Dict[str, Any]:
     """Run the complete multi-agent QA flow for a single question without memory.
 
     This is the entry point for stateless QA. It:
@@ -68,10 +179,14 @@ def run_qa_flow(question : str) -> Dict[str, Any]:
     2. Executes the linear agent flow (Retrieval -> Summarization -> Verification)
     3. Extracts and returns the final results
 
-    Uses a unique thread_id to avoid conversation history.
+    Runs on the checkpoint-free graph, so no conversation state is written.
+    Near-duplicate questions are answered from the semantic answer cache.
 
     Args:
         question: The user's question about the vector databases paper.
+        retrieval_mode: "agentic" or "direct" (defaults to `settings.retrieval_mode`).
+        on_start: Optional callback given the time the turn took the thread's
+            lock, so turns of one thread are timestamped in the order they run.
 
     Returns:
         Dictionary with keys:
@@ -80,9 +195,39 @@ def run_qa_flow(question : str) -> Dict[str, Any]:
         - `context`: Retrieved context from vector store
     """
 
-    import uuid
+    graph = get_stateless_qa_graph()
+    initial_state = _stateless_initial_state(question, retrieval_mode)
 
-    graph = get_qa_graph()
+    cache, lookup = _lookup_answer(initial_state)
+    if lookup and lookup.hit:
+        return _cached_final_state(initial_state, lookup)
+
+    final_state = graph.invoke(initial_state)
+
+    if lookup:
+        cache.store(lookup, final_state)
+    return final_state
+
+
+@traced("run_qa_flow", "internal")
+async def arun_qa_flow(question: str, retrieval_mode: str | None = None) -> Dict[str, Any]:
+    """Async counterpart of `run_qa_flow()`, driven with `graph.ainvoke`."""
+
+    graph = get_stateless_qa_graph()
+    initial_state = _stateless_initial_state(question, retrieval_mode)
+
+    cache, lookup = await _alookup_answer(initial_state)
+    if lookup and lookup.hit:
+        return _cached_final_state(initial_state, lookup)
+
+    final_state = await graph.ainvoke(initial_state)
+    if lookup:
+        await cache.astore(lookup, final_state)
+    return final_state
+
+
+def _stateless_initial_state(question: str, retrieval_mode: str | None) -> QAState:
+    """Build the initial state for a stateless question."""
 
     # initial state
     initial_state: QAState = {
@@ -90,91 +235,425 @@ def run_qa_flow(question : str) -> Dict[str, Any]:
         "context": None,
         "draft_answer": None,
         "answer": None,
-        "conversation_history" : None,
+        "conversation_turns": [],
         "conversation_summary": None,
+        "retrieval_mode": _resolve_retrieval_mode(retrieval_mode),
+        "grounding_score": None,
+        "verification_path": None,
     }
 
-    config = {"configurable": {"thread_id": str(uuid.uuid4())}}
+    return initial_state
 
-    final_state = graph.invoke(initial_state, config)
-    print("-- Final state of the 'run_qa_flow' : ", final_state)
 
-    return final_state
+# semantic answer cache
+def _answer_cache_for(initial_state: QAState) -> SemanticAnswerCache | None:
+    """Return the answer cache if this turn's answer cannot depend on earlier turns."""
+    if initial_state.get("conversation_turns") or initial_state.get("conversation_summary"):
+        return None
+    return get_answer_cache()
 
 
-# run_qa_flow_with_history
-def run_qa_flow_with_history(question: str, thread_id: str, file_id: str = None) -> Dict[str, Any]:
-    """Run the multi-agent QA flow with conversation history using LangGraph's MemorySaver.
+def _lookup_answer(initial_state: QAState) -> tuple[SemanticAnswerCache | None, AnswerLookup | None]:
+    """Look the question up in the answer cache (scoped by the turn's file_id).
 
-    This is the entry point for conversational multi-turn QA. It:
-    1. Loads previous conversation history from MemorySaver using thread_id
-    2. Initializes the graph state with the question AND previous history
-    3. Uses file_id (if provided) to limit retrieval to a specific uploaded file
-    4. Executes the linear agent flow (Retrieval -> Summarization -> Verification)
-    5. LangGraph automatically saves the updated conversation state
-    6. Returns the final results
-    
-    The conversation_history is preserved across turns by loading it from
-    the checkpointer and passing it in the initial state.
+    Returns:
+        Tuple of (cache, lookup); both None when the turn is not cacheable.
+    """
+    cache = _answer_cache_for(initial_state)
+    if cache is None:
+        return None, None
+
+    try:
+        return cache, cache.lookup(initial_state["question"], initial_state.get("file_id"))
+    except Exception as e:
+        # the cache must never fail a question
+        logger.warning("Answer cache lookup failed, running the agents: %s", e)
+        return None, None
+
+
+async def _alookup_answer(initial_state: QAState) -> tuple[SemanticAnswerCache | None, AnswerLookup | None]:
+    """Async counterpart of `_lookup_answer()`."""
+    cache = _answer_cache_for(initial_state)
+    if cache is None:
+        return None, None
+
+    try:
+        return cache, await cache.alookup(initial_state["question"], initial_state.get("file_id"))
+    except Exception as e:
+        logger.warning("Answer cache lookup failed, running the agents: %s", e)
+        return None, None
+
+
+def _cached_final_state(initial_state: QAState, lookup: AnswerLookup) -> Dict[str, Any]:
+    """Build the final state for a cache hit, recording the turn in the history as the graph would."""
+    annotate(answer_cache_hit=True)
+    state = {**initial_state, **lookup.values, "verification_path": "cached"}
+    update = _verification_update(state, state["answer"])
+    state.update(update)
+    state["conversation_turns"] = merge_turns(initial_state.get("conversation_turns"), update["conversation_turns"])
+    return state
 
-    Args:
-        question: The user's current question.
-        thread_id: Unique identifier for the conversation thread (session_id).
-        file_id: Optional file identifier to limit search to a specific uploaded file.
+
+def _cached_events(final_state: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Stage events for a turn answered from the cache."""
+    return [
+        {"event": "retrieved", "data": {"chunks": count_serialized_chunks(final_state.get("context")), "cached": True}},
+        {"event": "answer", "data": {"answer": final_state.get("answer", "")}},
+    ]
+
+
+def _prepare_history_turn(question: str, thread_id: str, file_id: str | None, retrieval_mode: str | None):
+    """Load the thread's previous state and build the initial state for a new turn.
 
     Returns:
-        Dictionary with keys:
-        - `answer`: Final verified answer
-        - `draft_answer`: Initial draft answer from summarization agent
-        - `context`: Retrieved context from vector store
-        - `conversation_history`: The conversation history used (if any)
+        Tuple of (compiled graph, run config, initial state).
     """
 
     graph = get_qa_graph()
     config = {"configurable": {"thread_id": thread_id}}
 
     # Load previous conversation history from checkpointer 
-    previous_history = ""
-    previous_summary = ""
-    previous_file_id = file_id
+    previous_values = {}
 
     try:
        previous_state = graph.get_state(config)
        if previous_state and previous_state.values:
-           previous_history = previous_state.values.get("conversation_history", "")
-           previous_summary = previous_state.values.get("conversation_summary", "")
-           if not file_id:
-               previous_file_id = previous_state.values.get("file_id")
-           print(f"-- Loaded previous history (length: {len(previous_history)} chars)")
-           if previous_summary:
-              print(f"-- Loaded previous summary (length: {len(previous_summary)} chars)")
+           previous_values = previous_state.values
     except Exception as e:
         if is_connection_closed_error(e):
             reset_graph_cache()
             graph = get_qa_graph()
             previous_state = graph.get_state(config)
+            previous_values = previous_state.values if previous_state else {}
         else:
             raise
 
-        print(f"-- No previous history found for thread {thread_id}: {e}")   
+        logger.warning("No previous history found for thread %s: %s", thread_id, e)
+
+    return graph, config, _history_initial_state(question, previous_values, file_id, retrieval_mode)
+
+
+async def _aprepare_history_turn(question: str, thread_id: str, file_id: str | None, retrieval_mode: str | None):
+    """Async counterpart of `_prepare_history_turn()`."""
+
+    graph = await get_async_qa_graph()
+    config = {"configurable": {"thread_id": thread_id}}
+
+    previous_values = {}
+
+    try:
+        previous_state = await graph.aget_state(config)
+        if previous_state and previous_state.values:
+            previous_values = previous_state.values
+    except Exception as e:
+        if is_connection_closed_error(e):
+            await reset_async_graph_cache()
+            graph = await get_async_qa_graph()
+            previous_state = await graph.aget_state(config)
+            previous_values = previous_state.values if previous_state else {}
+        else:
+            raise
+
+        logger.warning("No previous history found for thread %s: %s", thread_id, e)
+
+    return graph, config, _history_initial_state(question, previous_values, file_id, retrieval_mode)
+
+
+def _history_initial_state(question: str, previous_values: Dict[str, Any], file_id: str | None, retrieval_mode: str | None) -> QAState:
+    """Build a turn's initial state, carrying over history and summary from the previous state."""
+
+    previous_turns = previous_values.get("conversation_turns") or []
+    previous_summary = previous_values.get("conversation_summary", "")
+    previous_file_id = file_id or previous_values.get("file_id")
+
+    # threads checkpointed before conversation_turns existed carry a history string
+    if not previous_turns and previous_values.get("conversation_history"):
+        previous_turns = turns_from_history(previous_values["conversation_history"])
+
+    if previous_values:
+        annotate(
+            history_turns=len(previous_turns),
+            history_tokens=turns_token_count(previous_turns),
+            summary_chars=len(previous_summary),
+        )
 
     # Initial state with preserved conversation history and summary
-    initial_state: QAState = {
+    return {
         "question": question,
         "context": None,
         "draft_answer": None,
         "answer": None,
-        "conversation_history": previous_history,  
-        "conversation_summary": previous_summary,  
+        "conversation_turns": previous_turns,
+        "conversation_summary": previous_summary,
+        "conversation_history": None,
         "file_id": previous_file_id,
+        "retrieval_mode": _resolve_retrieval_mode(retrieval_mode),
+        "grounding_score": None,
+        "verification_path": None,
     } 
 
+
+# run_qa_flow_with_history
+@traced("run_qa_flow_with_history", "internal")
+def run_qa_flow_with_history(question: str, thread_id: str, file_id: str = None, retrieval_mode: str | None = None, on_start: Optional[Callable[[datetime], None]] = None) -> Dict[str, Any]:
+    """Run the multi-agent QA flow with conversation history using LangGraph's MemorySaver.
+
+    This is the entry point for conversational multi-turn QA. It:
+    1. Loads previous conversation history from MemorySaver using thread_id
+    2. Initializes the graph state with the question AND previous history
+    3. Uses file_id (if provided) to limit retrieval to a specific uploaded file
+    4. Executes the linear agent flow (Retrieval -> Summarization -> Verification)
+    5. LangGraph automatically saves the updated conversation state
+    6. Returns the final results
+    
+    The conversation_turns are preserved across turns by loading them from
+    the checkpointer and passing them in the initial state. Turns without
+    history can be answered from the semantic answer cache (scoped by file_id);
+    a cached turn is still written to the checkpoint.
+
+    Args:
+        question: The user's current question.
+        thread_id: Unique identifier for the conversation thread (session_id).
+        file_id: Optional file identifier to limit search to a specific uploaded file.
+        retrieval_mode: "agentic" or "direct" (defaults to `settings.retrieval_mode`).
+        on_start: Optional callback given the time the turn took the thread's
+            lock, so turns of one thread are timestamped in the order they run.
+
+    Returns:
+        Dictionary with keys:
+        - `answer`: Final verified answer
+        - `draft_answer`: Initial draft answer from summarization agent
+        - `context`: Retrieved context from vector store
+        - `conversation_turns`: The conversation turns, including this one
+    """
+
+    # the thread lock keeps a background memory summary from racing this turn
+    with thread_lock(thread_id):
+        _turn_started(on_start)
+        final_state = _run_history_turn(question, thread_id, file_id, retrieval_mode)
+
+    schedule_memory_summary(get_qa_graph(), thread_id, final_state)
+    return final_state
+
+
+def _run_history_turn(question: str, thread_id: str, file_id: str | None, retrieval_mode: str | None) -> Dict[str, Any]:
+    graph, config, initial_state = _prepare_history_turn(question, thread_id, file_id, retrieval_mode)
+
+    # first turns of a thread don't depend on history and can be answered from the cache
+    cache, lookup = _lookup_answer(initial_state)
+    if lookup and lookup.hit:
+        final_state = _cached_final_state(initial_state, lookup)
+        graph.update_state(config, final_state, as_node="verification")
+        return final_state
+
     # the updated state saved to the PostgreSQL db 
     final_state = graph.invoke(initial_state, config)
-    print(f"-- Final state of 'run_qa_flow_with_history' (thread={thread_id}): ", final_state)
 
+    if lookup:
+        cache.store(lookup, final_state)
+    return final_state
+
+
+@traced("run_qa_flow_with_history", "internal")
+async def arun_qa_flow_with_history(question: str, thread_id: str, file_id: str = None, retrieval_mode: str | None = None, on_start: Optional[Callable[[datetime], None]] = None) -> Dict[str, Any]:
+    """Async counterpart of `run_qa_flow_with_history()`, driven with `graph.ainvoke`."""
+
+    async with athread_lock(thread_id):
+        _turn_started(on_start)
+        final_state = await _arun_history_turn(question, thread_id, file_id, retrieval_mode)
+
+    aschedule_memory_summary(await get_async_qa_graph(), thread_id, final_state)
+    return final_state
+
+
+async def _arun_history_turn(question: str, thread_id: str, file_id: str | None, retrieval_mode: str | None) -> Dict[str, Any]:
+    graph, config, initial_state = await _aprepare_history_turn(question, thread_id, file_id, retrieval_mode)
+
+    cache, lookup = await _alookup_answer(initial_state)
+    if lookup and lookup.hit:
+        final_state = _cached_final_state(initial_state, lookup)
+        await graph.aupdate_state(config, final_state, as_node="verification")
+        return final_state
+
+    final_state = await graph.ainvoke(initial_state, config)
+    if lookup:
+        await cache.astore(lookup, final_state)
     return final_state
 
+# stream_qa_flow_with_history
+def stream_qa_flow_with_history(question: str, thread_id: str, file_id: str = None, retrieval_mode: str | None = None, on_start: Optional[Callable[[datetime], None]] = None) -> Iterator[Dict[str, Any]]:
+    """Run the conversational QA flow and yield progress events as they happen.
+
+    Uses LangGraph streaming with `stream_mode=["updates", "messages"]` (including
+    the agents' inner LLM calls) and translates it into stage events:
+    - `retrieved`: retrieval finished (`chunks`: number of chunks in the context)
+    - `drafting`: the Summarization Agent is writing the draft answer
+    - `verifying`: the Verification Agent is checking the draft answer (not sent
+      when the grounding check accepts the draft; no `token` events follow then)
+    - `token`: a piece of the final answer (`content`) as it is generated
+    - `answer`: the complete final answer, once verification has finished
+    - `final`: the final graph state, once the turn has been checkpointed
+      (memory summarization then runs in the background)
+
+    Args:
+        question: The user's current question.
+        thread_id: Unique identifier for the conversation thread (session_id).
+        file_id: Optional file identifier to limit search to a specific uploaded file.
+        retrieval_mode: "agentic" or "direct" (defaults to `settings.retrieval_mode`).
+        on_start: Optional callback given the time the turn took the thread's lock.
+
+    The turn runs on its own thread and hands its events over through a
+    queue, so it finishes (and releases the thread's lock) even if the
+    caller stops consuming the events.
+
+    Yields:
+        Dictionaries with an `event` name and a `data` payload.
+    """
+
+    events: queue.Queue = queue.Queue()
+
+    def produce() -> None:
+        try:
+            final_state: Dict[str, Any] = {}
+            with thread_lock(thread_id):
+                _turn_started(on_start)
+                for event in _stream_history_turn(question, thread_id, file_id, retrieval_mode):
+                    if event["event"] == "final":
+                        final_state = event["data"]
+                    events.put(event)
+            schedule_memory_summary(get_qa_graph(), thread_id, final_state)
+        except Exception as e:
+            events.put(e)
+        finally:
+            events.put(_STREAM_DONE)
+
+    # the copied context keeps the caller's trace span
+    context = contextvars.copy_context()
+    threading.Thread(target=context.run, args=(produce,), name=f"qa-stream-{thread_id}", daemon=True).start()
+
+    while True:
+        item = events.get()
+        if item is _STREAM_DONE:
+            return
+        if isinstance(item, Exception):
+            raise item
+        yield item
+
+
+def _stream_history_turn(question: str, thread_id: str, file_id: str | None, retrieval_mode: str | None) -> Iterator[Dict[str, Any]]:
+    graph, config, initial_state = _prepare_history_turn(question, thread_id, file_id, retrieval_mode)
+
+    cache, lookup = _lookup_answer(initial_state)
+    if lookup and lookup.hit:
+        final_state = _cached_final_state(initial_state, lookup)
+        graph.update_state(config, final_state, as_node="verification")
+        yield from _cached_events(final_state)
+        yield {"event": "final", "data": final_state}
+        return
+
+    for item in graph.stream(initial_state, config, stream_mode=["updates", "messages"], subgraphs=True):
+        yield from _stream_events(*item)
+
+    final_state = graph.get_state(config).values
+    if lookup:
+        cache.store(lookup, final_state)
+    yield {"event": "final", "data": final_state}
+
+
+async def astream_qa_flow_with_history(question: str, thread_id: str, file_id: str = None, retrieval_mode: str | None = None, on_start: Optional[Callable[[datetime], None]] = None) -> AsyncIterator[Dict[str, Any]]:
+    """Async counterpart of `stream_qa_flow_with_history()`, built on `graph.astream`.
+
+    The turn runs as its own event-loop task, so it finishes even if the
+    caller stops consuming the events (e.g. the client disconnects).
+    """
+
+    events: asyncio.Queue = asyncio.Queue()
+
+    async def produce() -> None:
+        try:
+            final_state: Dict[str, Any] = {}
+            async with athread_lock(thread_id):
+                _turn_started(on_start)
+                async for event in _astream_history_turn(question, thread_id, file_id, retrieval_mode):
+                    if event["event"] == "final":
+                        final_state = event["data"]
+                    events.put_nowait(event)
+            aschedule_memory_summary(await get_async_qa_graph(), thread_id, final_state)
+        except Exception as e:
+            events.put_nowait(e)
+        finally:
+            events.put_nowait(_STREAM_DONE)
+
+    task = asyncio.get_running_loop().create_task(produce())
+    # keep a reference so the task is not garbage collected mid-turn
+    _stream_tasks.add(task)
+    task.add_done_callback(_stream_tasks.discard)
+
+    while True:
+        item = await events.get()
+        if item is _STREAM_DONE:
+            return
+        if isinstance(item, Exception):
+            raise item
+        yield item
+
+
+async def _astream_history_turn(question: str, thread_id: str, file_id: str | None, retrieval_mode: str | None) -> AsyncIterator[Dict[str, Any]]:
+    graph, config, initial_state = await _aprepare_history_turn(question, thread_id, file_id, retrieval_mode)
+
+    cache, lookup = await _alookup_answer(initial_state)
+    if lookup and lookup.hit:
+        final_state = _cached_final_state(initial_state, lookup)
+        await graph.aupdate_state(config, final_state, as_node="verification")
+        for event in _cached_events(final_state):
+            yield event
+        yield {"event": "final", "data": final_state}
+        return
+
+    async for item in graph.astream(initial_state, config, stream_mode=["updates", "messages"], subgraphs=True):
+        for event in _stream_events(*item):
+            yield event
+
+    final_state = (await graph.aget_state(config)).values
+    if lookup:
+        await cache.astore(lookup, final_state)
+    yield {"event": "final", "data": final_state}
+
+
+def _stream_events(namespace: tuple, mode: str, chunk: Any) -> List[Dict[str, Any]]:
+    """Translate one LangGraph stream item into zero or more pipeline events."""
+
+    # final-answer tokens come from the verification agent's inner LLM call
+    if mode == "messages":
+        message, _ = chunk
+        node = namespace[0].split(":")[0] if namespace else ""
+        if node == "verification" and isinstance(message, AIMessageChunk) and message.content:
+            return [{"event": "token", "data": {"content": str(message.content)}}]
+        return []
+
+    # only top-level node updates mark pipeline stages
+    if namespace:
+        return []
+
+    events = []
+    for node, update in chunk.items():
+        update = update or {}
+        if node == "scope_gate" and update.get("verification_path") == "out_of_scope":
+            events.append({"event": "answer", "data": {"answer": update.get("answer", "")}})
+        elif node in ("retrieval", "direct_retrieval"):
+            chunks = count_serialized_chunks(update.get("context"))
+            events.append({"event": "retrieved", "data": {"chunks": chunks}})
+            events.append({"event": "drafting", "data": {}})
+        elif node == "grounding_check":
+            if update.get("verification_path") == "needs_verification":
+                events.append({"event": "verifying", "data": {}})
+            else:
+                events.append({"event": "answer", "data": {"answer": update.get("answer", "")}})
+        elif node == "verification":
+            events.append({"event": "answer", "data": {"answer": update.get("answer", "")}})
+    return events
+
+
 def get_conversation_state(thread_id: str) -> Dict[str, Any] | None:
     """Retrieve the current conversation state for a thread.
     
@@ -193,5 +672,20 @@ def get_conversation_state(thread_id: str) -> Dict[str, Any] | None:
         return state.values if state else None
     
     except Exception as e:
-        print(f"-- Error getting conversation state for thread {thread_id}: {e}")
+        logger.warning("Error getting conversation state for thread %s: %s", thread_id, e)
+        return None
+
+
+async def aget_conversation_state(thread_id: str) -> Dict[str, Any] | None:
+    """Async counterpart of `get_conversation_state()`."""
+
+    graph = await get_async_qa_graph()
+    config = {"configurable": {"thread_id": thread_id}}
+
+    try:
+        state = await graph.aget_state(config)
+        return state.values if state else None
+
+    except Exception as e:
+        logger.warning("Error getting conversation state for thread %s: %s", thread_id, e)
         return None
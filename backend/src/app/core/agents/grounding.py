@@ -0,0 +1,64 @@
+"""Local grounding score used to decide whether a draft answer needs verification.
+
+The score is the share of the draft's sentences whose content words are mostly
+found in the retrieved context. A draft that is almost entirely lifted from
+the context scores close to 1.0. A draft that adds claims of its own scores
+lower and is sent to the Verification Agent. No model call is involved.
+"""
+
+import re
+from typing import Set
+
+from .prompts import OFF_TOPIC_ANSWER
+
+_SENTENCE_SPLIT_PATTERN = re.compile(r"(?<=[.!?])\s+|\n+")
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[-'][a-z0-9]+)*")
+
+# sentences with fewer content words ("Yes.", list bullets) carry no claim to check
+_MIN_SENTENCE_TOKENS = 3
+
+_STOPWORDS = frozenset("""
+a about above after again against all also am an and any are as at be because been before being
+below between both but by can could did do does doing down during each few for from further had has
+have having he her here hers herself him himself his how i if in into is it its itself just me more
+most my myself no nor not now of off on once only or other our ours ourselves out over own same she
+should so some such than that the their theirs them themselves then there these they this those
+through to too under until up very was we were what when where which while who whom why will with
+would you your yours yourself yourselves document context page chunk based according
+""".split())
+
+
+def _content_tokens(text: str) -> Set[str]:
+    return {token for token in _TOKEN_PATTERN.findall(text.lower()) if token not in _STOPWORDS}
+
+
+def is_refusal(draft_answer: str | None) -> bool:
+    """Return True if the draft is exactly the scripted off-topic refusal."""
+    return (draft_answer or "").strip().strip('"') == OFF_TOPIC_ANSWER
+
+
+def grounding_score(draft_answer: str | None, context: str | None, sentence_support: float = 0.7) -> float:
+    """Score how much of a draft answer is supported by the context.
+
+    Args:
+        draft_answer: The Summarization Agent's draft.
+        context: The serialized retrieved chunks.
+        sentence_support: Share of a sentence's content words that must appear
+            in the context for the sentence to count as grounded.
+
+    Returns:
+        Share of claim-bearing sentences that are grounded, from 0.0 to 1.0
+        (0.0 for an empty draft or context).
+    """
+
+    if not draft_answer or not context:
+        return 0.0
+
+    context_tokens = _content_tokens(context)
+    sentences = [_content_tokens(s) for s in _SENTENCE_SPLIT_PATTERN.split(draft_answer)]
+    sentences = [tokens for tokens in sentences if len(tokens) >= _MIN_SENTENCE_TOKENS]
+    if not sentences:
+        return 0.0
+
+    grounded = sum(1 for tokens in sentences if len(tokens & context_tokens) / len(tokens) >= sentence_support)
+    return grounded / len(sentences)
@@ -0,0 +1,242 @@
+"""Background memory summarization for conversation threads.
+
+The Memory Summarization Agent only matters for the next turn, so it is no
+longer a graph node the user waits for. Once a turn has been answered and
+checkpointed, `schedule_memory_summary` / `aschedule_memory_summary` start it
+in the background. It writes `conversation_summary` and the removal of the
+summarized turns from `conversation_turns` into the thread's checkpoint.
+
+Races with a fast follow-up turn are avoided in two ways:
+- Turns hold the thread's lock (`thread_lock` / `athread_lock`) from loading
+  the state until their checkpoint is written. The summarizer takes the same
+  lock only for its read-merge-write, never during its LLM call. Every
+  conversation thread has its own lock, so turns of different conversations
+  never wait on each other. The sync and async locks are separate: a thread's
+  turns and summaries must all go through the sync graph or all through the
+  async one, as the API's do.
+- The summarizer re-reads the latest state under the lock. It removes exactly
+  the turns it summarized (by turn id), so turns appended in the meantime are
+  kept. If the summary changed underneath it, it discards its result.
+"""
+
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Set
+
+from .agents import needs_memory_summary, summarize_memory, asummarize_memory
+from ..tracing import span
+
+logger = logging.getLogger(__name__)
+
+
+class _ThreadLocks:
+    """One lock per conversation thread, dropped once nobody holds or waits for it."""
+
+    def __init__(self, factory: Callable[[], Any]):
+        self._factory = factory
+        # thread_id -> [lock, holders and waiters]
+        self._locks: Dict[str, List[Any]] = {}
+        self._guard = threading.Lock()
+
+    def checkout(self, thread_id: str) -> Any:
+        with self._guard:
+            entry = self._locks.get(thread_id)
+            if entry is None:
+                entry = self._locks[thread_id] = [self._factory(), 0]
+            entry[1] += 1
+            return entry[0]
+
+    def checkin(self, thread_id: str) -> None:
+        with self._guard:
+            entry = self._locks[thread_id]
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._locks[thread_id]
+
+
+_sync_locks = _ThreadLocks(threading.Lock)
+_async_locks = _ThreadLocks(asyncio.Lock)
+
+# threads with a summary queued or running (one at a time per thread)
+_pending: Set[str] = set()
+_pending_lock = threading.Lock()
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+_tasks: Set[asyncio.Task] = set()
+
+# the node a summary update is attributed to (its only successor is END)
+_UPDATE_AS_NODE = "verification"
+
+
+@contextmanager
+def thread_lock(thread_id: str) -> Iterator[None]:
+    """Hold the conversation thread's lock (sync)."""
+    lock = _sync_locks.checkout(thread_id)
+    try:
+        with lock:
+            yield
+    finally:
+        _sync_locks.checkin(thread_id)
+
+
+@asynccontextmanager
+async def athread_lock(thread_id: str) -> AsyncIterator[None]:
+    """Hold the conversation thread's lock without blocking the event loop."""
+    lock = _async_locks.checkout(thread_id)
+    try:
+        async with lock:
+            yield
+    finally:
+        _async_locks.checkin(thread_id)
+
+
+def _merge_summary(snapshot: Dict[str, Any], latest: Dict[str, Any], update: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Apply a summary computed from `snapshot` to the thread's `latest` state.
+
+    Returns:
+        The state update, or None if the state moved on in a way that makes the
+        summary stale (a newer summary exists or the summarized turns are gone).
+    """
+
+    if (latest.get("conversation_summary") or "") != (snapshot.get("conversation_summary") or ""):
+        return None
+
+    latest_ids = {turn["id"] for turn in latest.get("conversation_turns") or []}
+    if any(removal["id"] not in latest_ids for removal in update["conversation_turns"]):
+        return None
+
+    # the conversation_turns reducer applies the removals, keeping newer turns
+    return update
+
+
+def _claim(thread_id: str, final_state: Dict[str, Any]) -> bool:
+    """Mark the thread as having a summary in flight, if it needs one and has none yet."""
+    if not needs_memory_summary(final_state):
+        return False
+    with _pending_lock:
+        if thread_id in _pending:
+            return False
+        _pending.add(thread_id)
+        return True
+
+
+def _release(thread_id: str) -> None:
+    with _pending_lock:
+        _pending.discard(thread_id)
+
+
+def summarize_thread(graph: Any, thread_id: str) -> bool:
+    """Summarize a thread's memory and write it to its checkpoint (sync graph).
+
+    Returns:
+        True if a summary was written.
+    """
+
+    config = {"configurable": {"thread_id": thread_id}}
+    snapshot = graph.get_state(config).values
+    update = summarize_memory(snapshot)
+    if not update:
+        return False
+
+    with thread_lock(thread_id):
+        merged = _merge_summary(snapshot, graph.get_state(config).values, update)
+        if merged is None:
+            logger.info("memory_summarizer: state of thread %s changed, summary discarded", thread_id)
+            return False
+        graph.update_state(config, merged, as_node=_UPDATE_AS_NODE)
+    return True
+
+
+async def asummarize_thread(graph: Any, thread_id: str) -> bool:
+    """Async counterpart of `summarize_thread()` (async graph)."""
+
+    config = {"configurable": {"thread_id": thread_id}}
+    snapshot = (await graph.aget_state(config)).values
+    update = await asummarize_memory(snapshot)
+    if not update:
+        return False
+
+    async with athread_lock(thread_id):
+        merged = _merge_summary(snapshot, (await graph.aget_state(config)).values, update)
+        if merged is None:
+            logger.info("memory_summarizer: state of thread %s changed, summary discarded", thread_id)
+            return False
+        await graph.aupdate_state(config, merged, as_node=_UPDATE_AS_NODE)
+    return True
+
+
+def _run_in_background(graph: Any, thread_id: str) -> None:
+    try:
+        with span("memory_summary", "internal", thread_id=thread_id):
+            summarize_thread(graph, thread_id)
+    except Exception as e:
+        # a missed summary is retried after the next turn
+        logger.warning("memory_summarizer: background summary failed for thread %s: %s", thread_id, e)
+    finally:
+        _release(thread_id)
+
+
+async def _arun_in_background(graph: Any, thread_id: str) -> None:
+    try:
+        with span("memory_summary", "internal", thread_id=thread_id):
+            await asummarize_thread(graph, thread_id)
+    except Exception as e:
+        logger.warning("memory_summarizer: background summary failed for thread %s: %s", thread_id, e)
+    finally:
+        _release(thread_id)
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="memory-summary")
+        return _executor
+
+
+def schedule_memory_summary(graph: Any, thread_id: str, final_state: Dict[str, Any]) -> bool:
+    """Summarize the thread's memory on a background thread if the history is long enough.
+
+    Args:
+        graph: The compiled sync QA graph (with checkpointer).
+        thread_id: The conversation thread.
+        final_state: The state the turn ended with.
+
+    Returns:
+        True if a summary was scheduled.
+    """
+
+    if not _claim(thread_id, final_state):
+        return False
+    _get_executor().submit(_run_in_background, graph, thread_id)
+    return True
+
+
+def aschedule_memory_summary(graph: Any, thread_id: str, final_state: Dict[str, Any]) -> bool:
+    """Async counterpart of `schedule_memory_summary()`: runs the summary as an event-loop task."""
+
+    if not _claim(thread_id, final_state):
+        return False
+    task = asyncio.get_running_loop().create_task(_arun_in_background(graph, thread_id))
+    # keep a reference so the task is not garbage collected mid-run
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+    return True
+
+
+async def shutdown_memory_summaries() -> None:
+    """Cancel in-flight background summaries (called on application shutdown)."""
+    global _executor
+    for task in list(_tasks):
+        task.cancel()
+    if _tasks:
+        await asyncio.gather(*_tasks, return_exceptions=True)
+
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
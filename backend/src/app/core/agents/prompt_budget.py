@@ -0,0 +1,166 @@
+"""Token-budgeted prompt assembly shared by the agent nodes.
+
+Each agent's prompt is built from the question, the conversation summary and
+turns, the retrieved context and (for verification) the draft answer.
+`assemble_prompt` trims history and context so that they fit the node's token
+budget from `Settings`:
+- The question and draft are never trimmed.
+- Context chunks are kept in rank order (the top-ranked chunk is always kept).
+- History keeps the summary and then the newest turns, up to
+  `prompt_history_max_share` of the budget when there is context to share it with.
+
+Everything that only depends on the turn is built once per turn and cached:
+the token counts of the question, summary and turns (`_turn_tokens`) and of
+the context chunks (`_context_chunks`), as running totals. Fitting a node's
+budget is then a binary search over those totals, and what was dropped is
+recorded on the node's span.
+"""
+
+from bisect import bisect_right
+from dataclasses import dataclass
+from functools import lru_cache
+from itertools import accumulate
+from typing import Tuple
+
+from ..cache.lru import LRUCache
+from ..config import get_settings
+from ..retrieval.serialization import split_serialized_chunks
+from ..tracing import annotate
+from .state import QAState
+from .turns import count_tokens, render_conversation_context
+
+# nodes with a prompt budget (settings.<node>_prompt_token_budget)
+PROMPT_NODES = ("retrieval", "summarization", "verification")
+
+
+@dataclass
+class AssembledPrompt:
+    """The history and context to put in a node's prompt, and what was dropped to fit the budget."""
+
+    conversation_context: str
+    context: str
+    tokens: int
+    budget: int
+    dropped_turns: int = 0
+    dropped_chunks: int = 0
+
+
+@dataclass(frozen=True)
+class _TurnTokens:
+    """Token counts of the parts of a turn's prompts that every node shares."""
+
+    question: int
+    summary: int
+    # running totals over the turns, newest first
+    newest_turns: Tuple[int, ...]
+
+
+@dataclass(frozen=True)
+class _ContextChunks:
+    """A CONTEXT string split into chunks (rank order), with running token totals."""
+
+    chunks: Tuple[str, ...]
+    totals: Tuple[int, ...]
+
+
+@lru_cache(maxsize=256)
+def _count(text: str) -> int:
+    return count_tokens(text)
+
+
+# keyed by question, turn ids and summary, so the nodes of one turn share an entry
+_turn_tokens_cache = LRUCache(max_entries=256)
+
+def _turn_tokens(state: QAState) -> _TurnTokens:
+    turns = state.get("conversation_turns") or []
+    question = state.get("question") or ""
+    summary = state.get("conversation_summary") or ""
+
+    key = (question, tuple((turn["id"], turn["tokens"]) for turn in turns), summary)
+    cached = _turn_tokens_cache.get(key)
+    if cached is not None:
+        return cached
+
+    cached = _TurnTokens(
+        question=_count(question),
+        summary=_count(summary) if summary else 0,
+        newest_turns=tuple(accumulate(turn["tokens"] for turn in reversed(turns))),
+    )
+    _turn_tokens_cache.put(key, cached)
+    return cached
+
+
+@lru_cache(maxsize=64)
+def _context_chunks(context: str) -> _ContextChunks:
+    chunks = tuple(split_serialized_chunks(context))
+    return _ContextChunks(chunks, tuple(accumulate(count_tokens(chunk) for chunk in chunks)))
+
+
+def assemble_prompt(state: QAState, node: str, include_context: bool = True) -> AssembledPrompt:
+    """Fit the turn's history and context into a node's prompt token budget.
+
+    The tokens used, the budget and the number of turns and chunks dropped are
+    set as attributes of the current (node) span.
+
+    Args:
+        state: The current QA state.
+        node: One of `PROMPT_NODES`; selects the budget.
+        include_context: Whether the node's prompt contains the retrieved context
+            (the Retrieval Agent's does not; its history may use the whole budget).
+
+    Returns:
+        The rendered conversation context and context to use, with the tokens
+        they take up along with the question and draft, and the number of turns
+        and chunks dropped.
+    """
+
+    if node not in PROMPT_NODES:
+        raise ValueError(f"Unknown prompt node: {node!r} (expected one of {PROMPT_NODES})")
+
+    settings = get_settings()
+    budget = getattr(settings, f"{node}_prompt_token_budget")
+
+    turns = state.get("conversation_turns") or []
+    summary = state.get("conversation_summary") or ""
+    context = (state.get("context") or "") if include_context else ""
+    counts = _turn_tokens(state)
+    chunks = _context_chunks(context) if context else _ContextChunks((), ())
+
+    fixed = counts.question + _count(state.get("draft_answer") or "")
+    all_turns = counts.newest_turns[-1] if turns else 0
+    all_chunks = chunks.totals[-1] if chunks.chunks else 0
+
+    if budget <= 0:
+        assembled = AssembledPrompt(
+            render_conversation_context(turns, summary), context, fixed + counts.summary + all_turns + all_chunks, budget
+        )
+    else:
+        available = max(budget - fixed, 0)
+        history_budget = int(available * settings.prompt_history_max_share) if chunks.chunks else available
+
+        # the summary is already compressed and always kept; then the newest turns that fit
+        kept_turns = bisect_right(counts.newest_turns, history_budget - counts.summary)
+        history_tokens = counts.summary + (counts.newest_turns[kept_turns - 1] if kept_turns else 0)
+
+        # context chunks in rank order in what is left (the top-ranked chunk is always kept)
+        kept_chunks = bisect_right(chunks.totals, available - history_tokens)
+        if chunks.chunks:
+            kept_chunks = max(kept_chunks, 1)
+        context_tokens = chunks.totals[kept_chunks - 1] if kept_chunks else 0
+
+        assembled = AssembledPrompt(
+            conversation_context=render_conversation_context(turns[len(turns) - kept_turns:], summary),
+            context=context if kept_chunks == len(chunks.chunks) else "\n\n".join(chunks.chunks[:kept_chunks]),
+            tokens=fixed + history_tokens + context_tokens,
+            budget=budget,
+            dropped_turns=len(turns) - kept_turns,
+            dropped_chunks=len(chunks.chunks) - kept_chunks,
+        )
+
+    annotate(
+        prompt_tokens=assembled.tokens,
+        prompt_budget=budget,
+        dropped_turns=assembled.dropped_turns,
+        dropped_chunks=assembled.dropped_chunks,
+    )
+    return assembled
@@ -0,0 +1,66 @@
+"""Pre-retrieval scope gate.
+
+Decides, before any LLM call, whether a question has anything to do with the
+documents. Two embedding signals are used: the cosine similarity to the
+file's chunk centroid, and the score of the best-matching chunk. A question is
+out of scope only when every available signal is below its threshold. If no
+signal can be computed, the question is let through.
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import List, Optional
+
+import numpy as np
+
+from ..config import get_settings
+from ..retrieval.centroids import get_centroid_store, normalize
+from ..retrieval.vector_store import _get_embeddings, best_match_score
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ScopeDecision:
+    in_scope: bool
+    centroid_similarity: Optional[float] = None
+    best_match_score: Optional[float] = None
+
+
+def check_scope(question: str, file_id: Optional[str] = None) -> ScopeDecision:
+    """Decide whether `question` is about the file (or the indexed documents when file_id is None)."""
+    try:
+        return _decide(normalize(_get_embeddings().embed_query(question)), file_id)
+    except Exception as e:
+        # the gate must never fail a question
+        logger.warning("Scope gate failed, continuing with retrieval: %s", e)
+        return ScopeDecision(in_scope=True)
+
+
+async def acheck_scope(question: str, file_id: Optional[str] = None) -> ScopeDecision:
+    """Async counterpart of `check_scope()`."""
+    try:
+        vector = normalize(await _get_embeddings().aembed_query(question))
+        return await asyncio.to_thread(_decide, vector, file_id)
+    except Exception as e:
+        logger.warning("Scope gate failed, continuing with retrieval: %s", e)
+        return ScopeDecision(in_scope=True)
+
+
+def _decide(vector: np.ndarray, file_id: Optional[str]) -> ScopeDecision:
+    settings = get_settings()
+    decision = ScopeDecision(in_scope=True)
+    signals: List[bool] = []
+
+    centroid = get_centroid_store().get(file_id) if file_id else None
+    if centroid is not None and centroid.shape == vector.shape:
+        decision.centroid_similarity = float(centroid @ vector)
+        signals.append(decision.centroid_similarity >= settings.scope_gate_centroid_threshold)
+
+    decision.best_match_score = best_match_score(vector.tolist(), file_id)
+    if decision.best_match_score is not None:
+        signals.append(decision.best_match_score >= settings.scope_gate_match_threshold)
+
+    decision.in_scope = not signals or any(signals)
+    return decision
@@ -1,6 +1,8 @@
 """LangGraph state schema for the multi-agent QA flow."""
 
-from typing import TypedDict
+from typing import Annotated, TypedDict
+
+from .turns import Turn, merge_turns
 
 class QAState(TypedDict):
     """State schema for the linear multi-agent QA flow.
@@ -8,14 +10,23 @@ class QAState(TypedDict):
     The state flows through three agents:
     1. Retrieval Agent: populates `context` from `question`
     2. Summarization Agent: generates `draft_answer` from `question` + `context`
-    3. Verification Agent: produces final `answer` from `question` + `context` + `draft_answer`
-    4. Memory Summarizer: compresses long conversation histories (optional)
+    3. Grounding check: scores `draft_answer` against `context` and, when it is
+       well grounded (or a refusal), accepts it as the `answer` without verification
+    4. Verification Agent: produces final `answer` from `question` + `context` + `draft_answer`
+       (only when the grounding check did not accept the draft)
+    5. Memory Summarizer: compresses long conversation histories (in the background, after the turn)
     """
 
     question: str
     context: str | None
     draft_answer: str | None
     answer: str | None
-    conversation_history : str | None
+    # past turns, merged by turn id (nodes append `[make_turn(...)]`, the summarizer sends removals)
+    conversation_turns : Annotated[list[Turn], merge_turns]
     conversation_summary : str | None
+    # legacy history string, only read to convert checkpoints written before `conversation_turns`
+    conversation_history : str | None
     file_id: str | None
+    retrieval_mode: str | None
+    grounding_score: float | None
+    verification_path: str | None
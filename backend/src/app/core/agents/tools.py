@@ -5,11 +5,14 @@ from langchain_core.tools import tool
 from ..retrieval.vector_store import retrieve
 from ..retrieval.serialization import serialize_chunks
 
+# number of chunks fetched per retrieval (shared by the agentic and direct paths)
+RETRIEVAL_TOOL_K = 6
+
 @tool(response_format="content_and_artifact")
 def retrieval_tool(query: str, file_id: str = None):
     """Search the vector database for relevant document chunks.
 
-    This tool retrieves the top 4 most relevant chunks from the Pinecone
+    This tool retrieves the top 6 most relevant chunks from the configured
     vector store based on the query. The chunks are formatted with page
     numbers and indices for easy reference.
 
@@ -26,7 +29,7 @@ def retrieval_tool(query: str, file_id: str = None):
     """
 
     # Retrieve documents from vector store according to the query (Filter by file_id)
-    docs = retrieve(query, k=6, file_id=file_id)
+    docs = retrieve(query, k=RETRIEVAL_TOOL_K, file_id=file_id)
 
     # Serialize chunks into formatted string (content)
     context = serialize_chunks(docs)
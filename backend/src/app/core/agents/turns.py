@@ -0,0 +1,173 @@
+"""Structured conversation turns kept in the QA graph state.
+
+Each turn is stored once with its token count, in the `conversation_turns`
+state channel. The channel's reducer merges updates by turn id, as LangGraph's
+`add_messages` does:
+- a node appends a turn by returning `[new_turn]`;
+- the memory summarizer drops summarized turns by returning removal markers.
+Neither needs the whole history copied or re-parsed.
+
+The prompt string for a history is rendered once per turn and memoized by turn
+ids and summary.
+"""
+
+import logging
+import re
+import uuid
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, TypedDict
+
+from ..cache.lru import LRUCache
+from ..config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class Turn(TypedDict):
+    """One question/answer exchange."""
+
+    id: str
+    question: str
+    answer: str
+    tokens: int
+
+
+@lru_cache(maxsize=1)
+def _get_encoding():
+    """tiktoken encoding for the configured chat model.
+
+    None with the fake chat model (token counts stay deterministic and never
+    download tiktoken's BPE file) or if it cannot be loaded, e.g. offline.
+    """
+    if get_settings().llm_provider.lower() == "fake":
+        return None
+    try:
+        import tiktoken
+        try:
+            return tiktoken.encoding_for_model(get_settings().openai_model_name)
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
+    except Exception as e:
+        logger.warning("tiktoken unavailable, estimating token counts from length: %s", e)
+        return None
+
+
+def count_tokens(text: str | None) -> int:
+    """Count the tokens in `text` with the chat model's tokenizer (about 4 chars per token without it)."""
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is None:
+        return len(text) // 4 + 1
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def render_turn(question: str, answer: str) -> str:
+    return f"User: {question}\nAssistant: {answer}"
+
+
+def make_turn(question: str, answer: str) -> Turn:
+    """Create a turn, counting its rendered tokens once."""
+    return {
+        "id": uuid.uuid4().hex,
+        "question": question,
+        "answer": answer,
+        "tokens": count_tokens(render_turn(question, answer)),
+    }
+
+
+def remove_turns(turns: Sequence[Turn]) -> List[Dict[str, Any]]:
+    """Reducer update that removes `turns` from the channel."""
+    return [{"id": turn["id"], "remove": True} for turn in turns]
+
+
+def merge_turns(existing: Optional[List[Turn]], update: Optional[Sequence[Dict[str, Any]]]) -> List[Turn]:
+    """Reducer for `conversation_turns`: merge by id, appending new turns and applying removals.
+
+    Turns whose id is already present are replaced in place, so passing the
+    previous turns back in with the input is a no-op.
+    """
+
+    merged = list(existing or [])
+    if not update:
+        return merged
+
+    positions = {turn["id"]: index for index, turn in enumerate(merged)}
+    removed = set()
+    for item in update:
+        if item.get("remove"):
+            removed.add(item["id"])
+        elif item["id"] in positions:
+            merged[positions[item["id"]]] = item
+        else:
+            positions[item["id"]] = len(merged)
+            merged.append(item)
+
+    if removed:
+        merged = [turn for turn in merged if turn["id"] not in removed]
+    return merged
+
+
+def turns_from_history(history: str | None) -> List[Turn]:
+    """Parse a legacy `conversation_history` string ("User: ...\\nAssistant: ...") into turns."""
+    if not history:
+        return []
+
+    turns = []
+    for block in re.split(r"(?m)^User:\s", history):
+        if not block.strip():
+            continue
+        question, _, answer = block.partition("\nAssistant: ")
+        turns.append(make_turn(question.strip(), answer.strip()))
+    return turns
+
+
+def render_turns(turns: Sequence[Turn] | None) -> str:
+    """Render turns as "User: ...\\nAssistant: ..." blocks separated by blank lines."""
+    return "\n\n".join(render_turn(turn["question"], turn["answer"]) for turn in turns or [])
+
+
+def history_text(state: Dict[str, Any] | None) -> str:
+    """Render a state's conversation turns as a history string (falls back to a legacy history)."""
+    if not state:
+        return ""
+    turns = state.get("conversation_turns")
+    if turns:
+        return render_turns(turns)
+    return state.get("conversation_history") or ""
+
+
+# rendered conversation contexts, keyed by turn ids and summary
+_rendered = LRUCache(max_entries=512)
+
+def render_conversation_context(turns: Sequence[Turn] | None, summary: str | None) -> str:
+    """Render the conversation context passed to the agents (summary + recent turns).
+
+    The nodes of a turn see the same turns and summary, so the prompt string is
+    built once per turn and reused by the retrieval, summarization and
+    verification nodes (as long as their budgets keep the same turns).
+    """
+
+    if not turns and not summary:
+        return ""
+
+    key = (tuple(turn["id"] for turn in turns or []), summary or "")
+    rendered = _rendered.get(key)
+    if rendered is not None:
+        return rendered
+
+    history = render_turns(turns)
+    if summary and history:
+        rendered = f"[Previous Context Summary]\n{summary}\n\n[Recent Conversation]\n{history}"
+    elif summary:
+        rendered = f"[Previous Context Summary]\n{summary}"
+    else:
+        rendered = history
+
+    _rendered.put(key, rendered)
+    return rendered
+
+
+def turns_token_count(turns: Sequence[Turn] | None) -> int:
+    """Total tokens of the rendered turns (from the counts cached on each turn)."""
+    return sum(turn["tokens"] for turn in turns or [])
@@ -4,4 +4,10 @@ def is_connection_closed_error(e: Exception) -> bool:
 
 def reset_graph_cache():
     from .graph import get_qa_graph
-    get_qa_graph.cache_clear()
\ No newline at end of file
+    get_qa_graph.cache_clear()
+
+async def reset_async_graph_cache():
+    from . import graph
+    from ...db.checkpointer import close_async_checkpointer
+    graph._async_qa_graph = None
+    await close_async_checkpointer()
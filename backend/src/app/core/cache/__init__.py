@@ -0,0 +1,8 @@
+"""Caching layers used to skip repeated embedding and model calls."""
+
+from .lru import LRUCache
+from .embedding_cache import CachedEmbeddings
+from .answer_cache import SemanticAnswerCache
+from .llm_cache import TwoTierLLMCache
+
+__all__ = ["LRUCache", "CachedEmbeddings", "SemanticAnswerCache", "TwoTierLLMCache"]
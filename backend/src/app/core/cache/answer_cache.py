@@ -0,0 +1,318 @@
+"""Semantic answer cache for history-free questions.
+
+Answers are cached per file scope (`file_id`, or None for questions across
+every document) together with the question's embedding. A new question is a
+hit when its nearest cached question in the same scope has a cosine
+similarity of at least `threshold`, so rephrasings such as "What is HNSW?"
+and "what's HNSW" share one set of LLM calls.
+
+Entries expire after `ttl_seconds` and the least recently used entries are
+evicted beyond `max_entries`. Re-indexing a file invalidates its scope (and
+the global scope, whose answers may cite any file).
+
+Invalidations are counted per scope in the `answer_cache_generations` table,
+so a file re-indexed by another process (e.g. an external ingestion worker)
+also invalidates the answers cached by the API: every look-up compares the
+scope's shared generation with the one its entries were cached under.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from ...db.connection import get_async_db_connection, get_db_connection
+from ..config import get_settings
+from ..tracing import record_cache, span
+
+logger = logging.getLogger(__name__)
+
+# state keys replayed from a cached turn
+CACHED_KEYS = ("context", "draft_answer", "answer")
+
+
+@dataclass
+class AnswerLookup:
+    """Result of a cache look-up.
+
+    On a miss, pass it back to `SemanticAnswerCache.store()` so the question is
+    not embedded twice and answers computed across an invalidation are dropped.
+    """
+
+    scope: Optional[str]
+    vector: np.ndarray
+    generation: int
+    values: Optional[Dict[str, Any]] = None
+
+    @property
+    def hit(self) -> bool:
+        return self.values is not None
+
+
+class PostgresAnswerGenerations:
+    """Per-scope invalidation counters shared by every process (`answer_cache_generations`).
+
+    The global scope (file_id None) is stored under the empty string.
+    """
+
+    def get(self, scope: Optional[str]) -> int:
+        try:
+            with get_db_connection() as connection:
+                with connection.cursor() as cursor:
+                    cursor.execute("SELECT generation FROM answer_cache_generations WHERE scope = %s", (scope or "",))
+                    row = cursor.fetchone()
+                    return row["generation"] if row else 0
+        except Exception as e:
+            raise Exception(f"Database error getting answer cache generation: {str(e)}") from e
+
+    async def aget(self, scope: Optional[str]) -> int:
+        try:
+            async with get_async_db_connection() as connection:
+                async with connection.cursor() as cursor:
+                    await cursor.execute("SELECT generation FROM answer_cache_generations WHERE scope = %s", (scope or "",))
+                    row = await cursor.fetchone()
+                    return row["generation"] if row else 0
+        except Exception as e:
+            raise Exception(f"Database error getting answer cache generation: {str(e)}") from e
+
+    def bump(self, scopes: Iterable[Optional[str]]) -> Dict[Optional[str], int]:
+        """Increment the generation of each scope and return the new values."""
+        scopes = set(scopes)
+        try:
+            with get_db_connection() as connection:
+                with connection.cursor() as cursor:
+                    cursor.execute("""
+                        INSERT INTO answer_cache_generations (scope, generation)
+                        SELECT scope, 1 FROM unnest(%s::text[]) AS scope
+                        ON CONFLICT (scope) DO UPDATE
+                        SET generation = answer_cache_generations.generation + 1,
+                            updated_at = NOW()
+                        RETURNING scope, generation
+                    """, (sorted(scope or "" for scope in scopes),))
+
+                    rows = cursor.fetchall()
+                    connection.commit()
+
+                    return {row["scope"] or None: row["generation"] for row in rows}
+        except Exception as e:
+            raise Exception(f"Database error invalidating cached answers: {str(e)}") from e
+
+
+@dataclass
+class _Entry:
+    vector: np.ndarray
+    values: Dict[str, Any]
+    created_at: float = field(default_factory=time.monotonic)
+
+
+class SemanticAnswerCache:
+    """Nearest-neighbour answer cache keyed by file scope and question embedding.
+
+    Args:
+        embeddings: Model used to embed questions.
+        threshold: Minimum cosine similarity for a hit.
+        ttl_seconds: Entry lifetime (0 disables expiry).
+        max_entries: Total entries kept across all scopes.
+        generations: Optional shared invalidation counters (e.g.
+            PostgresAnswerGenerations). Without them, only invalidations made
+            in this process are seen.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        threshold: float = 0.95,
+        ttl_seconds: int = 3600,
+        max_entries: int = 2000,
+        generations: Optional[PostgresAnswerGenerations] = None,
+    ):
+        self.embeddings = embeddings
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.generations = generations
+
+        # LRU order over every entry, plus a per-scope index for the similarity search
+        self._lru: "OrderedDict[Tuple[Optional[str], int], _Entry]" = OrderedDict()
+        self._scopes: Dict[Optional[str], Dict[int, _Entry]] = {}
+        self._generations: Dict[Optional[str], int] = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, question: str, file_id: Optional[str] = None) -> AnswerLookup:
+        """Embed the question and return the closest cached answer in its scope, if close enough."""
+        with span("answer_cache.lookup", "cache"):
+            vector = self.embeddings.embed_query(question)
+            shared = self.generations.get(file_id) if self.generations is not None else None
+            return self._match(file_id, vector, shared)
+
+    async def alookup(self, question: str, file_id: Optional[str] = None) -> AnswerLookup:
+        """Async counterpart of `lookup()`."""
+        with span("answer_cache.lookup", "cache"):
+            vector = await self.embeddings.aembed_query(question)
+            shared = await self.generations.aget(file_id) if self.generations is not None else None
+            return self._match(file_id, vector, shared)
+
+    def store(self, lookup: AnswerLookup, values: Dict[str, Any]) -> None:
+        """Cache a freshly computed answer for a missed look-up."""
+        if lookup.hit or not values.get("answer"):
+            return
+
+        shared = None
+        if self.generations is not None:
+            try:
+                shared = self.generations.get(lookup.scope)
+            except Exception as e:
+                # not knowing whether the file was re-indexed, the answer is not cached
+                logger.warning("Answer cache store skipped: %s", e)
+                return
+        self._store(lookup, values, shared)
+
+    async def astore(self, lookup: AnswerLookup, values: Dict[str, Any]) -> None:
+        """Async counterpart of `store()`."""
+        if lookup.hit or not values.get("answer"):
+            return
+
+        shared = None
+        if self.generations is not None:
+            try:
+                shared = await self.generations.aget(lookup.scope)
+            except Exception as e:
+                logger.warning("Answer cache store skipped: %s", e)
+                return
+        self._store(lookup, values, shared)
+
+    def _store(self, lookup: AnswerLookup, values: Dict[str, Any], shared: Optional[int]) -> None:
+        entry = _Entry(vector=lookup.vector, values={key: values.get(key) for key in CACHED_KEYS})
+        with self._lock:
+            self._sync_generation(lookup.scope, shared)
+            # the file was re-indexed while this answer was being computed
+            if self._generations.get(lookup.scope, 0) != lookup.generation:
+                return
+
+            entry_id = self._next_id
+            self._next_id += 1
+            self._scopes.setdefault(lookup.scope, {})[entry_id] = entry
+            self._lru[(lookup.scope, entry_id)] = entry
+
+            while len(self._lru) > self.max_entries:
+                (scope, old_id), _ = self._lru.popitem(last=False)
+                self._remove_from_scope(scope, old_id)
+
+    def invalidate_file(self, file_id: Optional[str]) -> None:
+        """Drop answers that may cite `file_id` (its own scope and the global scope)."""
+        scopes = {file_id, None}
+        shared = self.generations.bump(scopes) if self.generations is not None else {}
+        with self._lock:
+            for scope in scopes:
+                self._generations[scope] = shared.get(scope, self._generations.get(scope, 0) + 1)
+                self._drop_scope(scope)
+
+    def clear(self) -> None:
+        with self._lock:
+            for scope in list(self._scopes) + [None]:
+                self._generations[scope] = self._generations.get(scope, 0) + 1
+            self._lru.clear()
+            self._scopes.clear()
+
+    def __len__(self) -> int:
+        return len(self._lru)
+
+    def _match(self, scope: Optional[str], vector: Any, shared: Optional[int] = None) -> AnswerLookup:
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            vector = vector / norm
+
+        with self._lock:
+            self._sync_generation(scope, shared)
+            lookup = AnswerLookup(scope=scope, vector=vector, generation=self._generations.get(scope, 0))
+            self._expire(scope)
+
+            entries = self._scopes.get(scope)
+            if entries:
+                ids = list(entries)
+                similarities = np.stack([entries[i].vector for i in ids]) @ vector
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.threshold:
+                    self._lru.move_to_end((scope, ids[best]))
+                    lookup.values = dict(entries[ids[best]].values)
+
+            if lookup.hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+        record_cache(int(lookup.hit), int(not lookup.hit))
+        return lookup
+
+    def _sync_generation(self, scope: Optional[str], shared: Optional[int]) -> None:
+        """Drop a scope's entries when another process has invalidated it since they were cached."""
+        if shared is not None and shared != self._generations.get(scope, 0):
+            self._generations[scope] = shared
+            self._drop_scope(scope)
+
+    def _drop_scope(self, scope: Optional[str]) -> None:
+        for entry_id in self._scopes.pop(scope, {}):
+            self._lru.pop((scope, entry_id), None)
+
+    def _expire(self, scope: Optional[str]) -> None:
+        if not self.ttl_seconds:
+            return
+        cutoff = time.monotonic() - self.ttl_seconds
+        expired = [i for i, entry in self._scopes.get(scope, {}).items() if entry.created_at < cutoff]
+        for entry_id in expired:
+            self._lru.pop((scope, entry_id), None)
+            self._remove_from_scope(scope, entry_id)
+
+    def _remove_from_scope(self, scope: Optional[str], entry_id: int) -> None:
+        entries = self._scopes.get(scope)
+        if entries is not None:
+            entries.pop(entry_id, None)
+            if not entries:
+                del self._scopes[scope]
+
+
+_answer_cache: Optional[SemanticAnswerCache] = None
+_answer_cache_lock = threading.Lock()
+
+def get_answer_cache() -> Optional[SemanticAnswerCache]:
+    """Get the shared answer cache, or None when `answer_cache_enabled` is off."""
+    global _answer_cache
+    settings = get_settings()
+    if not settings.answer_cache_enabled:
+        return None
+
+    with _answer_cache_lock:
+        if _answer_cache is None:
+            # share the (cached) embeddings model used for retrieval
+            from ..retrieval.vector_store import _get_embeddings
+            _answer_cache = SemanticAnswerCache(
+                embeddings=_get_embeddings(),
+                threshold=settings.answer_cache_similarity_threshold,
+                ttl_seconds=settings.answer_cache_ttl_seconds,
+                max_entries=settings.answer_cache_max_entries,
+                generations=PostgresAnswerGenerations(),
+            )
+        return _answer_cache
+
+
+def invalidate_cached_answers(file_id: Optional[str]) -> None:
+    """Invalidate cached answers for a file that is being (re-)indexed, in every process.
+
+    No-op when `answer_cache_enabled` is off. A process that never used the
+    cache (e.g. an ingestion worker) only bumps the shared generations.
+    """
+    if not get_settings().answer_cache_enabled:
+        return
+    if _answer_cache is not None:
+        _answer_cache.invalidate_file(file_id)
+    else:
+        PostgresAnswerGenerations().bump({file_id, None})
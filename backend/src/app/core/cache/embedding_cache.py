@@ -0,0 +1,152 @@
+"""Content-hash embedding cache.
+
+Embeddings are keyed by (embedding model, SHA-256 of the text), so re-uploaded
+documents, repeated boilerplate pages and hot questions skip the embedding
+call. Look-ups go through two tiers:
+
+1. An in-process LRU (per worker).
+2. A persistent Postgres table shared by every worker (`embedding_cache`).
+"""
+
+import hashlib
+import logging
+from typing import Dict, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from ...db.connection import get_db_connection
+from .lru import LRUCache
+from ..tracing import record_cache, span
+
+logger = logging.getLogger(__name__)
+
+
+def hash_text(text: str) -> str:
+    """Return the SHA-256 hex digest used as the cache key for a text."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class PostgresEmbeddingStore:
+    """Persistent embedding tier stored in the `embedding_cache` table."""
+
+    def mget(self, model: str, text_hashes: List[str]) -> Dict[str, List[float]]:
+        with get_db_connection() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute("""
+                    SELECT text_hash, embedding
+                    FROM embedding_cache
+                    WHERE model = %s AND text_hash = ANY(%s)
+                """, (model, text_hashes))
+
+                return {
+                    row["text_hash"]: np.frombuffer(row["embedding"], dtype=np.float32).tolist()
+                    for row in cursor.fetchall()
+                }
+
+    def mset(self, model: str, items: Dict[str, List[float]]) -> None:
+        with get_db_connection() as connection:
+            with connection.cursor() as cursor:
+                cursor.executemany("""
+                    INSERT INTO embedding_cache (model, text_hash, embedding)
+                    VALUES (%s, %s, %s)
+                    ON CONFLICT (model, text_hash) DO NOTHING
+                """, [
+                    (model, text_hash, np.asarray(vector, dtype=np.float32).tobytes())
+                    for text_hash, vector in items.items()
+                ])
+                connection.commit()
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper that serves repeated texts from cache.
+
+    Args:
+        underlying: The embeddings model that computes cache misses.
+        model_name: Embedding model name, part of every cache key.
+        max_entries: Size of the in-process LRU tier.
+        store: Optional persistent tier (e.g. PostgresEmbeddingStore).
+    """
+
+    def __init__(
+        self,
+        underlying: Embeddings,
+        model_name: str,
+        max_entries: int = 10000,
+        store: Optional[PostgresEmbeddingStore] = None,
+    ):
+        self.underlying = underlying
+        self.model_name = model_name
+        self.store = store
+        self.memory = LRUCache(max_entries=max_entries)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        with span("embed_documents", "embedding", texts=len(texts)):
+            return self._embed_documents(texts)
+
+    def _embed_documents(self, texts: List[str]) -> List[List[float]]:
+        hashes = [hash_text(text) for text in texts]
+        vectors = self._lookup(hashes)
+
+        # embed each distinct missing text once, even if repeated within the batch
+        missing: Dict[str, str] = {}
+        for text, text_hash in zip(texts, hashes):
+            if text_hash not in vectors:
+                missing.setdefault(text_hash, text)
+
+        record_cache(len(set(hashes)) - len(missing), len(missing))
+        if missing:
+            computed = self.underlying.embed_documents(list(missing.values()))
+            new_vectors = dict(zip(missing.keys(), computed))
+            self._store(new_vectors)
+            vectors.update(new_vectors)
+
+        return [vectors[text_hash] for text_hash in hashes]
+
+    def embed_query(self, text: str) -> List[float]:
+        with span("embed_query", "embedding"):
+            return self._embed_query(text)
+
+    def _embed_query(self, text: str) -> List[float]:
+        text_hash = hash_text(text)
+        vectors = self._lookup([text_hash])
+        record_cache(int(text_hash in vectors), int(text_hash not in vectors))
+        if text_hash in vectors:
+            return vectors[text_hash]
+
+        vector = self.underlying.embed_query(text)
+        self._store({text_hash: vector})
+        return vector
+
+    def _lookup(self, hashes: List[str]) -> Dict[str, List[float]]:
+        """Resolve hashes from the LRU first, then from the persistent tier."""
+        found: Dict[str, List[float]] = {}
+        for text_hash in hashes:
+            vector = self.memory.get((self.model_name, text_hash))
+            if vector is not None:
+                found[text_hash] = vector
+
+        remaining = list({h for h in hashes if h not in found})
+        if remaining and self.store is not None:
+            try:
+                persisted = self.store.mget(self.model_name, remaining)
+            except Exception as e:
+                # the cache must never take embeddings down with it
+                logger.warning("Embedding cache lookup failed, falling back to the model: %s", e)
+                persisted = {}
+
+            for text_hash, vector in persisted.items():
+                self.memory.put((self.model_name, text_hash), vector)
+            found.update(persisted)
+
+        return found
+
+    def _store(self, vectors: Dict[str, List[float]]) -> None:
+        for text_hash, vector in vectors.items():
+            self.memory.put((self.model_name, text_hash), vector)
+
+        if self.store is not None:
+            try:
+                self.store.mset(self.model_name, vectors)
+            except Exception as e:
+                logger.warning("Embedding cache write failed: %s", e)
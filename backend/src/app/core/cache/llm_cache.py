@@ -0,0 +1,183 @@
+"""Exact-prompt response cache for deterministic (temperature 0) chat models.
+
+Plugged into LangChain through the `cache=` argument of the chat model, so
+every agent call goes through it. Responses are keyed by SHA-256 of the
+model configuration string (model name, temperature, bound tools, ...) and the
+serialized messages. Look-ups go through two tiers:
+
+1. An in-process LRU with a byte budget (per worker).
+2. A persistent Postgres table shared by every worker (`llm_cache`).
+"""
+
+import hashlib
+import json
+import logging
+import threading
+from typing import Any, Dict, Optional, Sequence
+
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.messages import message_to_dict, messages_from_dict
+from langchain_core.outputs import ChatGeneration, Generation
+
+from ...db.connection import get_db_connection
+from .lru import LRUCache
+from ..tracing import record_cache, span
+
+logger = logging.getLogger(__name__)
+
+
+def cache_key(prompt: str, llm_string: str) -> str:
+    """Return the SHA-256 hex digest used as the cache key for a model call."""
+    return hashlib.sha256(f"{llm_string}\x00{prompt}".encode("utf-8")).hexdigest()
+
+
+def _model_name(llm_string: str) -> str:
+    """Best-effort model name from LangChain's llm_string (stored for inspection only)."""
+    try:
+        params = json.loads(llm_string.split("---")[0])
+        return str(params.get("kwargs", {}).get("model_name") or params.get("model_name") or "")
+    except (ValueError, AttributeError):
+        return ""
+
+
+def _encode(generations: Sequence[Generation]) -> str:
+    return json.dumps([
+        {"message": message_to_dict(gen.message), "generation_info": gen.generation_info}
+        if isinstance(gen, ChatGeneration)
+        else {"text": gen.text, "generation_info": gen.generation_info}
+        for gen in generations
+    ])
+
+
+def _decode(payload: str) -> list[Generation]:
+    generations: list[Generation] = []
+    for item in json.loads(payload):
+        if "message" in item:
+            message = messages_from_dict([item["message"]])[0]
+            generations.append(ChatGeneration(message=message, generation_info=item.get("generation_info")))
+        else:
+            generations.append(Generation(text=item["text"], generation_info=item.get("generation_info")))
+    return generations
+
+
+class PostgresLLMStore:
+    """Persistent response tier stored in the `llm_cache` table."""
+
+    def get(self, key: str) -> Optional[str]:
+        with get_db_connection() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT response FROM llm_cache WHERE cache_key = %s", (key,))
+                row = cursor.fetchone()
+                return row["response"] if row else None
+
+    def set(self, key: str, model: str, response: str) -> None:
+        with get_db_connection() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute("""
+                    INSERT INTO llm_cache (cache_key, model, response)
+                    VALUES (%s, %s, %s)
+                    ON CONFLICT (cache_key) DO NOTHING
+                """, (key, model, response))
+                connection.commit()
+
+    def clear(self) -> None:
+        with get_db_connection() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute("DELETE FROM llm_cache")
+                connection.commit()
+
+
+class TwoTierLLMCache(BaseCache):
+    """LangChain cache backed by a byte-bounded LRU and an optional Postgres tier.
+
+    Args:
+        max_bytes: Byte budget of the in-process tier (serialized responses).
+        store: Optional persistent tier (e.g. PostgresLLMStore).
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, store: Optional[PostgresLLMStore] = None):
+        self.store = store
+        self.memory = LRUCache(max_bytes=max_bytes, sizeof=len)
+        self._lock = threading.Lock()
+
+        self.memory_hits = 0
+        self.store_hits = 0
+        self.misses = 0
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        with span("llm_cache.lookup", "cache"):
+            return self._lookup(cache_key(prompt, llm_string))
+
+    def _lookup(self, key: str) -> Optional[RETURN_VAL_TYPE]:
+
+        payload = self.memory.get(key)
+        if payload is not None:
+            self._count("memory_hits")
+            record_cache(1, 0)
+            return _decode(payload)
+
+        if self.store is not None:
+            try:
+                payload = self.store.get(key)
+            except Exception as e:
+                # the cache must never take the model down with it
+                logger.warning("LLM cache lookup failed, calling the model: %s", e)
+                payload = None
+
+            if payload is not None:
+                self.memory.put(key, payload)
+                self._count("store_hits")
+                record_cache(1, 0)
+                return _decode(payload)
+
+        self._count("misses")
+        record_cache(0, 1)
+        return None
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        key = cache_key(prompt, llm_string)
+        payload = _encode(return_val)
+        self.memory.put(key, payload)
+
+        if self.store is not None:
+            try:
+                self.store.set(key, _model_name(llm_string), payload)
+            except Exception as e:
+                logger.warning("LLM cache write failed: %s", e)
+
+    def clear(self, **kwargs: Any) -> None:
+        self.memory.clear()
+        if self.store is not None:
+            self.store.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters and the in-process tier's size."""
+        return {
+            "memory_hits": self.memory_hits,
+            "store_hits": self.store_hits,
+            "misses": self.misses,
+            "memory_entries": len(self.memory),
+            "memory_bytes": self.memory.total_bytes,
+        }
+
+    def render_prometheus(self, prefix: str = "ikms") -> str:
+        """Render `stats()` in the Prometheus text exposition format (appended to /metrics)."""
+        stats = self.stats()
+        lines = [
+            f"# HELP {prefix}_llm_cache_lookups_total LLM cache look-ups by the tier that answered them.",
+            f"# TYPE {prefix}_llm_cache_lookups_total counter",
+            f'{prefix}_llm_cache_lookups_total{{result="memory_hit"}} {stats["memory_hits"]}',
+            f'{prefix}_llm_cache_lookups_total{{result="store_hit"}} {stats["store_hits"]}',
+            f'{prefix}_llm_cache_lookups_total{{result="miss"}} {stats["misses"]}',
+            f"# HELP {prefix}_llm_cache_memory_entries Responses held by the in-process LLM cache tier.",
+            f"# TYPE {prefix}_llm_cache_memory_entries gauge",
+            f"{prefix}_llm_cache_memory_entries {stats['memory_entries']}",
+            f"# HELP {prefix}_llm_cache_memory_bytes Serialized size of the in-process LLM cache tier.",
+            f"# TYPE {prefix}_llm_cache_memory_bytes gauge",
+            f"{prefix}_llm_cache_memory_bytes {stats['memory_bytes']}",
+        ]
+        return "\n".join(lines) + "\n"
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
@@ -4,28 +4,152 @@ This module uses Pydantic Settings to load and validate environment variables
 for OpenAI models, Pinecone settings, and other system parameters.
 """
 
+from pydantic import model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
     """Application settings loaded from environment variables."""
 
-    openai_api_key: str
+    # required unless both providers below are "fake"
+    openai_api_key: str = ""
     openai_model_name: str = "gpt-5-mini"
     openai_embedding_model_name: str = "text-embedding-3-small"
 
-    pinecone_api_key: str
-    pinecone_index_name: str
+    # Per-node chat models (empty = openai_model_name), e.g. a smaller model for retrieval and memory
+    retrieval_model_name: str = ""
+    summarization_model_name: str = ""
+    verification_model_name: str = ""
+    memory_model_name: str = ""
+
+    # Shared OpenAI HTTP client: timeouts, connection pool and retries (with backoff, by the OpenAI SDK)
+    openai_timeout_seconds: float = 60.0
+    openai_connect_timeout_seconds: float = 5.0
+    openai_max_retries: int = 2
+    openai_max_connections: int = 50
+    openai_max_keepalive_connections: int = 20
+    openai_keepalive_expiry_seconds: float = 30.0
+
+    # Model providers: "openai" or "fake" (offline deterministic stand-ins, see core/llm/fake.py).
+    # With both set to "fake" and vector_store_backend="local" the app makes no OpenAI or Pinecone calls.
+    # Fake chat models sleep fake_llm_latency_ms plus up to fake_llm_latency_jitter_ms per call and
+    # answer fake_llm_answer (empty = the first sentences of the context)
+    llm_provider: str = "openai"
+    embedding_provider: str = "openai"
+    fake_llm_latency_ms: float = 0.0
+    fake_llm_latency_jitter_ms: float = 0.0
+    fake_llm_answer: str = ""
+    fake_embedding_dimensions: int = 1536
+    fake_embedding_latency_ms: float = 0.0
+
+    pinecone_api_key: str = ""
+    pinecone_index_name: str = ""
+
+    # Vector store backend: "pinecone" (managed) or "local" (memory-mapped NumPy files)
+    vector_store_backend: str = "pinecone"
+    local_vector_store_path: str = "data/vector_store"
+    local_vector_store_quantize: bool = False
+
+    # Embedding cache: in-process LRU plus a shared Postgres tier
+    embedding_cache_enabled: bool = True
+    embedding_cache_max_entries: int = 10000
+    embedding_cache_persistent: bool = True
+
+    # LLM response cache for temperature-0 chat models: in-process LRU (byte budget)
+    # plus a shared Postgres tier
+    llm_cache_enabled: bool = False
+    llm_cache_max_bytes: int = 64 * 1024 * 1024
+    llm_cache_persistent: bool = True
 
     database_url: str
 
     retrieval_k: int = 4
-    
+
+    # Retrieval mode: "agentic" (LLM decides how to call the retrieval tool)
+    # or "direct" (retrieve() is called with a deterministic query rewrite)
+    retrieval_mode: str = "agentic"
+
+    # Verification is skipped when the draft's grounding score (share of sentences with at least
+    # grounding_sentence_support of their content words found in the context) reaches
+    # verification_skip_threshold. A threshold above 1.0 always runs the Verification Agent
+    verification_skip_threshold: float = 1.1
+    grounding_sentence_support: float = 0.7
+
+    # Prompt token budgets per agent (0 = unlimited). Context chunks are kept in rank order and
+    # history (newest turns first, after the summary) may use at most prompt_history_max_share of
+    # a budget; the Retrieval Agent's prompt has no context, so history can use all of it
+    retrieval_prompt_token_budget: int = 0
+    summarization_prompt_token_budget: int = 0
+    verification_prompt_token_budget: int = 0
+    prompt_history_max_share: float = 0.4
+
+    # Pre-retrieval scope gate: a question without history is refused with no LLM calls when its
+    # embedding's cosine similarity is below both thresholds (to the file's chunk centroid and
+    # to the best-matching chunk). Centroids are computed while indexing
+    scope_gate_enabled: bool = False
+    scope_gate_centroid_threshold: float = 0.15
+    scope_gate_match_threshold: float = 0.2
+
+    # Search mode: "dense" (vector store only) or "hybrid" (vector store plus
+    # Postgres full-text search over document_chunks, merged with reciprocal rank fusion).
+    # hybrid_candidates is the depth fetched from each retriever before fusion
+    retrieval_search_mode: str = "dense"
+    hybrid_candidates: int = 20
+    hybrid_rrf_k: int = 60
+    # also store chunks in document_chunks while indexing (required for hybrid search)
+    lexical_index_enabled: bool = False
+
+    # Semantic answer cache for questions without conversation history, scoped by file_id.
+    # A question hits when a cached question's embedding has cosine similarity >= the threshold
+    answer_cache_enabled: bool = False
+    answer_cache_similarity_threshold: float = 0.95
+    answer_cache_ttl_seconds: int = 3600
+    answer_cache_max_entries: int = 2000
+
+    # Tracing: spans for requests, graph nodes, retrieval, embedding, LLM, cache and DB calls.
+    # Exported to an in-memory ring buffer ("memory") or appended to a JSONL file ("jsonl");
+    # aggregates are served in Prometheus text format by /metrics. Off by default: each span costs
+    # about 15 us (span object, metrics update, export) and the ring buffer keeps up to
+    # tracing_buffer_size spans with their attributes in memory
+    tracing_enabled: bool = False
+    tracing_exporter: str = "memory"
+    tracing_buffer_size: int = 2000
+    tracing_jsonl_path: str = "traces.jsonl"
+
+    # Level of the application's log records ("DEBUG", "INFO", "WARNING", ...)
+    log_level: str = "INFO"
+
+    # LangGraph checkpoint maintenance (see db/checkpoint_maintenance.py)
+    checkpoint_keep_last: int = 5
+    checkpoint_ttl_days: int = 0
+    checkpoint_gc_idle_minutes: int = 10
+    checkpoint_gc_batch_size: int = 500
+    checkpoint_gc_interval_minutes: int = 60
+
+    # PDF ingestion queue: workers claim jobs from the ingestion_jobs table.
+    # ingestion_worker_threads runs workers inside the API (0 = external workers only)
+    ingestion_worker_threads: int = 1
+    ingestion_poll_interval_seconds: float = 2.0
+    ingestion_job_timeout_minutes: int = 30
+    ingestion_max_attempts: int = 3
+    # chunks embedded and upserted per batch while indexing a PDF page by page
+    ingestion_batch_size: int = 64
+    # PDF text extraction processes (0 = one per spare CPU, up to 4; 1 = parse in the calling thread)
+    pdf_parse_workers: int = 0
+    pdf_parse_pages_per_task: int = 8
+
     # JWT and Google OAuth settings
     jwt_secret_key: str = ""
     jwt_algorithm: str = "HS256"
     jwt_expiration_hours: int = 24
     google_client_id: str = ""
 
+    @model_validator(mode="after")
+    def _require_openai_key(self) -> "Settings":
+        uses_openai = "openai" in (self.llm_provider.lower(), self.embedding_provider.lower())
+        if uses_openai and not self.openai_api_key:
+            raise ValueError("OPENAI_API_KEY is required unless llm_provider and embedding_provider are 'fake'")
+        return self
+
     model_config = SettingsConfigDict(
         env_file=".env",
         env_file_encoding="utf-8",
@@ -1,21 +1,126 @@
+"""LLM factory module for creating LangChain chat models."""
+import httpx
+from langchain_core.caches import BaseCache
+from langchain_core.language_models import BaseChatModel
 from langchain_openai import ChatOpenAI
 from functools import lru_cache
 from ..config import get_settings
+from ..cache.llm_cache import PostgresLLMStore, TwoTierLLMCache
+from ..tracing import TracingCallbackHandler
+from .fake import FakeChatModel
+
+# graph nodes with their own model setting (`<node>_model_name`)
+MODEL_NODES = ("retrieval", "summarization", "verification", "memory")
+
+@lru_cache(maxsize=1)
+def get_llm_cache() -> BaseCache | None:
+    """Get the response cache shared by temperature-0 chat models (None when disabled)."""
+    settings = get_settings()
+    if not settings.llm_cache_enabled:
+        return None
+
+    return TwoTierLLMCache(
+        max_bytes=settings.llm_cache_max_bytes,
+        store=PostgresLLMStore() if settings.llm_cache_persistent else None
+    )
+
+@lru_cache(maxsize=1)
+def get_tracing_callback() -> TracingCallbackHandler:
+    """Get the callback that records every chat model call as a trace span."""
+    return TracingCallbackHandler()
+
+# shared HTTP clients
+def _http_client_options() -> dict:
+    settings = get_settings()
+    return {
+        "timeout": httpx.Timeout(settings.openai_timeout_seconds, connect=settings.openai_connect_timeout_seconds),
+        "limits": httpx.Limits(
+            max_connections=settings.openai_max_connections,
+            max_keepalive_connections=settings.openai_max_keepalive_connections,
+            keepalive_expiry=settings.openai_keepalive_expiry_seconds
+        ),
+    }
 
 @lru_cache(maxsize=1)
-def create_chat_model(temperature: float = 0.0) -> ChatOpenAI:
-    """Create a LangChain v1 ChatOpenAI instance.
+def get_http_client() -> httpx.Client:
+    """Get the pooled HTTP client shared by every sync OpenAI call (chat and embeddings)."""
+    return httpx.Client(**_http_client_options())
+
+@lru_cache(maxsize=1)
+def get_async_http_client() -> httpx.AsyncClient:
+    """Get the pooled HTTP client shared by every async OpenAI call (chat and embeddings)."""
+    return httpx.AsyncClient(**_http_client_options())
+
+async def close_http_clients() -> None:
+    """Close the shared HTTP clients (called on application shutdown)."""
+    if get_http_client.cache_info().currsize:
+        get_http_client().close()
+        get_http_client.cache_clear()
+    if get_async_http_client.cache_info().currsize:
+        await get_async_http_client().aclose()
+        get_async_http_client.cache_clear()
+    _create_model.cache_clear()
+
+def get_model_name(node: str | None = None) -> str:
+    """Return the model configured for a graph node, falling back to `openai_model_name`.
+
+    Args:
+        node: One of MODEL_NODES, or None for the default model.
+    """
+
+    settings = get_settings()
+    if node is None:
+        return settings.openai_model_name
+    if node not in MODEL_NODES:
+        raise ValueError(f"Unknown model node '{node}'. Expected one of: {', '.join(MODEL_NODES)}")
+    return getattr(settings, f"{node}_model_name") or settings.openai_model_name
+
+def create_chat_model(node: str | None = None, temperature: float = 0.0) -> BaseChatModel:
+    """Create a LangChain v1 chat model for a graph node.
+
+    Nodes configured with the same model share one instance, and every
+    instance sends requests through the shared pooled HTTP clients.
+    Deterministic models (temperature 0) reuse responses for identical prompts
+    through the two-tier LLM cache when `llm_cache_enabled` is set. Every
+    call is traced (latency, tokens and cache hits, see `core/tracing.py`).
 
     Args:
+        node: Graph node the model is for ("retrieval", "summarization",
+            "verification" or "memory"); None uses `openai_model_name`.
         temperature: Model temperature (default: 0.0 for deterministic outputs).
 
     Returns:
-        Configured ChatOpenAI instance.
+        Configured ChatOpenAI instance, or an offline FakeChatModel when
+        `llm_provider` is "fake".
     """
 
+    return _create_model(get_model_name(node), temperature)
+
+@lru_cache(maxsize=None)
+def _create_model(model_name: str, temperature: float) -> BaseChatModel:
     settings = get_settings()
+    provider = settings.llm_provider.lower()
+
+    if provider == "fake":
+        return FakeChatModel(
+            model_name=model_name,
+            latency_ms=settings.fake_llm_latency_ms,
+            latency_jitter_ms=settings.fake_llm_latency_jitter_ms,
+            answer=settings.fake_llm_answer,
+            cache=get_llm_cache() if temperature == 0 else None,
+            callbacks=[get_tracing_callback()]
+        )
+
+    if provider != "openai":
+        raise ValueError(f"Unknown llm_provider: {settings.llm_provider}")
+
     return ChatOpenAI(
-        model=settings.openai_model_name,
+        model=model_name,
         api_key=settings.openai_api_key,
-        temperature=temperature
-    )
\ No newline at end of file
+        temperature=temperature,
+        max_retries=settings.openai_max_retries,
+        http_client=get_http_client(),
+        http_async_client=get_async_http_client(),
+        cache=get_llm_cache() if temperature == 0 else None,
+        callbacks=[get_tracing_callback()]
+    )
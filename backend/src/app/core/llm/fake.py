@@ -0,0 +1,208 @@
+"""Offline deterministic stand-ins for the OpenAI chat and embedding models.
+
+Selected with `llm_provider="fake"` and `embedding_provider="fake"` (together
+with `vector_store_backend="local"`), so the whole app can be load-tested and
+profiled without calling OpenAI or Pinecone.
+
+- `FakeChatModel` calls `retrieval_tool` when tools are bound and it has not
+  seen a tool result yet. Otherwise it answers with the first sentences of
+  the context it was given (the draft, for verification prompts), or with a
+  hash-derived sentence when there is no context. Latency is simulated with a
+  fixed delay plus a hash-derived jitter, so runs are reproducible.
+- `HashEmbeddings` sums hash-seeded random vectors of the text's content
+  words (feature hashing). Texts that share words are similar, so retrieval, the
+  scope gate and the answer cache behave much as they do with real embeddings.
+"""
+
+import asyncio
+import hashlib
+import re
+import time
+import uuid
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+
+_SENTENCE_PATTERN = re.compile(r"[^.!?\n]+[.!?]")
+_FILE_SCOPE_PATTERN = re.compile(r"\[Search only in file_id: ([^\]]+)\]")
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+# function words carry no topic; without them texts that share content words score as similar
+_STOPWORDS = frozenset("""
+a an and are as at be but by can do does for from has have how i in is it its of on or that the
+their there these this to was what when where which who why will with you your
+""".split())
+
+
+def _digest(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _estimate_tokens(text: str) -> int:
+    return len(text) // 4 + 1
+
+
+def _between(text: str, start: str, end: Optional[str] = None) -> Optional[str]:
+    """Return the text after `start` (up to `end`, if present), or None if `start` is missing."""
+    index = text.find(start)
+    if index < 0:
+        return None
+    section = text[index + len(start):]
+    if end and end in section:
+        section = section[:section.index(end)]
+    return section.strip()
+
+
+class FakeChatModel(BaseChatModel):
+    """Deterministic offline chat model (see the module docstring).
+
+    Args:
+        model_name: Reported model name (part of the LLM cache key and trace spans).
+        latency_ms: Simulated latency of every call.
+        latency_jitter_ms: Maximum extra latency, derived from the prompt's hash.
+        answer: Canned answer returned for every non-tool call (empty = derive it).
+        answer_sentences: Number of context sentences in a derived answer.
+    """
+
+    model_name: str = "fake-chat"
+    latency_ms: float = 0.0
+    latency_jitter_ms: float = 0.0
+    answer: str = ""
+    answer_sentences: int = 2
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"model_name": self.model_name, "answer": self.answer, "answer_sentences": self.answer_sentences}
+
+    def bind_tools(self, tools: Sequence[Any], *, tool_choice: Any = None, **kwargs: Any):
+        return self.bind(tools=[convert_to_openai_tool(t) for t in tools], **kwargs)
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        prompt = self._prompt(messages)
+        time.sleep(self._delay(prompt))
+        return self._result(messages, prompt, kwargs.get("tools"))
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        prompt = self._prompt(messages)
+        await asyncio.sleep(self._delay(prompt))
+        return self._result(messages, prompt, kwargs.get("tools"))
+
+    @staticmethod
+    def _prompt(messages: List[BaseMessage]) -> str:
+        return "\n".join(str(message.content) for message in messages)
+
+    def _delay(self, prompt: str) -> float:
+        jitter = int(_digest(prompt)[:8], 16) / 0xFFFFFFFF * self.latency_jitter_ms
+        return (self.latency_ms + jitter) / 1000
+
+    def _result(self, messages: List[BaseMessage], prompt: str, tools: Optional[List[Dict[str, Any]]]) -> ChatResult:
+        tool_results = [m for m in messages if isinstance(m, ToolMessage)]
+        if tools and not tool_results:
+            message = AIMessage(content="", tool_calls=[self._tool_call(messages, tools[0])])
+        else:
+            message = AIMessage(content=self._answer(messages, tool_results))
+
+        message.usage_metadata = {
+            "input_tokens": _estimate_tokens(prompt),
+            "output_tokens": _estimate_tokens(str(message.content)),
+            "total_tokens": _estimate_tokens(prompt) + _estimate_tokens(str(message.content)),
+        }
+        return ChatResult(generations=[ChatGeneration(message=message)], llm_output={"model_name": self.model_name})
+
+    @staticmethod
+    def _tool_call(messages: List[BaseMessage], tool: Dict[str, Any]) -> Dict[str, Any]:
+        """Call the first bound tool with the user's question (and file scope, if any)."""
+        request = next((str(m.content) for m in reversed(messages) if isinstance(m, HumanMessage)), "")
+        query = _between(request, "Current Question:") or _FILE_SCOPE_PATTERN.sub("", request).strip()
+
+        args: Dict[str, Any] = {"query": query}
+        file_scope = _FILE_SCOPE_PATTERN.search(request)
+        if file_scope and "file_id" in tool["function"].get("parameters", {}).get("properties", {}):
+            args["file_id"] = file_scope.group(1).strip()
+
+        return {"name": tool["function"]["name"], "args": args, "id": f"call_{uuid.uuid4().hex[:24]}", "type": "tool_call"}
+
+    def _answer(self, messages: List[BaseMessage], tool_results: List[ToolMessage]) -> str:
+        if self.answer:
+            return self.answer
+
+        request = next((str(m.content) for m in reversed(messages) if isinstance(m, HumanMessage)), "")
+
+        # verification: accept the draft as it is
+        draft = _between(request, "Draft_answer:", "Please verify")
+        if draft:
+            return draft
+
+        context = str(tool_results[-1].content) if tool_results else _between(request, "Context:", "Draft_answer:")
+        if context:
+            # imported here: the retrieval package imports the LLM factory, which imports this module
+            from ..retrieval.serialization import CHUNK_HEADER_PATTERN
+            sentences = _SENTENCE_PATTERN.findall(CHUNK_HEADER_PATTERN.sub("", context))
+            if sentences:
+                return " ".join(s.strip() for s in sentences[:self.answer_sentences])
+
+        return f"Offline answer {_digest(request)[:12]}."
+
+
+@lru_cache(maxsize=65536)
+def _token_vector(token: str, dimensions: int) -> np.ndarray:
+    rng = np.random.default_rng(int(_digest(token)[:16], 16))
+    return rng.standard_normal(dimensions).astype(np.float32)
+
+
+class HashEmbeddings(Embeddings):
+    """Deterministic offline embeddings: normalized sums of hash-seeded token vectors.
+
+    Args:
+        dimensions: Vector size.
+        latency_ms: Simulated latency of every call.
+    """
+
+    def __init__(self, dimensions: int = 1536, latency_ms: float = 0.0):
+        self.dimensions = dimensions
+        self.latency_ms = latency_ms
+
+    def _embed(self, text: str) -> List[float]:
+        tokens = [token for token in _TOKEN_PATTERN.findall(text.lower()) if token not in _STOPWORDS] or [text]
+        vector = np.sum([_token_vector(token, self.dimensions) for token in tokens], axis=0)
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm > 0 else vector).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        time.sleep(self.latency_ms / 1000)
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        time.sleep(self.latency_ms / 1000)
+        return self._embed(text)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        await asyncio.sleep(self.latency_ms / 1000)
+        return [self._embed(text) for text in texts]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        await asyncio.sleep(self.latency_ms / 1000)
+        return self._embed(text)
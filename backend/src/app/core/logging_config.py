@@ -0,0 +1,23 @@
+"""Logging setup shared by the API and the command-line entry points.
+
+Modules log through `logging.getLogger(__name__)`. Only the application's own
+loggers are configured here, so library loggers keep their defaults.
+"""
+
+import logging
+
+from .config import get_settings
+
+# parent of every module logger of the app ("src.app")
+_APP_LOGGER = __name__.rsplit(".", 2)[0]
+
+
+def configure_logging() -> None:
+    """Write the app's log records to stderr at `settings.log_level` (idempotent)."""
+    logger = logging.getLogger(_APP_LOGGER)
+    logger.setLevel(get_settings().log_level.upper())
+    if not logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+        logger.addHandler(handler)
+        logger.propagate = False
@@ -0,0 +1,98 @@
+"""Per-file embedding centroids used by the pre-retrieval scope gate.
+
+While a file is indexed, the normalized embeddings of its chunks are summed.
+The normalized sum (the centroid) is stored in `file_centroids`. The cosine
+similarity between a question and the centroid is a cheap signal of whether
+the question is about the file at all.
+"""
+
+from typing import Iterable, Optional, Sequence
+
+import numpy as np
+
+from ...db.connection import get_db_connection
+from ..cache.lru import LRUCache
+
+
+def normalize(vector: Sequence[float]) -> np.ndarray:
+    """Return `vector` as a unit-length float32 array (unchanged if it is all zeros)."""
+    array = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(array)
+    return array / norm if norm > 0 else array
+
+
+class CentroidAccumulator:
+    """Running sum of normalized chunk embeddings for one file."""
+
+    def __init__(self):
+        self.total: Optional[np.ndarray] = None
+        self.count = 0
+
+    def add(self, vectors: Iterable[Sequence[float]]) -> None:
+        for vector in vectors:
+            unit = normalize(vector)
+            self.total = unit if self.total is None else self.total + unit
+            self.count += 1
+
+    def centroid(self) -> Optional[np.ndarray]:
+        return None if self.total is None else normalize(self.total)
+
+
+class FileCentroidStore:
+    """Centroids stored in the `file_centroids` table, with an in-process LRU in front."""
+
+    def __init__(self, max_entries: int = 1000):
+        self.memory = LRUCache(max_entries=max_entries)
+
+    def save(self, file_id: str, accumulator: CentroidAccumulator) -> None:
+        """Store (or replace) a file's centroid."""
+        centroid = accumulator.centroid()
+        if centroid is None:
+            return
+
+        try:
+            with get_db_connection() as connection:
+                with connection.cursor() as cursor:
+                    cursor.execute("""
+                        INSERT INTO file_centroids (file_id, centroid, chunk_count, updated_at)
+                        VALUES (%s, %s, %s, NOW())
+                        ON CONFLICT (file_id) DO UPDATE
+                        SET centroid = EXCLUDED.centroid,
+                            chunk_count = EXCLUDED.chunk_count,
+                            updated_at = NOW()
+                    """, (file_id, centroid.tobytes(), accumulator.count))
+                    connection.commit()
+        except Exception as e:
+            raise Exception(f"Database error saving file centroid: {str(e)}") from e
+
+        self.memory.put(file_id, centroid)
+
+    def get(self, file_id: str) -> Optional[np.ndarray]:
+        """Return a file's centroid, or None if the file has none (e.g. indexed before centroids existed)."""
+        centroid = self.memory.get(file_id)
+        if centroid is not None:
+            return centroid
+
+        try:
+            with get_db_connection() as connection:
+                with connection.cursor() as cursor:
+                    cursor.execute("SELECT centroid FROM file_centroids WHERE file_id = %s", (file_id,))
+                    row = cursor.fetchone()
+        except Exception as e:
+            raise Exception(f"Database error loading file centroid: {str(e)}") from e
+
+        if row is None:
+            return None
+
+        centroid = np.frombuffer(row["centroid"], dtype=np.float32)
+        self.memory.put(file_id, centroid)
+        return centroid
+
+
+_centroid_store: Optional[FileCentroidStore] = None
+
+def get_centroid_store() -> FileCentroidStore:
+    global _centroid_store
+    if _centroid_store is None:
+        _centroid_store = FileCentroidStore()
+    return _centroid_store
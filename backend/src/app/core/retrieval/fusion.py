@@ -0,0 +1,47 @@
+"""Rank fusion for combining retrieval result lists."""
+
+import hashlib
+from typing import Dict, List, Sequence
+
+from langchain_core.documents import Document
+
+# Standard RRF constant from Cormack et al.; damps the weight of top ranks
+DEFAULT_RRF_K = 60
+
+
+def _doc_key(doc: Document) -> str:
+    """Identity used to merge the same chunk across result lists.
+
+    Keyed by content rather than `doc.id`: not every vector store returns ids
+    on search results, and chunks indexed before the lexical table existed
+    have none to match.
+    """
+    source = f"{doc.metadata.get('file_id', '')}\x00{doc.page_content}"
+    return hashlib.sha256(source.encode("utf-8")).hexdigest()
+
+
+def reciprocal_rank_fusion(result_lists: Sequence[Sequence[Document]], k: int, rrf_k: int = DEFAULT_RRF_K) -> List[Document]:
+    """Merge ranked lists with reciprocal rank fusion and return the top `k`.
+
+    Each document scores sum(1 / (rrf_k + rank)) over the lists it appears in
+    (rank starting at 1), so chunks found by both retrievers rise to the top.
+
+    Args:
+        result_lists: Ranked result lists (best first), e.g. dense and lexical.
+        k: Number of documents to return.
+        rrf_k: Rank damping constant.
+
+    Returns:
+        Fused documents, best first.
+    """
+    scores: Dict[str, float] = {}
+    docs: Dict[str, Document] = {}
+
+    for results in result_lists:
+        for rank, doc in enumerate(results, start=1):
+            key = _doc_key(doc)
+            scores[key] = scores.get(key, 0.0) + 1.0 / (rrf_k + rank)
+            docs.setdefault(key, doc)
+
+    ranked = sorted(scores, key=scores.get, reverse=True)
+    return [docs[key] for key in ranked[:k]]
@@ -0,0 +1,94 @@
+"""Full-text chunk index in Postgres, used for the lexical half of hybrid retrieval.
+
+Every chunk written to the vector store is also stored in `document_chunks`
+under the same id. The table has a generated `tsvector` column with a GIN
+index, so exact identifiers, acronyms and numbers can be matched with
+Postgres full-text search and ranked with `ts_rank_cd`.
+"""
+
+import json
+from typing import List, Optional, Sequence
+
+from langchain_core.documents import Document
+
+from ...db.connection import get_db_connection, get_async_db_connection
+from ..tracing import traced
+
+# Any query term may match (OR), unlike plainto_tsquery's AND, so long
+# natural-language questions still find chunks that share a few rare terms.
+# The terms are the question's lexemes, each quoted by its tsvector output
+# and joined with `|`, so no query text is parsed as tsquery syntax.
+_SEARCH_QUERY = """
+    WITH terms AS (
+        SELECT string_agg(array_to_tsvector(ARRAY[lexeme])::text, ' | ')::tsquery AS query
+        FROM unnest(tsvector_to_array(to_tsvector('english', %(query)s))) AS lexeme
+    )
+    SELECT chunk_id, content, metadata, ts_rank_cd(content_tsv, query) AS score
+    FROM document_chunks, terms
+    WHERE content_tsv @@ query
+      AND (%(file_id)s::varchar IS NULL OR file_id = %(file_id)s::varchar)
+    ORDER BY score DESC
+    LIMIT %(k)s
+"""
+
+
+def _documents_from_rows(rows) -> List[Document]:
+    return [
+        Document(id=row["chunk_id"], page_content=row["content"], metadata=row["metadata"] or {})
+        for row in rows
+    ]
+
+
+class ChunkStore:
+    """Stores chunk text for full-text search and runs lexical queries."""
+
+    def add_chunks(self, docs: Sequence[Document]) -> None:
+        """Store chunks (which must already carry ids) in `document_chunks`."""
+        if not docs:
+            return
+
+        try:
+            with get_db_connection() as connection:
+                with connection.cursor() as cursor:
+                    cursor.executemany("""
+                        INSERT INTO document_chunks (chunk_id, file_id, content, metadata)
+                        VALUES (%s, %s, %s, %s)
+                        ON CONFLICT (chunk_id) DO NOTHING
+                    """, [
+                        (doc.id, doc.metadata.get("file_id"), doc.page_content, json.dumps(doc.metadata, default=str))
+                        for doc in docs
+                    ])
+                    connection.commit()
+        except Exception as e:
+            raise Exception(f"Database error storing document chunks: {str(e)}") from e
+
+    @traced("lexical_search", "retrieval")
+    def search(self, query: str, k: int, file_id: Optional[str] = None) -> List[Document]:
+        """Return up to `k` chunks ranked by full-text relevance to `query`."""
+        try:
+            with get_db_connection() as connection:
+                with connection.cursor() as cursor:
+                    cursor.execute(_SEARCH_QUERY, {"query": query, "file_id": file_id, "k": k})
+                    return _documents_from_rows(cursor.fetchall())
+        except Exception as e:
+            raise Exception(f"Database error searching document chunks: {str(e)}") from e
+
+    @traced("lexical_search", "retrieval")
+    async def asearch(self, query: str, k: int, file_id: Optional[str] = None) -> List[Document]:
+        """Async counterpart of `search()`."""
+        try:
+            async with get_async_db_connection() as connection:
+                async with connection.cursor() as cursor:
+                    await cursor.execute(_SEARCH_QUERY, {"query": query, "file_id": file_id, "k": k})
+                    return _documents_from_rows(await cursor.fetchall())
+        except Exception as e:
+            raise Exception(f"Database error searching document chunks: {str(e)}") from e
+
+
+_chunk_store: Optional[ChunkStore] = None
+
+def get_chunk_store() -> ChunkStore:
+    global _chunk_store
+    if _chunk_store is None:
+        _chunk_store = ChunkStore()
+    return _chunk_store
@@ -0,0 +1,343 @@
+"""In-process vector store backed by memory-mapped NumPy matrices.
+
+This module provides a drop-in alternative to Pinecone for local and offline
+runs. Chunk embeddings are partitioned by `file_id`, so a filtered search only
+touches the matrix for that file instead of scanning the whole index.
+
+On-disk layout (one directory per partition):
+- `meta.json`: vector dimension, storage dtype and row count
+- `vectors.bin`: row-major matrix of L2-normalised embeddings (float32 or int8)
+- `scales.bin`: per-row dequantisation scales (int8 storage only)
+- `docs.jsonl`: page content and metadata for each row, in row order
+"""
+
+import json
+import shutil
+import threading
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+# partition used for chunks indexed without a file_id
+_UNSCOPED_PARTITION = "_unscoped"
+
+# rows scored per block, so int8 matrices are never upcast in full
+_SCORE_BLOCK_ROWS = 65536
+
+
+class _Partition:
+    """Read-only view over one file's memory-mapped embedding matrix."""
+
+    def __init__(self, path: Path):
+        self.mtime = (path / "meta.json").stat().st_mtime_ns
+        meta = json.loads((path / "meta.json").read_text(encoding="utf-8"))
+        self.count: int = meta["count"]
+        self.dim: int = meta["dim"]
+        self.dtype: str = meta["dtype"]
+
+        self.vectors = np.memmap(
+            path / "vectors.bin", dtype=self.dtype, mode="r", shape=(self.count, self.dim)
+        )
+        self.scales = None
+        if self.dtype == "int8":
+            self.scales = np.memmap(path / "scales.bin", dtype="float32", mode="r", shape=(self.count,))
+
+        with open(path / "docs.jsonl", encoding="utf-8") as f:
+            self.docs = [json.loads(line) for _, line in zip(range(self.count), f)]
+
+    def scores(self, query: np.ndarray) -> np.ndarray:
+        """Return the cosine similarity of every row against a normalised query."""
+        out = np.empty(self.count, dtype=np.float32)
+        for start in range(0, self.count, _SCORE_BLOCK_ROWS):
+            end = min(start + _SCORE_BLOCK_ROWS, self.count)
+            block = self.vectors[start:end]
+            if self.scales is not None:
+                out[start:end] = (block.astype(np.float32) @ query) * self.scales[start:end]
+            else:
+                out[start:end] = block @ query
+        return out
+
+
+class LocalVectorStore(VectorStore):
+    """LangChain vector store that keeps embeddings in local memory-mapped files.
+
+    Supports the same `filter={"file_id": ...}` semantics used with Pinecone
+    (plain value, `{"$eq": value}` or `{"$in": [...]}`). Searches without a
+    filter scan every partition.
+    """
+
+    def __init__(self, embedding: Embeddings, path: str | Path, quantize: bool = False):
+        self._embedding = embedding
+        self._path = Path(path)
+        self._path.mkdir(parents=True, exist_ok=True)
+        self._dtype = "int8" if quantize else "float32"
+        self._partitions: Dict[str, _Partition] = {}
+        # ids stored per partition, with the meta.json mtime they were read at
+        self._ids: Dict[str, Tuple[int, set]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self._embedding
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: List[str],
+        embedding: Embeddings,
+        metadatas: Optional[List[dict]] = None,
+        *,
+        path: str | Path = "data/vector_store",
+        quantize: bool = False,
+        **kwargs: Any,
+    ) -> "LocalVectorStore":
+        store = cls(embedding, path=path, quantize=quantize)
+        store.add_texts(texts, metadatas=metadatas, **kwargs)
+        return store
+
+    # writes
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[List[dict]] = None,
+        *,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        """Embed texts and append them to their `file_id` partitions.
+
+        Rows whose id is already stored in their partition are skipped, so
+        re-indexing a file with the same chunk ids (e.g. a retried ingestion
+        job) does not duplicate it.
+        """
+        texts = list(texts)
+        if not texts:
+            return []
+
+        metadatas = metadatas or [{} for _ in texts]
+        ids = ids or [str(uuid.uuid4()) for _ in texts]
+
+        # group rows by partition so each file is appended in one write
+        groups: Dict[str, List[int]] = {}
+        for idx, metadata in enumerate(metadatas):
+            groups.setdefault(self._partition_name(metadata.get("file_id")), []).append(idx)
+
+        with self._lock:
+            for name in list(groups):
+                stored = self._stored_ids(name)
+                if stored:
+                    groups[name] = [i for i in groups[name] if ids[i] not in stored]
+                if not groups[name]:
+                    del groups[name]
+
+            # only rows that are actually written get embedded
+            pending = sorted(i for rows in groups.values() for i in rows)
+            if not pending:
+                return ids
+            embedded = self._normalize(
+                np.asarray(self._embedding.embed_documents([texts[i] for i in pending]), dtype=np.float32)
+            )
+            vectors = np.empty((len(texts), embedded.shape[1]), dtype=np.float32)
+            vectors[pending] = embedded
+
+            for name, rows in groups.items():
+                docs = [
+                    {"id": ids[i], "page_content": texts[i], "metadata": metadatas[i]}
+                    for i in rows
+                ]
+                stored = self._stored_ids(name)
+                previous_count = self._append(name, vectors[rows], docs)
+                self._partitions.pop(name, None)
+
+                if previous_count == len(stored):
+                    # nobody else appended since the ids were read, so extend them in place
+                    stored.update(doc["id"] for doc in docs)
+                    self._ids[name] = ((self._path / name / "meta.json").stat().st_mtime_ns, stored)
+                else:
+                    self._ids.pop(name, None)
+
+        return ids
+
+    def delete_file(self, file_id: str) -> bool:
+        """Drop every chunk indexed for a file. Returns False if nothing was stored."""
+        name = self._partition_name(file_id)
+        with self._lock:
+            self._partitions.pop(name, None)
+            self._ids.pop(name, None)
+            target = self._path / name
+            if not target.exists():
+                return False
+            shutil.rmtree(target)
+            return True
+
+    # reads
+    def similarity_search(
+        self, query: str, k: int = 4, filter: Optional[Dict[str, Any]] = None, **kwargs: Any
+    ) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k=k, filter=filter)]
+
+    def similarity_search_with_score(
+        self, query: str, k: int = 4, filter: Optional[Dict[str, Any]] = None, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        query_vector = np.asarray(self._embedding.embed_query(query), dtype=np.float32)
+        return self.similarity_search_by_vector_with_score(query_vector, k=k, filter=filter)
+
+    def similarity_search_by_vector(
+        self, embedding: List[float], k: int = 4, filter: Optional[Dict[str, Any]] = None, **kwargs: Any
+    ) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_by_vector_with_score(embedding, k=k, filter=filter)]
+
+    def similarity_search_by_vector_with_score(
+        self, embedding: List[float] | np.ndarray, k: int = 4, filter: Optional[Dict[str, Any]] = None
+    ) -> List[Tuple[Document, float]]:
+        """Return the top-k chunks by cosine similarity to an embedding vector."""
+        query_vector = self._normalize(np.asarray(embedding, dtype=np.float32).reshape(1, -1))[0]
+
+        candidates: List[Tuple[float, dict]] = []
+        for partition in self._load_partitions(self._resolve_filter(filter)):
+            if partition.count == 0:
+                continue
+            scores = partition.scores(query_vector)
+            top = min(k, partition.count)
+            best = np.argpartition(-scores, top - 1)[:top]
+            candidates.extend((float(scores[i]), partition.docs[i]) for i in best)
+
+        candidates.sort(key=lambda item: item[0], reverse=True)
+        return [
+            (Document(id=doc["id"], page_content=doc["page_content"], metadata=doc["metadata"]), score)
+            for score, doc in candidates[:k]
+        ]
+
+    def _select_relevance_score_fn(self):
+        # cosine similarity of normalised vectors, mapped into [0, 1]
+        return lambda score: (score + 1.0) / 2.0
+
+    # helpers
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    @staticmethod
+    def _partition_name(file_id: Optional[str]) -> str:
+        if not file_id:
+            return _UNSCOPED_PARTITION
+        # file ids are uuids today; guard against path traversal anyway
+        return str(file_id).replace("/", "_").replace("\\", "_").replace("..", "_")
+
+    def _resolve_filter(self, filter: Optional[Dict[str, Any]]) -> Optional[List[str]]:
+        """Translate a Pinecone-style metadata filter into partition names.
+
+        Returns None when every partition must be searched.
+        """
+        if not filter:
+            return None
+
+        unsupported = set(filter) - {"file_id"}
+        if unsupported:
+            raise ValueError(f"LocalVectorStore only supports filtering on file_id, got: {sorted(unsupported)}")
+
+        condition = filter["file_id"]
+        if isinstance(condition, dict):
+            if "$eq" in condition:
+                return [self._partition_name(condition["$eq"])]
+            if "$in" in condition:
+                return [self._partition_name(value) for value in condition["$in"]]
+            raise ValueError(f"Unsupported file_id filter operator: {sorted(condition)}")
+        return [self._partition_name(condition)]
+
+    def _load_partitions(self, names: Optional[List[str]]) -> List[_Partition]:
+        if names is None:
+            names = [p.name for p in self._path.iterdir() if (p / "meta.json").exists()]
+
+        partitions = []
+        for name in names:
+            meta_path = self._path / name / "meta.json"
+
+            with self._lock:
+                try:
+                    mtime = meta_path.stat().st_mtime_ns
+                except FileNotFoundError:
+                    continue
+
+                # reload when another process (e.g. an ingestion worker) appended rows
+                partition = self._partitions.get(name)
+                if partition is None or partition.mtime != mtime:
+                    partition = _Partition(self._path / name)
+                    self._partitions[name] = partition
+            partitions.append(partition)
+        return partitions
+
+    def _stored_ids(self, name: str) -> set:
+        """Ids of the rows already written to a partition. Call with `self._lock` held.
+
+        docs.jsonl is only read again when meta.json's mtime has changed, so
+        rows appended by other writers are still seen.
+        """
+        target = self._path / name
+        meta_path = target / "meta.json"
+        try:
+            mtime = meta_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            self._ids.pop(name, None)
+            return set()
+
+        cached = self._ids.get(name)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+        count = json.loads(meta_path.read_text(encoding="utf-8"))["count"]
+        with open(target / "docs.jsonl", encoding="utf-8") as f:
+            stored = {json.loads(line)["id"] for _, line in zip(range(count), f)}
+        self._ids[name] = (mtime, stored)
+        return stored
+
+    def _append(self, name: str, vectors: np.ndarray, docs: List[dict]) -> int:
+        """Append rows to a partition's files and bump its row count.
+
+        Returns:
+            The partition's row count before the append.
+        """
+        target = self._path / name
+        target.mkdir(parents=True, exist_ok=True)
+        meta_path = target / "meta.json"
+
+        if meta_path.exists():
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            if meta["dim"] != vectors.shape[1]:
+                raise ValueError(
+                    f"Embedding dimension {vectors.shape[1]} does not match partition '{name}' ({meta['dim']})"
+                )
+        else:
+            meta = {"dim": int(vectors.shape[1]), "dtype": self._dtype, "count": 0}
+
+        if meta["dtype"] == "int8":
+            # symmetric per-row quantisation: row ~= int8_row * scale
+            scales = np.abs(vectors).max(axis=1) / 127.0
+            scales[scales == 0] = 1.0
+            quantized = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+            with open(target / "vectors.bin", "ab") as f:
+                f.write(quantized.tobytes())
+            with open(target / "scales.bin", "ab") as f:
+                f.write(scales.astype(np.float32).tobytes())
+        else:
+            with open(target / "vectors.bin", "ab") as f:
+                f.write(vectors.astype(np.float32).tobytes())
+
+        with open(target / "docs.jsonl", "a", encoding="utf-8") as f:
+            for doc in docs:
+                f.write(json.dumps(doc, default=str) + "\n")
+
+        # meta.json is written last so readers never see rows that are not fully on disk
+        previous_count = meta["count"]
+        meta["count"] += len(docs)
+        tmp_path = target / "meta.json.tmp"
+        tmp_path.write_text(json.dumps(meta), encoding="utf-8")
+        tmp_path.replace(meta_path)
+        return previous_count
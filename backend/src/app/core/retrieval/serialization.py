@@ -1,9 +1,13 @@
 """Utilities for serializing retrieved document chunks."""
 
+import re
 from typing import List
 
 from langchain_core.documents import Document
 
+# Matches the "Chunk N (page=X):" header line written for each chunk
+CHUNK_HEADER_PATTERN = re.compile(r"(?m)^Chunk \d+ \(page=[^)\n]*\):$")
+
 def serialize_chunks(docs: List[Document]) -> str:
     """Serialize a list of Document objects into a formatted CONTEXT string.
 
@@ -22,8 +26,13 @@ def serialize_chunks(docs: List[Document]) -> str:
     context_parts = []
 
     for idx, doc in enumerate(docs, start=1):
-        # get the page number of the documnet
-        page_num = doc.metadata.get("page") or doc.metadata.get("page_number", "unknown")
+        # get the page number of the documnet (1-based page_number, else the raw page)
+        page_num = doc.metadata.get("page_number")
+        if page_num is None:
+            page_num = doc.metadata.get("page", "unknown")
+        if isinstance(page_num, float) and page_num.is_integer():
+            # Pinecone returns numeric metadata as floats
+            page_num = int(page_num)
 
         # Format chunk with index and page number
         chunk_header = f"Chunk {idx} (page={page_num}):"
@@ -31,4 +40,23 @@ def serialize_chunks(docs: List[Document]) -> str:
 
         context_parts.append(f"{chunk_header}\n{chunk_content}")
 
-    return "\n\n".join(context_parts)    
\ No newline at end of file
+    return "\n\n".join(context_parts)
+
+
+def count_serialized_chunks(context: str | None) -> int:
+    """Count the chunks in a CONTEXT string produced by `serialize_chunks`."""
+    if not context:
+        return 0
+    return len(CHUNK_HEADER_PATTERN.findall(context))
+
+
+def split_serialized_chunks(context: str | None) -> List[str]:
+    """Split a CONTEXT string produced by `serialize_chunks` into its chunks (header included), in rank order."""
+    if not context:
+        return []
+    starts = [match.start() for match in CHUNK_HEADER_PATTERN.finditer(context)]
+    if not starts:
+        return [context]
+    # text before the first header (if any) stays with the first chunk
+    starts[0] = 0
+    return [context[start:end].strip() for start, end in zip(starts, starts[1:] + [len(context)])]
@@ -1,43 +1,117 @@
+import asyncio
+import contextvars
+import logging
+import threading
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
 from functools import lru_cache
-from typing import List
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
 
 from pinecone import Pinecone
 from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
 from langchain_pinecone import PineconeVectorStore
 from langchain_openai import OpenAIEmbeddings
-from langchain_community.document_loaders import PyPDFLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
 from ..config import get_settings
+from ..tracing import traced
+from ..llm.factory import get_http_client, get_async_http_client
+from ..llm.fake import HashEmbeddings
+from ..cache.embedding_cache import CachedEmbeddings, PostgresEmbeddingStore
+from ..cache.answer_cache import invalidate_cached_answers
+from .local_store import LocalVectorStore
+from .lexical_store import get_chunk_store
+from .fusion import reciprocal_rank_fusion
+from .centroids import CentroidAccumulator, get_centroid_store
+
+logger = logging.getLogger(__name__)
+
+_lexical_executor: Optional[ThreadPoolExecutor] = None
+_lexical_executor_lock = threading.Lock()
+
+# embeddings
+@lru_cache(maxsize=1)
+def _get_embeddings() -> Embeddings:
+    """Create the embeddings model shared by every vector store backend.
+
+    - "openai": OpenAI embeddings (`openai_embedding_model_name`)
+    - "fake": offline HashEmbeddings (`fake_embedding_dimensions`)
+
+    When `embedding_cache_enabled` is set, the model is wrapped in a content-hash
+    cache so repeated chunks and questions are not re-embedded.
+    """
+    settings = get_settings()
+    provider = settings.embedding_provider.lower()
+
+    if provider == "fake":
+        embeddings = HashEmbeddings(
+            dimensions=settings.fake_embedding_dimensions,
+            latency_ms=settings.fake_embedding_latency_ms
+        )
+        # keep fake vectors apart from real ones in the shared cache
+        model_name = f"fake-hash-{settings.fake_embedding_dimensions}"
+    elif provider == "openai":
+        embeddings = OpenAIEmbeddings(
+            model=settings.openai_embedding_model_name,
+            api_key=settings.openai_api_key,
+            max_retries=settings.openai_max_retries,
+            http_client=get_http_client(),
+            http_async_client=get_async_http_client()
+        )
+        model_name = settings.openai_embedding_model_name
+    else:
+        raise ValueError(f"Unknown embedding_provider: {settings.embedding_provider}")
+
+    if not settings.embedding_cache_enabled:
+        return embeddings
+
+    return CachedEmbeddings(
+        underlying=embeddings,
+        model_name=model_name,
+        max_entries=settings.embedding_cache_max_entries,
+        store=PostgresEmbeddingStore() if settings.embedding_cache_persistent else None
+    )
 
 # vector store 
 @lru_cache(maxsize=1)
-def _get_vector_store() -> PineconeVectorStore:
-    """Create a PineconeVectorStore instance configured from settings."""
+def _get_vector_store() -> VectorStore:
+    """Create the vector store configured by `settings.vector_store_backend`.
+
+    - "pinecone": managed Pinecone index (default)
+    - "local": in-process LocalVectorStore backed by memory-mapped files
+    """
     settings = get_settings()
+    backend = settings.vector_store_backend.lower()
+
+    if backend == "local":
+        return LocalVectorStore(
+            embedding=_get_embeddings(),
+            path=settings.local_vector_store_path,
+            quantize=settings.local_vector_store_quantize
+        )
+
+    if backend != "pinecone":
+        raise ValueError(f"Unknown vector_store_backend: {settings.vector_store_backend}")
 
     pc = Pinecone(api_key=settings.pinecone_api_key)
     index = pc.Index(settings.pinecone_index_name)
 
-    embeddings = OpenAIEmbeddings(
-        model=settings.openai_embedding_model_name,
-        api_key=settings.openai_api_key
-    )
-
     # return the vetcor store 
     return PineconeVectorStore(
         index=index,
-        embedding=embeddings
+        embedding=_get_embeddings()
     )
 
 def get_retriever(k: int | None = None):
-    """Get a Pinecone retriever instance.
+    """Get a retriever instance for the configured vector store.
 
     Args:
         k: Number of documents to retrieve (defaults to config value).
 
     Returns:
-        PineconeVectorStore instance configured as a retriever.
+        Vector store instance configured as a retriever.
     """
 
     settings = get_settings()
@@ -48,18 +122,100 @@ def get_retriever(k: int | None = None):
     return vector_store.as_retriever(search_kwargs={"k": k})    
 
 
-def retrieve(query: str, k:int | None = None, file_id: str | None = None) -> List[Document]:
-    """Retrieve documents from Pinecone for a given query.
+@traced("retrieve", "retrieval")
+def retrieve(query: str, k:int | None = None, file_id: str | None = None, search_mode: str | None = None) -> List[Document]:
+    """Retrieve documents from the vector store for a given query.
+
+    In "hybrid" search mode the full-text query runs on a background thread
+    while the vector query runs here, and the two rankings are merged with
+    reciprocal rank fusion.
+
+    Args:
+        query: Search query string.
+        k: Number of documents to retrieve (defaults to config value).
+        file_id: Optional file_id to filter results to a specific uploaded file.
+        search_mode: "dense" or "hybrid" (defaults to `settings.retrieval_search_mode`).
+
+    Returns:
+        List of Document objects with metadata (including page numbers).
+    """
+
+    settings = get_settings()
+    if k is None:
+        k = settings.retrieval_k
+
+    if _resolve_search_mode(search_mode) == "dense":
+        return _get_filtered_retriever(k, file_id).invoke(query)
+
+    candidates = max(k, settings.hybrid_candidates)
+    # run in a copy of this context so the full-text search is traced under this retrieval
+    lexical = _get_lexical_executor().submit(contextvars.copy_context().run, get_chunk_store().search, query, candidates, file_id)
+    dense = _get_filtered_retriever(candidates, file_id).invoke(query)
+    return reciprocal_rank_fusion([dense, _lexical_results(lexical)], k, settings.hybrid_rrf_k)
+
+
+@traced("retrieve", "retrieval")
+async def aretrieve(query: str, k: int | None = None, file_id: str | None = None, search_mode: str | None = None) -> List[Document]:
+    """Async counterpart of `retrieve()` for use on the event loop.
 
     Args:
         query: Search query string.
         k: Number of documents to retrieve (defaults to config value).
         file_id: Optional file_id to filter results to a specific uploaded file.
+        search_mode: "dense" or "hybrid" (defaults to `settings.retrieval_search_mode`).
 
     Returns:
         List of Document objects with metadata (including page numbers).
     """
 
+    settings = get_settings()
+    if k is None:
+        k = settings.retrieval_k
+
+    if _resolve_search_mode(search_mode) == "dense":
+        return await _get_filtered_retriever(k, file_id).ainvoke(query)
+
+    candidates = max(k, settings.hybrid_candidates)
+    dense, lexical = await asyncio.gather(
+        _get_filtered_retriever(candidates, file_id).ainvoke(query),
+        get_chunk_store().asearch(query, candidates, file_id),
+        return_exceptions=True
+    )
+    if isinstance(dense, BaseException):
+        raise dense
+    if isinstance(lexical, BaseException):
+        logger.warning("Lexical search failed, using dense results only: %s", lexical)
+        lexical = []
+    return reciprocal_rank_fusion([dense, lexical], k, settings.hybrid_rrf_k)
+
+
+def _resolve_search_mode(search_mode: str | None) -> str:
+    mode = (search_mode or get_settings().retrieval_search_mode).lower()
+    if mode not in ("dense", "hybrid"):
+        raise ValueError(f"Unknown retrieval_search_mode: {mode}")
+    return mode
+
+
+def _get_lexical_executor() -> ThreadPoolExecutor:
+    """Threads for the full-text half of sync hybrid searches (psycopg releases the GIL)."""
+    global _lexical_executor
+    with _lexical_executor_lock:
+        if _lexical_executor is None:
+            _lexical_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="lexical-search")
+        return _lexical_executor
+
+
+def _lexical_results(future: Future) -> List[Document]:
+    """Lexical results, or none if the full-text query failed (hybrid degrades to dense)."""
+    try:
+        return future.result()
+    except Exception as e:
+        logger.warning("Lexical search failed, using dense results only: %s", e)
+        return []
+
+
+def _get_filtered_retriever(k: int | None, file_id: str | None):
+    """Build a retriever for the top-k chunks, optionally scoped to one file."""
     settings = get_settings()
     if k is None:
         k = settings.retrieval_k
@@ -68,20 +224,67 @@ def retrieve(query: str, k:int | None = None, file_id: str | None = None) -> Lis
 
     # get the relavangt documnets according to the query (filter chunks by file metadata)
     if file_id:
-        retriever = vector_store.as_retriever(search_kwargs={
+        return vector_store.as_retriever(search_kwargs={
             "k" : k,
             "filter" : {"file_id": file_id}
             }
         )
-    else:
-        retriever = vector_store.as_retriever(search_kwargs={"k": k})    
-
-    return retriever.invoke(query)
+    return vector_store.as_retriever(search_kwargs={"k": k})
 
 
 # index documents
-def index_documents(docs,file_id: str = None, filename: str = None) -> int:
-    """Index a list of Document objects into the Pinecone vector store.
+def index_documents(docs: Iterable[Document], file_id: str = None, filename: str = None, on_progress: Optional[Callable[[int, int], None]] = None) -> int:
+    """Index Document objects into the configured vector store, one batch at a time.
+
+    Documents (typically one per PDF page) are consumed lazily: each is split
+    into chunks, and every `settings.ingestion_batch_size` chunks are embedded
+    and upserted together (and written to the full-text chunk table when
+    `settings.lexical_index_enabled` is set). Only one batch of chunks is held
+    in memory, so a generator of pages can be indexed regardless of document
+    size. When the scope gate is enabled, the file's embedding centroid is
+    accumulated along the way and saved at the end.
+
+    Args:
+        docs: Documents (or a generator of documents) to embed and upsert.
+        file_id: Unique identifier for the source file (for filtering).
+        filename: Original filename for reference.
+        on_progress: Optional callable receiving (documents_processed, chunks_indexed)
+            after every upserted batch.
+
+    Returns:
+        The number of chunks indexed.
+    """
+
+    vector_store = _get_vector_store()
+    lexical_index = get_settings().lexical_index_enabled
+    centroid = _centroid_accumulator(file_id)
+    docs_processed = 0
+    chunks_indexed = 0
+
+    # cached answers for this file may cite chunks that are about to change
+    invalidate_cached_answers(file_id)
+
+    for docs_processed, batch in _chunk_batches(docs, file_id=file_id, filename=filename):
+        if batch:
+            if centroid is not None:
+                # embedded first, so the vector store's own embedding call is served by the embedding cache
+                centroid.add(_get_embeddings().embed_documents([doc.page_content for doc in batch]))
+            vector_store.add_documents(batch, ids=[doc.id for doc in batch])
+            if lexical_index:
+                get_chunk_store().add_chunks(batch)
+            chunks_indexed += len(batch)
+        if on_progress:
+            on_progress(docs_processed, chunks_indexed)
+
+    if centroid is not None:
+        get_centroid_store().save(file_id, centroid)
+
+    invalidate_cached_answers(file_id)
+    return chunks_indexed
+
+
+async def aindex_documents(docs: Iterable[Document], file_id: str = None, filename: str = None) -> int:
+    """Async counterpart of `index_documents()`.
 
     Args:
         docs: Documents to embed and upsert into the vector index.
@@ -89,21 +292,110 @@ def index_documents(docs,file_id: str = None, filename: str = None) -> int:
         filename: Original filename for reference.
 
     Returns:
-        The number of documents indexed.
+        The number of chunks indexed.
+    """
+
+    vector_store = _get_vector_store()
+    lexical_index = get_settings().lexical_index_enabled
+    centroid = _centroid_accumulator(file_id)
+    chunks_indexed = 0
+
+    invalidate_cached_answers(file_id)
+    for _, batch in _chunk_batches(docs, file_id=file_id, filename=filename):
+        if batch:
+            if centroid is not None:
+                centroid.add(await _get_embeddings().aembed_documents([doc.page_content for doc in batch]))
+            await vector_store.aadd_documents(batch, ids=[doc.id for doc in batch])
+            if lexical_index:
+                await asyncio.to_thread(get_chunk_store().add_chunks, batch)
+            chunks_indexed += len(batch)
+
+    if centroid is not None:
+        await asyncio.to_thread(get_centroid_store().save, file_id, centroid)
+
+    invalidate_cached_answers(file_id)
+    return chunks_indexed
+
+
+def _centroid_accumulator(file_id: str | None) -> CentroidAccumulator | None:
+    """A centroid accumulator for the file, if the scope gate needs one."""
+    if file_id and get_settings().scope_gate_enabled:
+        return CentroidAccumulator()
+    return None
+
+
+def best_match_score(query_vector: List[float], file_id: str | None = None) -> float | None:
+    """Return the similarity score of the closest chunk to an embedded query.
+
+    Args:
+        query_vector: The query's embedding.
+        file_id: Optional file_id to restrict the search to one uploaded file.
+
+    Returns:
+        The vector store's score for the best match (cosine similarity for the
+        local store and cosine Pinecone indexes), or None if nothing matched.
+    """
+
+    kwargs = {"filter": {"file_id": file_id}} if file_id else {}
+    results = _get_vector_store().similarity_search_by_vector_with_score(query_vector, k=1, **kwargs)
+    return float(results[0][1]) if results else None
+
+
+def _chunk_batches(docs: Iterable[Document], file_id: str = None, filename: str = None) -> Iterator[Tuple[int, List[Document]]]:
+    """Split documents lazily and yield (documents_processed, chunk batch) pairs.
+
+    The last batch may be smaller than `settings.ingestion_batch_size` (or empty
+    when the chunks divide evenly).
+    """
+
+    batch_size = max(1, get_settings().ingestion_batch_size)
+    batch: List[Document] = []
+    docs_processed = 0
+
+    for doc in docs:
+        batch.extend(_split_documents([doc], file_id=file_id, filename=filename, position=docs_processed))
+        docs_processed += 1
+
+        while len(batch) >= batch_size:
+            yield docs_processed, batch[:batch_size]
+            batch = batch[batch_size:]
+
+    yield docs_processed, batch
+
+
+def _split_documents(docs, file_id: str = None, filename: str = None, position: int = 0) -> List[Document]:
+    """Split documents into chunks and tag them with file and page metadata.
+
+    Chunks of a file get ids derived from (file_id, document position, chunk
+    index), so indexing the same file again (e.g. a retried ingestion job)
+    overwrites its earlier chunks instead of adding duplicates. `position` is
+    the index of the first document in `docs` within the file.
     """
 
     # split the documnet 
     text_splitter = RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=50)
-    texts = text_splitter.split_documents(docs)
+    texts = []
+    for offset, source in enumerate(docs):
+        chunks = text_splitter.split_documents([source])
+        for chunk_index, doc in enumerate(chunks):
+            # the same id is used in the vector store and the full-text chunk table
+            if file_id:
+                doc.id = str(uuid.uuid5(uuid.NAMESPACE_URL, f"{file_id}:{position + offset}:{chunk_index}"))
+            else:
+                doc.id = str(uuid.uuid4())
+        texts.extend(chunks)
 
-    # add meta data to each chunk 
-    if file_id:
-        for doc in texts:
+    for doc in texts:
+
+        # PyPDFLoader pages are 0-based; keep a 1-based page number for display
+        page = doc.metadata.get("page")
+        if isinstance(page, int) and "page_number" not in doc.metadata:
+            doc.metadata["page_number"] = page + 1
+
+        # add meta data to each chunk 
+        if file_id:
             doc.metadata["file_id"] = file_id
             if filename:
                 doc.metadata["filename"] = filename
 
-    # add chunks to the vector store 
-    vector_store = _get_vector_store()
-    vector_store.add_documents(texts)
-    return len(texts)
\ No newline at end of file
+    return texts
@@ -0,0 +1,375 @@
+"""Per-request tracing with stage latency, token and cache accounting.
+
+Spans are opened with `span()` (or the `traced()` decorator) around requests,
+graph nodes, retrieval, embedding, cache and database calls. The current span
+is kept in a context variable, so nested calls become child spans of the same
+trace. Calls that run in LangGraph tasks or LangChain executors keep their
+parent span too, because those copy the context.
+
+LLM calls are traced by `TracingCallbackHandler`, which every chat model
+created by the LLM factory carries. It records wall time, prompt and
+completion tokens, and whether the response came from the LLM cache.
+
+Finished spans are:
+- exported to an in-memory ring buffer (`tracing_exporter="memory"`, see
+  `recent_spans()`) or appended to a JSONL file (`tracing_exporter="jsonl"`);
+- aggregated in-process into latency histograms and token/cache counters,
+  served in Prometheus text format by `render_prometheus()` (`/metrics`).
+"""
+
+import functools
+import inspect
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+
+from .config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# latency histogram buckets (seconds)
+_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+@dataclass
+class Span:
+    """One timed operation of a trace."""
+
+    name: str
+    kind: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str]
+    start: float
+    duration_ms: float = 0.0
+    status: str = "ok"
+    attributes: Dict[str, Any] = field(default_factory=dict)
+
+    def set(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+    def add(self, key: str, amount: float = 1) -> None:
+        """Increment a numeric attribute (e.g. cache_hits)."""
+        self.attributes[key] = self.attributes.get(key, 0) + amount
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+def current_span() -> Optional[Span]:
+    """Return the innermost open span of the current context (None outside a trace)."""
+    return _current_span.get()
+
+
+def _new_span(name: str, kind: str, parent: Optional[Span], attributes: Dict[str, Any]) -> Span:
+    return Span(
+        name=name,
+        kind=kind,
+        trace_id=parent.trace_id if parent else uuid.uuid4().hex,
+        span_id=uuid.uuid4().hex[:16],
+        parent_id=parent.span_id if parent else None,
+        start=time.time(),
+        attributes=attributes,
+    )
+
+
+@contextmanager
+def span(name: str, kind: str = "internal", **attributes: Any) -> Iterator[Optional[Span]]:
+    """Trace the enclosed block as a span (a child of the current span, if any).
+
+    Args:
+        name: Span name (e.g. the node or function name).
+        kind: Span kind: "request", "node", "retrieval", "embedding", "llm",
+            "cache", "db" or "internal".
+        **attributes: Initial span attributes.
+
+    Yields:
+        The span (None when tracing is disabled), to add attributes to.
+    """
+
+    if not get_settings().tracing_enabled:
+        yield None
+        return
+
+    parent = _current_span.get()
+    current = _new_span(name, kind, parent, attributes)
+    token = _current_span.set(current)
+    started = time.perf_counter()
+    try:
+        yield current
+    except BaseException as e:
+        current.status = "error"
+        current.attributes["error"] = type(e).__name__
+        raise
+    finally:
+        current.duration_ms = (time.perf_counter() - started) * 1000
+        try:
+            _current_span.reset(token)
+        except ValueError:
+            # a generator resumed in another context (e.g. a streaming response)
+            _current_span.set(parent)
+        get_tracer().finish(current)
+
+
+def traced(name: Optional[str] = None, kind: str = "internal") -> Callable:
+    """Decorator tracing each call of a sync or async function as a span."""
+
+    def decorator(func: Callable) -> Callable:
+        span_name = name or func.__name__
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(span_name, kind):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(span_name, kind):
+                return func(*args, **kwargs)
+        return wrapper
+
+    return decorator
+
+
+def annotate(**attributes: Any) -> None:
+    """Set attributes on the current span (no-op outside a trace or with tracing disabled)."""
+    current = _current_span.get()
+    if current is not None:
+        current.set(**attributes)
+
+
+def record_cache(hits: int, misses: int) -> None:
+    """Count cache hits and misses on the current span."""
+    current = _current_span.get()
+    if current is not None:
+        current.add("cache_hits", hits)
+        current.add("cache_misses", misses)
+
+
+class TracingCallbackHandler(BaseCallbackHandler):
+    """LangChain callback that records each chat model call as an "llm" span.
+
+    The span is a child of the span that was current when the call started
+    (usually the graph node), and carries the model name, prompt and
+    completion tokens and whether the response was served from the LLM cache.
+    """
+
+    # run in the caller's context instead of an executor
+    run_inline = True
+
+    def __init__(self):
+        self._runs: Dict[UUID, Tuple[Span, float]] = {}
+        self._lock = threading.Lock()
+
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages: List[List[Any]], *, run_id: UUID, **kwargs: Any) -> None:
+        if not get_settings().tracing_enabled:
+            return
+        params = kwargs.get("invocation_params") or {}
+        model = params.get("model_name") or params.get("model") or (serialized or {}).get("name", "llm")
+        parent = _current_span.get()
+        llm_span = _new_span(str(model), "llm", parent, {"node": parent.name if parent else None})
+        with self._lock:
+            self._runs[run_id] = (llm_span, time.perf_counter())
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        run = self._pop(run_id)
+        if run is None:
+            return
+        llm_span, started = run
+
+        prompt_tokens = completion_tokens = 0
+        cached = False
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                prompt_tokens += usage.get("input_tokens", 0)
+                completion_tokens += usage.get("output_tokens", 0)
+                # LangChain zeroes "total_cost" on responses replayed from the cache
+                cached = cached or usage.get("total_cost") == 0
+
+        if cached:
+            llm_span.set(cached=True, prompt_tokens=0, completion_tokens=0)
+        else:
+            llm_span.set(cached=False, prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+        self._finish(llm_span, started)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        run = self._pop(run_id)
+        if run is None:
+            return
+        llm_span, started = run
+        llm_span.status = "error"
+        llm_span.attributes["error"] = type(error).__name__
+        self._finish(llm_span, started)
+
+    def _pop(self, run_id: UUID) -> Optional[Tuple[Span, float]]:
+        with self._lock:
+            return self._runs.pop(run_id, None)
+
+    @staticmethod
+    def _finish(llm_span: Span, started: float) -> None:
+        llm_span.duration_ms = (time.perf_counter() - started) * 1000
+        get_tracer().finish(llm_span)
+
+
+def _labels(**labels: Any) -> str:
+    """Prometheus label set, with values escaped."""
+    parts = []
+    for key, value in labels.items():
+        text = str(value if value is not None else "").replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        parts.append(f'{key}="{text}"')
+    return "{" + ",".join(parts) + "}"
+
+
+class SpanMetrics:
+    """In-process aggregates of finished spans: latency histograms, errors, tokens and cache hits."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (kind, name) -> [bucket counts..., count, sum seconds, errors]
+        self.latency: Dict[Tuple[str, str], List[float]] = {}
+        # (model, node, type) -> tokens
+        self.tokens: Dict[Tuple[str, str, str], float] = {}
+        # (kind, name) -> [hits, misses]
+        self.cache: Dict[Tuple[str, str], List[float]] = {}
+
+    def observe(self, finished: Span) -> None:
+        seconds = finished.duration_ms / 1000
+        attributes = finished.attributes
+        with self._lock:
+            series = self.latency.setdefault((finished.kind, finished.name), [0.0] * (len(_BUCKETS) + 3))
+            for index, bound in enumerate(_BUCKETS):
+                if seconds <= bound:
+                    series[index] += 1
+            series[-3] += 1
+            series[-2] += seconds
+            if finished.status == "error":
+                series[-1] += 1
+
+            if finished.kind == "llm":
+                node = attributes.get("node") or ""
+                for token_type in ("prompt", "completion"):
+                    key = (finished.name, node, token_type)
+                    self.tokens[key] = self.tokens.get(key, 0) + attributes.get(f"{token_type}_tokens", 0)
+
+            if "cache_hits" in attributes or "cache_misses" in attributes:
+                counts = self.cache.setdefault((finished.kind, finished.name), [0.0, 0.0])
+                counts[0] += attributes.get("cache_hits", 0)
+                counts[1] += attributes.get("cache_misses", 0)
+
+    def render(self, prefix: str = "ikms") -> str:
+        """Render the aggregates in the Prometheus text exposition format."""
+        with self._lock:
+            latency = {key: list(values) for key, values in self.latency.items()}
+            tokens = dict(self.tokens)
+            cache = {key: list(values) for key, values in self.cache.items()}
+
+        lines = [
+            f"# HELP {prefix}_span_duration_seconds Wall time of traced spans.",
+            f"# TYPE {prefix}_span_duration_seconds histogram",
+        ]
+        for (kind, name), series in sorted(latency.items()):
+            for bound, count in zip(_BUCKETS, series):
+                lines.append(f"{prefix}_span_duration_seconds_bucket{_labels(kind=kind, name=name, le=bound)} {count:g}")
+            lines.append(f"{prefix}_span_duration_seconds_bucket{_labels(kind=kind, name=name, le='+Inf')} {series[-3]:g}")
+            lines.append(f"{prefix}_span_duration_seconds_sum{_labels(kind=kind, name=name)} {series[-2]:.6f}")
+            lines.append(f"{prefix}_span_duration_seconds_count{_labels(kind=kind, name=name)} {series[-3]:g}")
+
+        lines += [f"# HELP {prefix}_span_errors_total Traced spans that raised.", f"# TYPE {prefix}_span_errors_total counter"]
+        for (kind, name), series in sorted(latency.items()):
+            lines.append(f"{prefix}_span_errors_total{_labels(kind=kind, name=name)} {series[-1]:g}")
+
+        lines += [f"# HELP {prefix}_llm_tokens_total Tokens sent to and generated by chat models (cache hits excluded).", f"# TYPE {prefix}_llm_tokens_total counter"]
+        for (model, node, token_type), count in sorted(tokens.items()):
+            lines.append(f"{prefix}_llm_tokens_total{_labels(model=model, node=node, type=token_type)} {count:g}")
+
+        lines += [f"# HELP {prefix}_cache_hits_total Cache hits recorded on traced spans.", f"# TYPE {prefix}_cache_hits_total counter"]
+        for (kind, name), counts in sorted(cache.items()):
+            lines.append(f"{prefix}_cache_hits_total{_labels(kind=kind, name=name)} {counts[0]:g}")
+        lines += [f"# HELP {prefix}_cache_misses_total Cache misses recorded on traced spans.", f"# TYPE {prefix}_cache_misses_total counter"]
+        for (kind, name), counts in sorted(cache.items()):
+            lines.append(f"{prefix}_cache_misses_total{_labels(kind=kind, name=name)} {counts[1]:g}")
+
+        return "\n".join(lines) + "\n"
+
+
+class Tracer:
+    """Exports finished spans (ring buffer or JSONL file) and aggregates them into metrics.
+
+    Args:
+        exporter: "memory" (ring buffer of the last `buffer_size` spans) or
+            "jsonl" (append each span as a JSON line to `jsonl_path`).
+        buffer_size: Size of the in-memory ring buffer.
+        jsonl_path: File the "jsonl" exporter appends to.
+    """
+
+    def __init__(self, exporter: str = "memory", buffer_size: int = 2000, jsonl_path: str = "traces.jsonl"):
+        if exporter not in ("memory", "jsonl"):
+            raise ValueError(f"Unknown tracing exporter '{exporter}'. Expected 'memory' or 'jsonl'")
+
+        self.exporter = exporter
+        self.jsonl_path = jsonl_path
+        self.buffer: Deque[Span] = deque(maxlen=buffer_size)
+        self.metrics = SpanMetrics()
+        self._file_lock = threading.Lock()
+
+    def finish(self, finished: Span) -> None:
+        self.metrics.observe(finished)
+
+        if self.exporter == "memory":
+            self.buffer.append(finished)
+            return
+
+        try:
+            line = json.dumps(asdict(finished), default=str)
+            with self._file_lock:
+                with open(self.jsonl_path, "a", encoding="utf-8") as f:
+                    f.write(line + "\n")
+        except Exception as e:
+            # tracing must never fail a request
+            logger.warning("Trace export failed: %s", e)
+
+    def recent(self, limit: Optional[int] = None, trace_id: Optional[str] = None) -> List[Span]:
+        spans = [s for s in list(self.buffer) if trace_id is None or s.trace_id == trace_id]
+        return spans[-limit:] if limit else spans
+
+
+_tracer: Optional[Tracer] = None
+_tracer_lock = threading.Lock()
+
+def get_tracer() -> Tracer:
+    """Get the process-wide tracer configured from settings."""
+    global _tracer
+    if _tracer is None:
+        with _tracer_lock:
+            if _tracer is None:
+                settings = get_settings()
+                _tracer = Tracer(
+                    exporter=settings.tracing_exporter,
+                    buffer_size=settings.tracing_buffer_size,
+                    jsonl_path=settings.tracing_jsonl_path,
+                )
+    return _tracer
+
+
+def recent_spans(limit: Optional[int] = None, trace_id: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Return the most recent spans from the in-memory ring buffer, oldest first."""
+    return [asdict(s) for s in get_tracer().recent(limit, trace_id)]
+
+
+def render_prometheus() -> str:
+    """Render span aggregates in the Prometheus text exposition format."""
+    return get_tracer().metrics.render()
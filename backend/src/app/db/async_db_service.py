@@ -0,0 +1,475 @@
+"""Async database service for managing conversations in PostgreSQL.
+
+Mirrors `ConversationDatabaseService` on top of the async connection pool, so
+request handlers can await database calls instead of blocking the event loop.
+"""
+
+from typing import List, Optional, Dict, Any
+from datetime import datetime
+import json
+import psycopg
+from .connection import get_async_db_connection
+from .db_service import _ADD_TURN_QUERY, _conversation_page, _conversation_page_query, _message_page, _message_page_query
+from ..db.models import FileDB, MessageDB, MessagePage, ConversationDB, ConversationPage, TurnDB
+
+class AsyncConversationDatabaseService:
+    """Async service for managing conversations and messages in PostgreSQL."""
+
+    # make a new conversation on the db
+    async def create_conversation(self, session_id: str, metadata: Optional[Dict[str, Any]] = None, active_file_id: Optional[str] = None, user_id: Optional[str] = None) -> ConversationDB:
+        """Create a new conversation in the database.
+
+        Args:
+            session_id: Unique identifier for the conversation.
+            metadata: Optional metadata to store with the conversation.
+            active_file_id: Optional file ID to associate with the conversation.
+            user_id: User ID who owns this conversation.
+
+        Returns:
+            ConversationDB instance.
+        """
+        try:
+            async with get_async_db_connection() as connection:
+                async with connection.cursor() as cursor:
+                    await cursor.execute("""
+                        INSERT INTO conversations (session_id, metadata, active_file_id, user_id)
+                        VALUES (%s, %s, %s, %s)
+                        RETURNING session_id, created_at, updated_at, message_count, active_file_id, user_id, metadata
+                    """, (session_id, json.dumps(metadata or {}), active_file_id, user_id))
+
+                    conversation_row = await cursor.fetchone()
+                    await connection.commit()
+
+                    return ConversationDB(
+                        session_id=conversation_row["session_id"],
+                        created_at=conversation_row["created_at"],
+                        updated_at=conversation_row["updated_at"],
+                        message_count=conversation_row["message_count"],
+                        active_file_id=conversation_row["active_file_id"],
+                        user_id=conversation_row["user_id"],
+                        metadata=conversation_row["metadata"]
+                    )
+        except Exception as e:
+            raise Exception(f"Database error creating conversation: {str(e)}") from e
+
+
+    # get the conversation according to the session_id
+    async def get_conversation(self, session_id: str, include_messages: bool = False) -> Optional[ConversationDB]:
+        """Get a conversation by session ID.
+
+        Args:
+            session_id: The conversation session ID.
+            include_messages: Whether to include all messages in the conversation.
+
+        Returns:
+            ConversationDB instance or None if not found.
+        """
+        try:
+            async with get_async_db_connection() as connection:
+                async with connection.cursor() as cursor:
+                    await cursor.execute("""
+                        SELECT session_id, created_at, updated_at, message_count, active_file_id, user_id, metadata
+                        FROM conversations
+                        WHERE session_id = %s
+                    """, (session_id,))
+
+                    conversation_row = await cursor.fetchone()
+                    if not conversation_row:
+                        return None
+
+            conversation = ConversationDB(
+                session_id=conversation_row["session_id"],
+                created_at=conversation_row["created_at"],
+                updated_at=conversation_row["updated_at"],
+                message_count=conversation_row["message_count"],
+                active_file_id=conversation_row["active_file_id"],
+                user_id=conversation_row["user_id"],
+                metadata=conversation_row["metadata"]
+            )
+
+            if include_messages:
+                conversation.messages = await self.get_messages(session_id)
+
+            return conversation
+        except Exception as e:
+            raise Exception(f"Database error getting conversation: {str(e)}") from e
+
+
+    # add message to the db
+    async def add_message(
+        self,
+        session_id: str,
+        role: str,
+        content: str,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> MessageDB:
+        """Add a message to a conversation.
+
+        Args:
+            session_id: The conversation session ID.
+            role: Message role ("USER" or "Assistant").
+            content: Message content.
+            metadata: Optional message metadata.
+
+        Returns:
+            MessageDB instance.
+        """
+        try:
+            async with get_async_db_connection() as connection:
+                async with connection.cursor() as cursor:
+                    await cursor.execute("""
+                        INSERT INTO messages (session_id, role, content, metadata)
+                        VALUES (%s, %s, %s, %s)
+                        RETURNING id, session_id, role, content, timestamp, metadata
+                    """, (session_id, role, content, json.dumps(metadata or {})))
+
+                    message_row = await cursor.fetchone()
+
+                    await cursor.execute("""
+                        UPDATE conversations
+                        SET message_count = message_count + 1,
+                            updated_at = NOW()
+                        WHERE session_id = %s
+                    """, (session_id,))
+
+                    await connection.commit()
+
+                    return MessageDB(
+                        id=message_row["id"],
+                        session_id=message_row["session_id"],
+                        role=message_row["role"],
+                        content=message_row["content"],
+                        timestamp=message_row["timestamp"],
+                        metadata=message_row["metadata"]
+                    )
+        except Exception as e:
+            raise Exception(f"Database error adding message: {str(e)}") from e
+
+
+    # get a conversation and check who owns it (one query)
+    async def get_owned_conversation(self, session_id: str, user_id: str) -> ConversationDB:
+        """Load a conversation and verify that it belongs to a user.
+
+        Args:
+            session_id: The conversation session ID.
+            user_id: The user who must own the conversation.
+
+        Returns:
+            ConversationDB instance.
+
+        Raises:
+            PermissionError: If the conversation does not exist or belongs to
+                another user (callers cannot tell the two apart).
+        """
+        conversation = await self.get_conversation(session_id)
+        if not conversation or conversation.user_id != user_id:
+            raise PermissionError("You don't have access to this conversation")
+        return conversation
+
+
+    # add a full question/answer turn in one transaction
+    async def add_turn(
+        self,
+        session_id: str,
+        question: str,
+        answer: str,
+        asked_at: datetime,
+        user_metadata: Optional[Dict[str, Any]] = None,
+        assistant_metadata: Optional[Dict[str, Any]] = None
+    ) -> TurnDB:
+        """Store the user and assistant messages of a turn and bump `message_count`.
+
+        Both inserts and the counter update run as a single statement, so a
+        turn costs one round trip and is never half-written.
+
+        Args:
+            session_id: The conversation session ID.
+            question: The user's question.
+            answer: The assistant's answer.
+            asked_at: When the question was received (user message timestamp).
+            user_metadata: Optional metadata for the user message.
+            assistant_metadata: Optional metadata for the assistant message.
+
+        Returns:
+            TurnDB with both message ids and the updated message count.
+
+        Raises:
+            ValueError: If the conversation no longer exists (e.g. it was
+                deleted while the answer was being generated).
+        """
+        try:
+            async with get_async_db_connection() as connection:
+                async with connection.cursor() as cursor:
+                    await cursor.execute(_ADD_TURN_QUERY, (
+                        session_id, question, json.dumps(user_metadata or {}), asked_at,
+                        session_id, answer, json.dumps(assistant_metadata or {}),
+                        session_id,
+                    ))
+
+                    turn_row = await cursor.fetchone()
+                    if not turn_row:
+                        raise ValueError(f"Session {session_id} not found")
+
+                    await connection.commit()
+
+                    return TurnDB(
+                        user_message_id=turn_row["message_ids"][0],
+                        assistant_message_id=turn_row["message_ids"][1],
+                        message_count=turn_row["message_count"]
+                    )
+
+        except psycopg.errors.ForeignKeyViolation as e:
+            raise ValueError(f"Session {session_id} not found") from e
+        except ValueError:
+            raise
+        except Exception as e:
+            raise Exception(f"Database error adding turn: {str(e)}") from e
+
+
+    # get all the messages according to the session_id
+    async def get_messages(self, session_id: str, limit: Optional[int] = None) -> List[MessageDB]:
+        """Get the messages of a conversation.
+
+        Args:
+            session_id: The conversation session ID.
+            limit: Optional limit on number of messages to return (most recent).
+
+        Returns:
+            List of MessageDB instances ordered by timestamp.
+        """
+        return (await self.get_message_page(session_id, limit=limit)).messages
+
+
+    # get one page of messages (keyset pagination in both directions)
+    async def get_message_page(
+        self,
+        session_id: str,
+        limit: Optional[int] = None,
+        before: Optional[str] = None,
+        after: Optional[str] = None
+    ) -> MessagePage:
+        """Async counterpart of `ConversationDatabaseService.get_message_page()`."""
+        query, params, newest_first = _message_page_query(session_id, limit, before, after)
+
+        try:
+            async with get_async_db_connection() as connection:
+                async with connection.cursor() as cursor:
+                    await cursor.execute(query, params)
+                    message_rows = await cursor.fetchall()
+        except Exception as e:
+            raise Exception(f"Database error getting messages: {str(e)}") from e
+
+        return _message_page(message_rows, limit, before, after, newest_first)
+
+
+    # delete conversation
+    async def delete_conversation(self, session_id: str) -> bool:
+        """Delete a conversation and all its messages.
+
+        Args:
+            session_id: The conversation session ID.
+
+        Returns:
+            True if deleted, False if not found.
+        """
+        try:
+            async with get_async_db_connection() as connection:
+                async with connection.cursor() as cursor:
+                    await cursor.execute("""
+                        DELETE FROM conversations
+                        WHERE session_id = %s
+                    """, (session_id,))
+
+                    deleted = cursor.rowcount > 0
+                    await connection.commit()
+
+                    return deleted
+        except Exception as e:
+            raise Exception(f"Database error deleting conversation: {str(e)}") from e
+
+
+    # get list of conversations
+    async def list_conversations(self, limit: Optional[int] = None, user_id: Optional[str] = None, cursor: Optional[str] = None) -> List[ConversationDB]:
+        """List conversations, most recently updated first, optionally filtered by user.
+
+        Args:
+            limit: Optional limit on number of conversations to return.
+            user_id: Optional user ID to filter conversations.
+            cursor: Optional `next_cursor` of an earlier page: continue after it.
+
+        Returns:
+            List of ConversationDB instances (without metadata).
+        """
+        return (await self.list_conversation_page(limit=limit, user_id=user_id, cursor=cursor)).conversations
+
+
+    # get one page of conversations (keyset pagination)
+    async def list_conversation_page(self, limit: Optional[int] = None, user_id: Optional[str] = None, cursor: Optional[str] = None) -> ConversationPage:
+        """Async counterpart of `ConversationDatabaseService.list_conversation_page()`."""
+        query, params = _conversation_page_query(limit, user_id, cursor)
+
+        try:
+            async with get_async_db_connection() as connection:
+                async with connection.cursor() as db_cursor:
+                    await db_cursor.execute(query, params if params else None)
+                    conversations_rows = await db_cursor.fetchall()
+        except Exception as e:
+            raise Exception(f"Database error listing conversations: {str(e)}") from e
+
+        return _conversation_page(conversations_rows, limit)
+
+
+    # create file details
+    async def create_file_record(self, file_id: str, filename: str, file_path: str, user_id: Optional[str] = None, metadata: Optional[Dict[str, Any]] = None) -> FileDB:
+        """Create a file record in the database.
+
+        Args:
+            file_id: Unique identifier for the file.
+            filename: Original filename.
+            file_path: Path where the file is stored.
+            user_id: User ID who uploaded the file.
+            metadata: Optional metadata.
+
+        Returns:
+            FileDB instance.
+        """
+        try:
+            async with get_async_db_connection() as connection:
+                async with connection.cursor() as cursor:
+                    await cursor.execute("""
+                        INSERT INTO files (file_id, filename, file_path, user_id, metadata)
+                        VALUES (%s, %s, %s, %s, %s)
+                        RETURNING file_id, filename, file_path, user_id, uploaded_at, metadata
+                    """, (file_id, filename, file_path, user_id, json.dumps(metadata or {})))
+
+                    file_row = await cursor.fetchone()
+                    await connection.commit()
+
+                    return FileDB(
+                        file_id=file_row["file_id"],
+                        filename=file_row["filename"],
+                        file_path=file_row["file_path"],
+                        user_id=file_row["user_id"],
+                        uploaded_at=file_row["uploaded_at"],
+                        metadata=file_row["metadata"]
+                    )
+        except Exception as e:
+            raise Exception(f"Database error creating file record: {str(e)}") from e
+
+
+    # get file record details
+    async def get_file_record(self, file_id: str) -> Optional[FileDB]:
+        """Get a file record by file_id.
+
+        Args:
+            file_id: The file identifier.
+
+        Returns:
+            FileDB instance or None if not found.
+        """
+        try:
+            async with get_async_db_connection() as connection:
+                async with connection.cursor() as cursor:
+                    await cursor.execute("""
+                        SELECT file_id, filename, file_path, user_id, uploaded_at, metadata
+                        FROM files
+                        WHERE file_id = %s
+                    """, (file_id,))
+
+                    file_row = await cursor.fetchone()
+                    if not file_row:
+                        return None
+
+                    return FileDB(
+                        file_id=file_row["file_id"],
+                        filename=file_row["filename"],
+                        file_path=file_row["file_path"],
+                        user_id=file_row["user_id"],
+                        uploaded_at=file_row["uploaded_at"],
+                        metadata=file_row["metadata"]
+                    )
+        except Exception as e:
+            raise Exception(f"Database error getting file record: {str(e)}") from e
+
+
+    # set conversation active file
+    async def set_conversation_file(self, session_id: str, file_id: str) -> bool:
+        """Associate a file with a conversation.
+
+        Args:
+            session_id: The conversation session ID.
+            file_id: The file to associate with the conversation.
+
+        Returns:
+            True if updated successfully.
+        """
+        try:
+            async with get_async_db_connection() as connection:
+                async with connection.cursor() as cursor:
+                    await cursor.execute("""
+                        UPDATE conversations
+                        SET active_file_id = %s
+                        WHERE session_id = %s
+                    """, (file_id, session_id))
+
+                    await connection.commit()
+                    return cursor.rowcount > 0
+        except Exception as e:
+            raise Exception(f"Database error setting conversation file: {str(e)}") from e
+
+
+    async def list_files(self, limit: Optional[int] = None, user_id: Optional[str] = None) -> List[FileDB]:
+        """List all uploaded files, optionally filtered by user.
+
+        Args:
+            limit: Optional limit on number of files to return.
+            user_id: Optional user ID to filter files.
+
+        Returns:
+            List of FileDB instances ordered by upload date (newest first).
+        """
+        try:
+            async with get_async_db_connection() as connection:
+                async with connection.cursor() as cursor:
+                    query = """
+                        SELECT file_id, filename, file_path, user_id, uploaded_at, metadata
+                        FROM files
+                    """
+
+                    params = []
+                    if user_id:
+                        query += " WHERE user_id = %s"
+                        params.append(user_id)
+
+                    query += " ORDER BY uploaded_at DESC"
+
+                    if limit:
+                        query += " LIMIT %s"
+                        params.append(limit)
+
+                    await cursor.execute(query, params if params else None)
+                    file_rows = await cursor.fetchall()
+
+                    return [
+                        FileDB(
+                            file_id=row["file_id"],
+                            filename=row["filename"],
+                            file_path=row["file_path"],
+                            user_id=row["user_id"],
+                            uploaded_at=row["uploaded_at"],
+                            metadata=row["metadata"]
+                        )
+                        for row in file_rows
+                    ]
+        except Exception as e:
+            raise Exception(f"Database error listing files: {str(e)}") from e
+
+
+# singleton instance
+_async_db_service: Optional[AsyncConversationDatabaseService] = None
+
+def get_async_conversation_db_service() -> AsyncConversationDatabaseService:
+    global _async_db_service
+    if _async_db_service is None:
+        _async_db_service = AsyncConversationDatabaseService()
+    return _async_db_service
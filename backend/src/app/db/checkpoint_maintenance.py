@@ -0,0 +1,309 @@
+"""Maintenance for the LangGraph checkpoint tables.
+
+`PostgresSaver` keeps every checkpoint of every thread, and each checkpoint
+carries the full conversation history. This module keeps those tables bounded:
+
+1. Compaction: keep only the latest N root checkpoints per thread, together
+   with their pending writes. Checkpoints of the agents' nested graphs
+   (non-empty `checkpoint_ns`) are only needed while a turn runs and are dropped.
+2. Purging: drop every checkpoint of threads whose conversation was deleted
+   (or never existed, e.g. old stateless questions) or has expired.
+3. Blob cleanup: drop channel blobs no remaining checkpoint refers to.
+
+Only threads that have been idle for a grace period are touched, so a turn
+that is writing checkpoints is never compacted underneath itself. The idle
+threads are listed once per pass and processed in batches; each batch checks
+again that its threads are still idle.
+
+Runs as a background task from the app lifespan, or from the command line:
+
+    python -m src.app.db.checkpoint_maintenance --keep-last 5 --ttl-days 30
+"""
+
+import argparse
+import asyncio
+import logging
+from typing import Iterator, List, Optional, Set
+
+from ..core.config import get_settings
+from ..core.logging_config import configure_logging
+from .connection import get_db_connection, close_connection_pool
+from .models import CheckpointGCResult
+
+logger = logging.getLogger(__name__)
+
+# threads whose latest checkpoint is older than the grace period; computed once per pass
+_IDLE_THREADS_QUERY = """
+    SELECT thread_id
+    FROM checkpoints
+    GROUP BY thread_id
+    HAVING MAX((checkpoint->>'ts')::timestamptz) < NOW() - make_interval(mins => %(idle_minutes)s::int)
+"""
+
+# the same check for one batch of those threads, in case one was written to since the pass started
+_IDLE_FILTER = """
+    SELECT thread_id
+    FROM checkpoints
+    WHERE thread_id = ANY(%(threads)s)
+    GROUP BY thread_id
+    HAVING MAX((checkpoint->>'ts')::timestamptz) < NOW() - make_interval(mins => %(idle_minutes)s::int)
+"""
+
+_COMPACT_QUERY = f"""
+    WITH idle AS ({_IDLE_FILTER}),
+    ranked AS (
+        SELECT c.thread_id, c.checkpoint_ns, c.checkpoint_id,
+               ROW_NUMBER() OVER (
+                   PARTITION BY c.thread_id, c.checkpoint_ns
+                   ORDER BY c.checkpoint_id DESC
+               ) AS position
+        FROM checkpoints c
+        JOIN idle USING (thread_id)
+    ),
+    doomed AS (
+        SELECT thread_id, checkpoint_ns, checkpoint_id
+        FROM ranked
+        WHERE position > %(keep_last)s OR checkpoint_ns <> ''
+        LIMIT %(batch_size)s
+    ),
+    deleted_checkpoints AS (
+        DELETE FROM checkpoints c
+        USING doomed d
+        WHERE c.thread_id = d.thread_id
+          AND c.checkpoint_ns = d.checkpoint_ns
+          AND c.checkpoint_id = d.checkpoint_id
+        RETURNING pg_column_size(c.*) AS size
+    ),
+    deleted_writes AS (
+        DELETE FROM checkpoint_writes w
+        USING doomed d
+        WHERE w.thread_id = d.thread_id
+          AND w.checkpoint_ns = d.checkpoint_ns
+          AND w.checkpoint_id = d.checkpoint_id
+        RETURNING pg_column_size(w.*) AS size
+    )
+    SELECT
+        (SELECT COUNT(*) FROM deleted_checkpoints) AS checkpoints,
+        (SELECT COUNT(*) FROM deleted_writes) AS writes,
+        COALESCE((SELECT SUM(size) FROM deleted_checkpoints), 0)
+            + COALESCE((SELECT SUM(size) FROM deleted_writes), 0) AS bytes
+"""
+
+_BLOB_QUERY = f"""
+    WITH idle AS ({_IDLE_FILTER}),
+    doomed AS (
+        SELECT b.thread_id, b.checkpoint_ns, b.channel, b.version
+        FROM checkpoint_blobs b
+        JOIN idle USING (thread_id)
+        WHERE NOT EXISTS (
+            SELECT 1
+            FROM checkpoints c
+            WHERE c.thread_id = b.thread_id
+              AND c.checkpoint_ns = b.checkpoint_ns
+              AND c.checkpoint->'channel_versions'->>b.channel = b.version
+        )
+        LIMIT %(batch_size)s
+    ),
+    deleted AS (
+        DELETE FROM checkpoint_blobs b
+        USING doomed d
+        WHERE b.thread_id = d.thread_id
+          AND b.checkpoint_ns = d.checkpoint_ns
+          AND b.channel = d.channel
+          AND b.version = d.version
+        RETURNING pg_column_size(b.*) AS size
+    )
+    SELECT COUNT(*) AS blobs, COALESCE(SUM(size), 0) AS bytes FROM deleted
+"""
+
+_STALE_THREADS_QUERY = f"""
+    SELECT idle.thread_id
+    FROM ({_IDLE_FILTER}) AS idle
+    LEFT JOIN conversations conv ON conv.session_id = idle.thread_id
+    WHERE conv.session_id IS NULL
+       OR (%(ttl_days)s::int > 0 AND conv.updated_at < NOW() - make_interval(days => %(ttl_days)s::int))
+"""
+
+_PURGE_QUERY = """
+    WITH deleted_checkpoints AS (
+        DELETE FROM checkpoints c WHERE c.thread_id = ANY(%(threads)s)
+        RETURNING pg_column_size(c.*) AS size
+    ),
+    deleted_writes AS (
+        DELETE FROM checkpoint_writes w WHERE w.thread_id = ANY(%(threads)s)
+        RETURNING pg_column_size(w.*) AS size
+    ),
+    deleted_blobs AS (
+        DELETE FROM checkpoint_blobs b WHERE b.thread_id = ANY(%(threads)s)
+        RETURNING pg_column_size(b.*) AS size
+    )
+    SELECT
+        (SELECT COUNT(*) FROM deleted_checkpoints) AS checkpoints,
+        (SELECT COUNT(*) FROM deleted_writes) AS writes,
+        (SELECT COUNT(*) FROM deleted_blobs) AS blobs,
+        COALESCE((SELECT SUM(size) FROM deleted_checkpoints), 0)
+            + COALESCE((SELECT SUM(size) FROM deleted_writes), 0)
+            + COALESCE((SELECT SUM(size) FROM deleted_blobs), 0) AS bytes
+"""
+
+
+def idle_threads(idle_minutes: int) -> List[str]:
+    """Return the threads that have not been written to for `idle_minutes`."""
+    with get_db_connection() as connection:
+        with connection.cursor() as cursor:
+            cursor.execute(_IDLE_THREADS_QUERY, {"idle_minutes": idle_minutes})
+            return [row["thread_id"] for row in cursor.fetchall()]
+
+
+def _batches(threads: List[str], batch_size: int) -> Iterator[List[str]]:
+    for start in range(0, len(threads), batch_size):
+        yield threads[start:start + batch_size]
+
+
+def purge_stale_threads(result: CheckpointGCResult, threads: List[str], ttl_days: int, idle_minutes: int, batch_size: int) -> Set[str]:
+    """Delete all checkpoints of the idle threads without a live conversation, batch by batch.
+
+    Returns:
+        The purged thread ids.
+    """
+    purged: Set[str] = set()
+    for batch in _batches(threads, batch_size):
+        with get_db_connection() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute(_STALE_THREADS_QUERY, {
+                    "threads": batch, "ttl_days": ttl_days, "idle_minutes": idle_minutes,
+                })
+                stale: List[str] = [row["thread_id"] for row in cursor.fetchall()]
+                if not stale:
+                    continue
+
+                cursor.execute(_PURGE_QUERY, {"threads": stale})
+                row = cursor.fetchone()
+                connection.commit()
+
+        purged.update(stale)
+        result.threads_purged += len(stale)
+        result.checkpoints_deleted += row["checkpoints"]
+        result.writes_deleted += row["writes"]
+        result.blobs_deleted += row["blobs"]
+        result.bytes_reclaimed += int(row["bytes"])
+
+    return purged
+
+
+def compact_threads(result: CheckpointGCResult, threads: List[str], keep_last: int, idle_minutes: int, batch_size: int) -> None:
+    """Keep only the latest `keep_last` root checkpoints of each idle thread, batch by batch."""
+    for batch in _batches(threads, batch_size):
+        while True:
+            with get_db_connection() as connection:
+                with connection.cursor() as cursor:
+                    cursor.execute(_COMPACT_QUERY, {
+                        "threads": batch, "keep_last": keep_last, "idle_minutes": idle_minutes, "batch_size": batch_size,
+                    })
+                    row = cursor.fetchone()
+                    connection.commit()
+
+            result.checkpoints_deleted += row["checkpoints"]
+            result.writes_deleted += row["writes"]
+            result.bytes_reclaimed += int(row["bytes"])
+
+            if row["checkpoints"] < batch_size:
+                break
+
+
+def delete_orphan_blobs(result: CheckpointGCResult, threads: List[str], idle_minutes: int, batch_size: int) -> None:
+    """Delete channel blobs of the idle threads that no remaining checkpoint refers to, batch by batch."""
+    for batch in _batches(threads, batch_size):
+        while True:
+            with get_db_connection() as connection:
+                with connection.cursor() as cursor:
+                    cursor.execute(_BLOB_QUERY, {"threads": batch, "idle_minutes": idle_minutes, "batch_size": batch_size})
+                    row = cursor.fetchone()
+                    connection.commit()
+
+            result.blobs_deleted += row["blobs"]
+            result.bytes_reclaimed += int(row["bytes"])
+
+            if row["blobs"] < batch_size:
+                break
+
+
+# run one full maintenance pass
+def run_checkpoint_gc(
+    keep_last: Optional[int] = None,
+    ttl_days: Optional[int] = None,
+    idle_minutes: Optional[int] = None,
+    batch_size: Optional[int] = None,
+) -> CheckpointGCResult:
+    """Purge stale threads, compact the remaining ones and drop unreferenced blobs.
+
+    Args:
+        keep_last: Checkpoints to keep per thread (defaults to `settings.checkpoint_keep_last`).
+        ttl_days: Purge threads of conversations idle for this many days; 0 disables
+            (defaults to `settings.checkpoint_ttl_days`).
+        idle_minutes: Skip threads written to within this many minutes
+            (defaults to `settings.checkpoint_gc_idle_minutes`).
+        batch_size: Rows (or threads) deleted per transaction
+            (defaults to `settings.checkpoint_gc_batch_size`).
+
+    Returns:
+        CheckpointGCResult with row counts and the approximate bytes reclaimed.
+    """
+    settings = get_settings()
+    keep_last = settings.checkpoint_keep_last if keep_last is None else keep_last
+    ttl_days = settings.checkpoint_ttl_days if ttl_days is None else ttl_days
+    idle_minutes = settings.checkpoint_gc_idle_minutes if idle_minutes is None else idle_minutes
+    batch_size = settings.checkpoint_gc_batch_size if batch_size is None else batch_size
+
+    if keep_last < 1:
+        raise ValueError("keep_last must be at least 1; the latest checkpoint holds the conversation state")
+
+    result = CheckpointGCResult()
+    try:
+        # one scan of the checkpoint table per pass; every step then works through this list
+        threads = idle_threads(idle_minutes)
+        purged = purge_stale_threads(result, threads, ttl_days, idle_minutes, batch_size)
+        threads = [thread_id for thread_id in threads if thread_id not in purged]
+        compact_threads(result, threads, keep_last, idle_minutes, batch_size)
+        delete_orphan_blobs(result, threads, idle_minutes, batch_size)
+    except Exception as e:
+        raise Exception(f"Database error during checkpoint maintenance: {str(e)}") from e
+
+    return result
+
+
+# background task started from the app lifespan
+async def checkpoint_gc_loop(interval_minutes: int) -> None:
+    """Run `run_checkpoint_gc()` every `interval_minutes` until cancelled."""
+    while True:
+        await asyncio.sleep(interval_minutes * 60)
+        try:
+            result = await asyncio.to_thread(run_checkpoint_gc)
+            logger.info("Checkpoint maintenance: %s", result.summary())
+        except Exception as e:
+            logger.warning("Checkpoint maintenance failed: %s", e)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Compact and garbage-collect LangGraph checkpoints.")
+    parser.add_argument("--keep-last", type=int, default=None, help="checkpoints to keep per thread")
+    parser.add_argument("--ttl-days", type=int, default=None, help="purge conversations idle for this many days (0 disables)")
+    parser.add_argument("--idle-minutes", type=int, default=None, help="skip threads written to more recently than this")
+    parser.add_argument("--batch-size", type=int, default=None, help="rows or threads deleted per transaction")
+    args = parser.parse_args(argv)
+
+    configure_logging()
+    try:
+        result = run_checkpoint_gc(
+            keep_last=args.keep_last,
+            ttl_days=args.ttl_days,
+            idle_minutes=args.idle_minutes,
+            batch_size=args.batch_size,
+        )
+        print(result.summary())
+    finally:
+        close_connection_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,41 +1,51 @@
 """PostgreSQL-based checkpointer for LangGraph conversation persistence."""
+import logging
 from typing import Optional
 import os
 
 from psycopg.rows import dict_row
-from psycopg_pool import ConnectionPool
+from psycopg_pool import AsyncConnectionPool, ConnectionPool
 from langgraph.checkpoint.postgres import PostgresSaver
+from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
 
 from ..core.config import get_settings
 
+logger = logging.getLogger(__name__)
+
 _checkpoint_pool: Optional[ConnectionPool] = None
 _checkpointer: Optional[PostgresSaver] = None
+_async_checkpoint_pool: Optional[AsyncConnectionPool] = None
+_async_checkpointer: Optional[AsyncPostgresSaver] = None
+
+def _checkpoint_pool_options() -> dict:
+    """Pool options shared by the sync and async checkpoint pools."""
+    settings = get_settings()
+
+    # for Neon ( 1–3 ).
+    max_size = int(os.getenv("CHECKPOINT_POOL_MAX_SIZE", "3"))
+
+    return dict(
+        conninfo=settings.database_url,
+        min_size=1,
+        max_size=max_size,
+        timeout=10.0,
+
+        # recycle connections... so stale ones don't live forever
+        max_lifetime=1800, 
+        max_idle=300,       
+        reconnect_timeout=300,
+
+        kwargs={
+            "autocommit": True,
+            "row_factory": dict_row,
+            "prepare_threshold": 0,
+        },
+    )
 
 def get_checkpoint_pool() -> ConnectionPool:
     global _checkpoint_pool
     if _checkpoint_pool is None:
-        settings = get_settings()
-
-        # for Neon ( 1–3 ).
-        max_size = int(os.getenv("CHECKPOINT_POOL_MAX_SIZE", "3"))
-
-        _checkpoint_pool = ConnectionPool(
-            conninfo=settings.database_url,
-            min_size=1,
-            max_size=max_size,
-            timeout=10.0,
-
-            # recycle connections... so stale ones don't live forever
-            max_lifetime=1800, 
-            max_idle=300,       
-            reconnect_timeout=300,
-
-            kwargs={
-                "autocommit": True,
-                "row_factory": dict_row,
-                "prepare_threshold": 0,
-            },
-        )
+        _checkpoint_pool = ConnectionPool(**_checkpoint_pool_options())
     return _checkpoint_pool
 
 
@@ -45,7 +55,7 @@ def get_postgres_checkpointer() -> PostgresSaver:
         pool = get_checkpoint_pool()
         _checkpointer = PostgresSaver(pool)
         _checkpointer.setup()
-        print("PostgreSQL checkpointer initialized with ConnectionPool")
+        logger.info("PostgreSQL checkpointer initialized with ConnectionPool")
     return _checkpointer
 
 
@@ -54,4 +64,32 @@ def close_checkpointer():
     _checkpointer = None
     if _checkpoint_pool is not None:
         _checkpoint_pool.close()
-        _checkpoint_pool = None
\ No newline at end of file
+        _checkpoint_pool = None
+
+
+async def get_async_checkpoint_pool() -> AsyncConnectionPool:
+    global _async_checkpoint_pool
+    if _async_checkpoint_pool is None:
+        pool = AsyncConnectionPool(**_checkpoint_pool_options(), open=False)
+        await pool.open()
+        _async_checkpoint_pool = pool
+    return _async_checkpoint_pool
+
+
+async def get_async_postgres_checkpointer() -> AsyncPostgresSaver:
+    global _async_checkpointer
+    if _async_checkpointer is None:
+        pool = await get_async_checkpoint_pool()
+        checkpointer = AsyncPostgresSaver(pool)
+        await checkpointer.setup()
+        _async_checkpointer = checkpointer
+        logger.info("PostgreSQL async checkpointer initialized with AsyncConnectionPool")
+    return _async_checkpointer
+
+
+async def close_async_checkpointer():
+    global _async_checkpointer, _async_checkpoint_pool
+    _async_checkpointer = None
+    if _async_checkpoint_pool is not None:
+        await _async_checkpoint_pool.close()
+        _async_checkpoint_pool = None
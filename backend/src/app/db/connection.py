@@ -1,14 +1,20 @@
 """Database connection management for PostgreSQL."""
 
+import logging
+from contextlib import asynccontextmanager, contextmanager
 from psycopg.rows import dict_row
-from psycopg_pool import ConnectionPool
-from typing import Optional
+from psycopg_pool import AsyncConnectionPool, ConnectionPool
+from typing import AsyncIterator, Iterator, Optional
 from ..core.config import get_settings
+from ..core.tracing import span
 import psycopg
 import os
 
-# Global connection pool
+logger = logging.getLogger(__name__)
+
+# Global connection pools
 _connection_pool: Optional[ConnectionPool] = None
+_async_connection_pool: Optional[AsyncConnectionPool] = None
 
 # create a connection with the db
 def get_connection_pool() -> ConnectionPool:
@@ -39,7 +45,8 @@ def get_connection_pool() -> ConnectionPool:
     return _connection_pool  
 
 # get the connection with the db 
-def get_db_connection():
+@contextmanager
+def get_db_connection() -> Iterator[psycopg.Connection]:
     """Get a database connection from the pool.
     
     Usage:
@@ -48,11 +55,60 @@ def get_db_connection():
                 cur.execute("SELECT * FROM conversations")
     
     Returns:
-        Context manager for database connection.
+        Context manager for database connection (traced as a "db" span while held).
     """
 
     pool = get_connection_pool()
-    return pool.connection()
+    with span("db.connection", "db"):
+        with pool.connection() as connection:
+            yield connection
+
+# create an async connection with the db
+async def get_async_connection_pool() -> AsyncConnectionPool:
+    """Get or create the async PostgreSQL connection pool.
+
+    Uses the same sizing environment variables as the sync pool.
+
+    Returns:
+        Opened AsyncConnectionPool instance.
+    """
+
+    global _async_connection_pool
+    if _async_connection_pool is None:
+        settings = get_settings()
+
+        min_pool_size = int(os.getenv("DB_POOL_MIN_SIZE", "1"))
+        max_pool_size = int(os.getenv("DB_POOL_MAX_SIZE", "5"))
+
+        pool = AsyncConnectionPool(
+            conninfo=settings.database_url,
+            min_size=min_pool_size,
+            max_size=max_pool_size,
+            kwargs={"row_factory": dict_row},
+            check=AsyncConnectionPool.check_connection,
+            timeout=5.0,
+            open=False,
+        )
+        await pool.open()
+        _async_connection_pool = pool
+
+    return _async_connection_pool
+
+# get an async connection with the db
+@asynccontextmanager
+async def get_async_db_connection() -> AsyncIterator[psycopg.AsyncConnection]:
+    """Get an async database connection from the pool.
+
+    Usage:
+        async with get_async_db_connection() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute("SELECT * FROM conversations")
+    """
+
+    pool = await get_async_connection_pool()
+    with span("db.connection", "db"):
+        async with pool.connection() as connection:
+            yield connection
 
 # initial database creation (one time on server started)
 def init_database():
@@ -62,6 +118,12 @@ def init_database():
     - users: stores user information from Google OAuth
     - conversations: stores conversation metadata
     - messages: stores individual messages within conversations
+    - embedding_cache: stores embeddings keyed by model and text hash
+    - llm_cache: stores chat model responses keyed by a hash of model config and messages
+    - answer_cache_generations: per-file invalidation counters shared by every answer cache
+    - ingestion_jobs: queue of PDF indexing jobs processed by workers
+    - document_chunks: chunk text with a full-text index for hybrid retrieval
+    - file_centroids: per-file embedding centroids used by the scope gate
     """
 
     with get_db_connection() as connection:
@@ -125,18 +187,107 @@ def init_database():
                 )
             """)
 
-            # Create index on session_id for faster message queries
+            # Composite index for keyset pagination of a session's messages: every page
+            # (latest N, before or after a cursor) is one ordered range scan with no sort
             cursor.execute("""
-                CREATE INDEX IF NOT EXISTS idx_messages_session_id 
-                ON messages(session_id)
+                CREATE INDEX IF NOT EXISTS idx_messages_session_timestamp_id
+                ON messages(session_id, timestamp, id)
             """)
+
+            # superseded by the composite index (session_id is its prefix; no query orders by timestamp alone)
+            cursor.execute("DROP INDEX IF EXISTS idx_messages_session_id")
+            cursor.execute("DROP INDEX IF EXISTS idx_messages_timestamp")
             
-            # Create index on timestamp for ordered retrieval
+            # Create embedding cache table (keyed by model + SHA-256 of the text)
             cursor.execute("""
-                CREATE INDEX IF NOT EXISTS idx_messages_timestamp 
-                ON messages(timestamp)
+                CREATE TABLE IF NOT EXISTS embedding_cache (
+                    model VARCHAR(255) NOT NULL,
+                    text_hash CHAR(64) NOT NULL,
+                    embedding BYTEA NOT NULL,
+                    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+                    PRIMARY KEY (model, text_hash)
+                )
             """)
-            
+
+            # Create LLM response cache table (keyed by SHA-256 of model config + messages)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS llm_cache (
+                    cache_key CHAR(64) PRIMARY KEY,
+                    model VARCHAR(255) NOT NULL,
+                    response TEXT NOT NULL,
+                    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
+                )
+            """)
+
+            # Create answer cache invalidation counters (scope '' is the cross-file scope)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS answer_cache_generations (
+                    scope VARCHAR(255) PRIMARY KEY,
+                    generation BIGINT NOT NULL,
+                    updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
+                )
+            """)
+
+            # Create ingestion job queue (claimed by workers with FOR UPDATE SKIP LOCKED)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS ingestion_jobs (
+                    job_id VARCHAR(255) PRIMARY KEY,
+                    file_id VARCHAR(255) NOT NULL REFERENCES files(file_id) ON DELETE CASCADE,
+                    user_id VARCHAR(255) REFERENCES users(user_id) ON DELETE CASCADE,
+                    filename VARCHAR(500) NOT NULL,
+                    file_path VARCHAR(1000) NOT NULL,
+                    status VARCHAR(20) NOT NULL DEFAULT 'queued',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    pages_total INTEGER,
+                    pages_processed INTEGER NOT NULL DEFAULT 0,
+                    chunks_indexed INTEGER NOT NULL DEFAULT 0,
+                    error TEXT,
+                    worker_id VARCHAR(255),
+                    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+                    started_at TIMESTAMP WITH TIME ZONE,
+                    finished_at TIMESTAMP WITH TIME ZONE,
+                    updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
+                )
+            """)
+
+            # Partial index so claiming the next job only scans queued rows
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_ingestion_jobs_queued
+                ON ingestion_jobs(created_at) WHERE status = 'queued'
+            """)
+
+            # Create full-text chunk index for hybrid retrieval (same ids as the vector store)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS document_chunks (
+                    chunk_id VARCHAR(255) PRIMARY KEY,
+                    file_id VARCHAR(255),
+                    content TEXT NOT NULL,
+                    metadata JSONB NOT NULL DEFAULT '{}'::jsonb,
+                    content_tsv TSVECTOR GENERATED ALWAYS AS (to_tsvector('english', content)) STORED,
+                    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
+                )
+            """)
+
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_document_chunks_tsv
+                ON document_chunks USING GIN (content_tsv)
+            """)
+
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_document_chunks_file_id
+                ON document_chunks(file_id)
+            """)
+
+            # Create per-file embedding centroids for the scope gate
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS file_centroids (
+                    file_id VARCHAR(255) PRIMARY KEY,
+                    centroid BYTEA NOT NULL,
+                    chunk_count INTEGER NOT NULL,
+                    updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
+                )
+            """)
+
             # Migration: Add user_id column to existing tables if they don't have it
             # Check and add user_id to files table
             cursor.execute("""
@@ -185,10 +336,16 @@ def init_database():
                 ON files(user_id)
             """)
             
+            # A user's conversations in listing order, covering the listed columns: each page of
+            # the sidebar is an index-only range scan that starts at the cursor
             cursor.execute("""
-                CREATE INDEX IF NOT EXISTS idx_conversations_user_id 
-                ON conversations(user_id)
+                CREATE INDEX IF NOT EXISTS idx_conversations_user_updated
+                ON conversations(user_id, updated_at DESC, session_id DESC)
+                INCLUDE (created_at, message_count, active_file_id)
             """)
+
+            # superseded by idx_conversations_user_updated (user_id is its prefix)
+            cursor.execute("DROP INDEX IF EXISTS idx_conversations_user_id")
             
             cursor.execute("""
                 CREATE INDEX IF NOT EXISTS idx_users_email 
@@ -196,7 +353,7 @@ def init_database():
             """)
             
             connection.commit()
-            print("Database connected and tables initialized successfully")
+            logger.info("Database connected and tables initialized successfully")
 
 
 # close the db connection (When server shutdown)
@@ -209,3 +366,14 @@ def close_connection_pool():
     if _connection_pool is not None:
         _connection_pool.close()
         _connection_pool = None
+
+
+async def close_async_connection_pool():
+    """Close the async connection pool gracefully.
+
+    Should be called on application shutdown.
+    """
+    global _async_connection_pool
+    if _async_connection_pool is not None:
+        await _async_connection_pool.close()
+        _async_connection_pool = None
@@ -1,10 +1,181 @@
 """Database service for managing conversations in PostgreSQL."""
 
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from datetime import datetime
 import json
+import psycopg
 from .connection import get_db_connection
-from ..db.models import FileDB, MessageDB, ConversationDB
+from .pagination import InvalidCursorError, decode_cursor, encode_cursor
+from ..db.models import FileDB, MessageDB, MessagePage, ConversationDB, ConversationPage, TurnDB
+
+# Inserts both messages of a turn and bumps the conversation counter in one statement.
+# Message ids are assigned in VALUES order, so the user message always sorts first.
+_ADD_TURN_QUERY = """
+    WITH inserted AS (
+        INSERT INTO messages (session_id, role, content, metadata, timestamp)
+        VALUES (%s, 'USER', %s, %s, %s),
+               (%s, 'Assistant', %s, %s, NOW())
+        RETURNING id
+    )
+    UPDATE conversations
+    SET message_count = message_count + (SELECT COUNT(*) FROM inserted),
+        updated_at = NOW()
+    WHERE session_id = %s
+    RETURNING message_count, (SELECT array_agg(id ORDER BY id) FROM inserted) AS message_ids
+"""
+
+
+def _message_page_query(session_id: str, limit: Optional[int], before: Optional[str], after: Optional[str]) -> Tuple[str, List[Any], bool]:
+    """Build the keyset query for a page of messages (see `get_message_page()`).
+
+    Pages are ranges of the `(session_id, timestamp, id)` index. The latest
+    page and pages before a cursor are read newest first, so the scan starts at
+    the end of the range and stops after `limit + 1` rows (the extra row only
+    tells whether there are more). Pages after a cursor are read oldest first.
+
+    Returns:
+        Tuple of (query, params, newest_first).
+
+    Raises:
+        InvalidCursorError: If a cursor is malformed, or both are given.
+    """
+
+    if before and after:
+        raise InvalidCursorError("Pass either `before` or `after`, not both")
+
+    conditions = ["session_id = %s"]
+    params: List[Any] = [session_id]
+    if before:
+        conditions.append("(timestamp, id) < (%s, %s)")
+        params.extend(decode_cursor(before, (datetime, int)))
+    if after:
+        conditions.append("(timestamp, id) > (%s, %s)")
+        params.extend(decode_cursor(after, (datetime, int)))
+
+    newest_first = not after
+    direction = "DESC" if newest_first else "ASC"
+    query = f"""
+        SELECT id, session_id, role, content, timestamp, metadata
+        FROM messages
+        WHERE {" AND ".join(conditions)}
+        ORDER BY timestamp {direction}, id {direction}
+    """
+
+    if limit:
+        query += " LIMIT %s"
+        params.append(limit + 1)
+
+    return query, params, newest_first
+
+
+def _message_page(rows: List[Dict[str, Any]], limit: Optional[int], before: Optional[str], after: Optional[str], newest_first: bool) -> MessagePage:
+    """Turn the rows of a `_message_page_query()` into a page, oldest message first."""
+
+    has_more = bool(limit) and len(rows) > limit
+    if has_more:
+        rows = rows[:limit]
+    if newest_first:
+        rows = rows[::-1]
+
+    if not rows:
+        # nothing past the cursor; the cursor itself still leads back the other way
+        return MessagePage(before_cursor=after, after_cursor=before)
+
+    messages = [
+        MessageDB(
+            id=row["id"],
+            session_id=row["session_id"],
+            role=row["role"],
+            content=row["content"],
+            timestamp=row["timestamp"],
+            metadata=row["metadata"]
+        ) for row in rows
+    ]
+
+    # older messages exist past a full newest-first page, or behind an `after` cursor
+    has_older = has_more if newest_first else True
+    # newer messages exist behind a `before` cursor, or past a full oldest-first page
+    has_newer = bool(before) if newest_first else has_more
+
+    first, last = messages[0], messages[-1]
+    return MessagePage(
+        messages=messages,
+        before_cursor=encode_cursor(first.timestamp, first.id) if has_older else None,
+        after_cursor=encode_cursor(last.timestamp, last.id) if has_newer else None,
+    )
+
+
+def _conversation_page_query(limit: Optional[int], user_id: Optional[str], cursor: Optional[str]) -> Tuple[str, List[Any]]:
+    """Build the keyset query for a page of conversations (see `list_conversation_page()`).
+
+    Conversations are ordered by `(updated_at, session_id)` descending; the
+    session id breaks ties between conversations updated at the same time.
+    A user's page is a range of `idx_conversations_user_updated`, which also
+    holds the listed columns, so the page is read from the index alone (plus
+    the filename join) and costs the same on every page.
+
+    Raises:
+        InvalidCursorError: If the cursor is malformed.
+    """
+
+    conditions = []
+    params: List[Any] = []
+    if user_id:
+        conditions.append("c.user_id = %s")
+        params.append(user_id)
+    if cursor:
+        conditions.append("(c.updated_at, c.session_id) < (%s, %s)")
+        params.extend(decode_cursor(cursor, (datetime, str)))
+
+    # metadata is left out of the listing so the columns stay within the index
+    query = f"""
+        SELECT
+            c.session_id,
+            c.created_at,
+            c.updated_at,
+            c.message_count,
+            c.active_file_id,
+            c.user_id,
+            f.filename
+        FROM conversations c
+        LEFT JOIN files f ON c.active_file_id = f.file_id
+        {"WHERE " + " AND ".join(conditions) if conditions else ""}
+        ORDER BY c.updated_at DESC, c.session_id DESC
+    """
+
+    if limit:
+        query += " LIMIT %s"
+        params.append(limit + 1)
+
+    return query, params
+
+
+def _conversation_page(rows: List[Dict[str, Any]], limit: Optional[int]) -> ConversationPage:
+    """Turn the rows of a `_conversation_page_query()` into a page."""
+
+    has_more = bool(limit) and len(rows) > limit
+    if has_more:
+        rows = rows[:limit]
+
+    conversations = [
+        ConversationDB(
+            session_id=row["session_id"],
+            created_at=row["created_at"],
+            updated_at=row["updated_at"],
+            message_count=row["message_count"],
+            active_file_id=row["active_file_id"],
+            user_id=row["user_id"],
+            filename=row.get("filename")
+        )
+        for row in rows
+    ]
+
+    last = conversations[-1] if conversations else None
+    return ConversationPage(
+        conversations=conversations,
+        next_cursor=encode_cursor(last.updated_at, last.session_id) if has_more else None,
+    )
+
 
 class ConversationDatabaseService:
     """Service for managing conversations and messages in PostgreSQL."""
@@ -148,9 +319,89 @@ class ConversationDatabaseService:
             raise Exception(f"Database error adding message: {str(e)}") from e
 
 
+    # get a conversation and check who owns it (one query)
+    def get_owned_conversation(self, session_id: str, user_id: str) -> ConversationDB:
+        """Load a conversation and verify that it belongs to a user.
+
+        Args:
+            session_id: The conversation session ID.
+            user_id: The user who must own the conversation.
+
+        Returns:
+            ConversationDB instance.
+
+        Raises:
+            PermissionError: If the conversation does not exist or belongs to
+                another user (callers cannot tell the two apart).
+        """
+        conversation = self.get_conversation(session_id)
+        if not conversation or conversation.user_id != user_id:
+            raise PermissionError("You don't have access to this conversation")
+        return conversation
+
+
+    # add a full question/answer turn in one transaction
+    def add_turn(
+        self,
+        session_id: str,
+        question: str,
+        answer: str,
+        asked_at: datetime,
+        user_metadata: Optional[Dict[str, Any]] = None,
+        assistant_metadata: Optional[Dict[str, Any]] = None
+    ) -> TurnDB:
+        """Store the user and assistant messages of a turn and bump `message_count`.
+
+        Both inserts and the counter update run as a single statement, so a
+        turn costs one round trip and is never half-written.
+
+        Args:
+            session_id: The conversation session ID.
+            question: The user's question.
+            answer: The assistant's answer.
+            asked_at: When the question was received (user message timestamp).
+            user_metadata: Optional metadata for the user message.
+            assistant_metadata: Optional metadata for the assistant message.
+
+        Returns:
+            TurnDB with both message ids and the updated message count.
+
+        Raises:
+            ValueError: If the conversation no longer exists (e.g. it was
+                deleted while the answer was being generated).
+        """
+        try:
+            with get_db_connection() as connection:
+                with connection.cursor() as cursor:
+                    cursor.execute(_ADD_TURN_QUERY, (
+                        session_id, question, json.dumps(user_metadata or {}), asked_at,
+                        session_id, answer, json.dumps(assistant_metadata or {}),
+                        session_id,
+                    ))
+
+                    turn_row = cursor.fetchone()
+                    if not turn_row:
+                        raise ValueError(f"Session {session_id} not found")
+
+                    connection.commit()
+
+                    return TurnDB(
+                        user_message_id=turn_row["message_ids"][0],
+                        assistant_message_id=turn_row["message_ids"][1],
+                        message_count=turn_row["message_count"]
+                    )
+
+        except psycopg.errors.ForeignKeyViolation as e:
+            raise ValueError(f"Session {session_id} not found") from e
+        except ValueError:
+            raise
+        except Exception as e:
+            raise Exception(f"Database error adding turn: {str(e)}") from e
+
+
     # get all the messages according to the session_id
     def get_messages(self, session_id: str, limit: Optional[int] = None) -> List[MessageDB]:
-        """Get all messages for a conversation.
+        """Get the messages of a conversation.
         
         Args:
             session_id: The conversation session ID.
@@ -160,38 +411,49 @@ class ConversationDatabaseService:
             List of MessageDB instances ordered by timestamp.
         """
 
-        try:
-            with get_db_connection() as connection:
-                with connection.cursor() as cursor:
-                    query = """
-                        SELECT id, session_id, role, content, timestamp, metadata
-                        FROM messages
-                        WHERE session_id = %s
-                        ORDER BY timestamp ASC
-                    """
+        return self.get_message_page(session_id, limit=limit).messages
 
-                    if limit:
-                        query += " LIMIT %s"
-                        cursor.execute(query, (session_id, limit))
-                    else:
-                        cursor.execute(query, (session_id,))
 
-                    message_rows = cursor.fetchall()
+    # get one page of messages (keyset pagination in both directions)
+    def get_message_page(
+        self,
+        session_id: str,
+        limit: Optional[int] = None,
+        before: Optional[str] = None,
+        after: Optional[str] = None
+    ) -> MessagePage:
+        """Get a page of a conversation's messages.
 
-                    return [
-                        MessageDB(
-                            id=row["id"],
-                            session_id=row["session_id"],
-                            role=row["role"],
-                            content=row["content"],
-                            timestamp=row["timestamp"],
-                            metadata=row["metadata"]                        
-                        ) for row in message_rows
-                    ]
+        Without a cursor the page holds the latest `limit` messages. `before`
+        pages back to older messages and `after` forward to newer ones, using
+        the cursors of an earlier page.
+
+        Args:
+            session_id: The conversation session ID.
+            limit: Optional maximum number of messages (None = every message in range).
+            before: Cursor: only messages older than it.
+            after: Cursor: only messages newer than it.
+
+        Returns:
+            MessagePage with the messages ordered by timestamp and the cursors
+            to the older and newer pages.
 
+        Raises:
+            InvalidCursorError: If a cursor is malformed, or both are given.
+        """
+
+        query, params, newest_first = _message_page_query(session_id, limit, before, after)
+
+        try:
+            with get_db_connection() as connection:
+                with connection.cursor() as cursor:
+                    cursor.execute(query, params)
+                    message_rows = cursor.fetchall()
         except Exception as e:
             raise Exception(f"Database error getting messages: {str(e)}") from e
 
+        return _message_page(message_rows, limit, before, after, newest_first)
+
 
     # delete conversation  
     def delete_conversation(self, session_id : str ) -> bool:
@@ -221,65 +483,49 @@ class ConversationDatabaseService:
 
 
     # get lsit of conservations 
-    def list_conversations(self, limit: Optional[int] = None, user_id: Optional[str] = None) -> List[ConversationDB]:
-        """List all conversations, optionally filtered by user.
+    def list_conversations(self, limit: Optional[int] = None, user_id: Optional[str] = None, cursor: Optional[str] = None) -> List[ConversationDB]:
+        """List conversations, most recently updated first, optionally filtered by user.
         
         Args:
             limit: Optional limit on number of conversations to return.
             user_id: Optional user ID to filter conversations.
+            cursor: Optional `next_cursor` of an earlier page: continue after it.
             
         Returns:
-            List of ConversationDB instances.
+            List of ConversationDB instances (without metadata).
         """
 
-        try:
-            with get_db_connection() as connection:
-                with connection.cursor() as cursor:
-                    # Optimized query with LEFT JOIN to get filenames in single query
-                    query = """
-                        SELECT 
-                            c.session_id, 
-                            c.created_at, 
-                            c.updated_at, 
-                            c.message_count,
-                            c.active_file_id,
-                            c.user_id, 
-                            c.metadata,
-                            f.filename
-                        FROM conversations c
-                        LEFT JOIN files f ON c.active_file_id = f.file_id
-                    """
-                    
-                    params = []
-                    if user_id:
-                        query += " WHERE c.user_id = %s"
-                        params.append(user_id)
-                    
-                    query += " ORDER BY c.updated_at DESC"
-                    
-                    if limit:
-                        query += " LIMIT %s"
-                        params.append(limit)
+        return self.list_conversation_page(limit=limit, user_id=user_id, cursor=cursor).conversations
 
-                    cursor.execute(query, params if params else None)
-                    conversations_rows = cursor.fetchall()
 
-                    return [
-                        ConversationDB(
-                            session_id=row["session_id"],
-                            created_at=row["created_at"],
-                            updated_at=row["updated_at"],
-                            message_count=row["message_count"],
-                            active_file_id=row["active_file_id"],
-                            user_id=row["user_id"],
-                            metadata=row["metadata"],
-                            filename=row.get("filename") 
-                        )
-                        for row in conversations_rows
-                    ]  
-                
+    # get one page of conversations (keyset pagination)
+    def list_conversation_page(self, limit: Optional[int] = None, user_id: Optional[str] = None, cursor: Optional[str] = None) -> ConversationPage:
+        """List a page of conversations, most recently updated first.
+
+        Args:
+            limit: Optional page size (None = every conversation after the cursor).
+            user_id: Optional user ID to filter conversations.
+            cursor: Optional `next_cursor` of an earlier page: continue after it.
+
+        Returns:
+            ConversationPage with the conversations (without metadata) and the
+            cursor of the next page.
+
+        Raises:
+            InvalidCursorError: If the cursor is malformed.
+        """
+
+        query, params = _conversation_page_query(limit, user_id, cursor)
+
+        try:
+            with get_db_connection() as connection:
+                with connection.cursor() as db_cursor:
+                    db_cursor.execute(query, params if params else None)
+                    conversations_rows = db_cursor.fetchall()
         except Exception as e:
             raise Exception(f"Database error listing conversations: {str(e)}") from e
+
+        return _conversation_page(conversations_rows, limit)
         
 
     # create file details
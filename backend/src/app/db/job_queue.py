@@ -0,0 +1,305 @@
+"""Postgres-backed queue for PDF ingestion jobs.
+
+Jobs live in the `ingestion_jobs` table. Workers claim the oldest queued job
+with `SELECT ... FOR UPDATE SKIP LOCKED`, so any number of worker processes can
+poll the same table without handing a job out twice. Running jobs refresh
+`updated_at` as they report progress; a job whose worker stops reporting is put
+back in the queue (or failed once it runs out of attempts). Updates from a
+worker that lost its job that way are ignored.
+"""
+
+from typing import Optional
+import json
+from .connection import get_db_connection, get_async_db_connection
+from .models import IngestionJobDB
+
+_JOB_COLUMNS = """
+    job_id, file_id, user_id, filename, file_path, status, attempts,
+    pages_total, pages_processed, chunks_indexed, error,
+    created_at, started_at, finished_at
+"""
+
+# the file record is created with the job, so the file is listed right away
+_ENQUEUE_QUERY = f"""
+    WITH new_file AS (
+        INSERT INTO files (file_id, filename, file_path, user_id, metadata)
+        VALUES (%(file_id)s, %(filename)s, %(file_path)s, %(user_id)s, %(metadata)s)
+        RETURNING file_id
+    )
+    INSERT INTO ingestion_jobs (job_id, file_id, user_id, filename, file_path)
+    SELECT %(job_id)s, file_id, %(user_id)s, %(filename)s, %(file_path)s FROM new_file
+    RETURNING {_JOB_COLUMNS}
+"""
+
+_GET_JOB_QUERY = f"""
+    SELECT {_JOB_COLUMNS}
+    FROM ingestion_jobs
+    WHERE job_id = %s
+"""
+
+
+def _job_from_row(row) -> IngestionJobDB:
+    return IngestionJobDB(**row)
+
+
+class IngestionJobQueue:
+    """Queue operations used by the API (enqueue, status) and by workers (claim, progress)."""
+
+    # add a job (and its file record) to the queue
+    def enqueue(self, job_id: str, file_id: str, filename: str, file_path: str, user_id: Optional[str] = None, metadata: Optional[dict] = None) -> IngestionJobDB:
+        """Create the file record and a queued indexing job in one transaction.
+
+        Args:
+            job_id: Unique identifier for the job.
+            file_id: Unique identifier for the uploaded file.
+            filename: Original filename.
+            file_path: Path where the file is stored.
+            user_id: User ID who uploaded the file.
+            metadata: Optional file metadata.
+
+        Returns:
+            IngestionJobDB instance.
+        """
+        try:
+            with get_db_connection() as connection:
+                with connection.cursor() as cursor:
+                    cursor.execute(_ENQUEUE_QUERY, {
+                        "job_id": job_id, "file_id": file_id, "filename": filename,
+                        "file_path": file_path, "user_id": user_id,
+                        "metadata": json.dumps(metadata or {}),
+                    })
+                    job_row = cursor.fetchone()
+                    connection.commit()
+
+                    return _job_from_row(job_row)
+        except Exception as e:
+            raise Exception(f"Database error enqueuing ingestion job: {str(e)}") from e
+
+
+    # get the job status
+    def get_job(self, job_id: str) -> Optional[IngestionJobDB]:
+        """Get an ingestion job by job_id.
+
+        Returns:
+            IngestionJobDB instance or None if not found.
+        """
+        try:
+            with get_db_connection() as connection:
+                with connection.cursor() as cursor:
+                    cursor.execute(_GET_JOB_QUERY, (job_id,))
+                    job_row = cursor.fetchone()
+                    return _job_from_row(job_row) if job_row else None
+        except Exception as e:
+            raise Exception(f"Database error getting ingestion job: {str(e)}") from e
+
+
+    # claim the oldest queued job
+    def claim_next(self, worker_id: str) -> Optional[IngestionJobDB]:
+        """Mark the oldest queued job as running and return it.
+
+        Rows locked by other workers are skipped, so concurrent workers never
+        claim the same job.
+
+        Args:
+            worker_id: Identifier of the claiming worker. Progress, completion
+                and failure are only recorded for the worker holding the job.
+
+        Returns:
+            The claimed IngestionJobDB, or None if the queue is empty.
+        """
+        try:
+            with get_db_connection() as connection:
+                with connection.cursor() as cursor:
+                    cursor.execute(f"""
+                        UPDATE ingestion_jobs
+                        SET status = 'running',
+                            attempts = attempts + 1,
+                            worker_id = %s,
+                            error = NULL,
+                            started_at = NOW(),
+                            updated_at = NOW()
+                        WHERE job_id = (
+                            SELECT job_id
+                            FROM ingestion_jobs
+                            WHERE status = 'queued'
+                            ORDER BY created_at
+                            LIMIT 1
+                            FOR UPDATE SKIP LOCKED
+                        )
+                        RETURNING {_JOB_COLUMNS}
+                    """, (worker_id,))
+
+                    job_row = cursor.fetchone()
+                    connection.commit()
+
+                    return _job_from_row(job_row) if job_row else None
+        except Exception as e:
+            raise Exception(f"Database error claiming ingestion job: {str(e)}") from e
+
+
+    # report progress (also acts as the job's heartbeat)
+    def update_progress(self, job_id: str, worker_id: str, pages_processed: int, pages_total: Optional[int], chunks_indexed: int) -> bool:
+        """Record how far a running job has got.
+
+        Returns:
+            False if the job is no longer running under `worker_id` (it went
+            stale and was re-queued or claimed by another worker).
+        """
+        try:
+            with get_db_connection() as connection:
+                with connection.cursor() as cursor:
+                    cursor.execute("""
+                        UPDATE ingestion_jobs
+                        SET pages_processed = %s,
+                            pages_total = COALESCE(%s, pages_total),
+                            chunks_indexed = %s,
+                            updated_at = NOW()
+                        WHERE job_id = %s AND status = 'running' AND worker_id = %s
+                    """, (pages_processed, pages_total, chunks_indexed, job_id, worker_id))
+
+                    updated = cursor.rowcount
+                    connection.commit()
+
+                    return updated > 0
+        except Exception as e:
+            raise Exception(f"Database error updating ingestion job: {str(e)}") from e
+
+
+    # mark the job as done
+    def complete(self, job_id: str, worker_id: str, chunks_indexed: int) -> bool:
+        """Mark a job as completed.
+
+        Returns:
+            False if the job is no longer running under `worker_id`; its
+            current owner (or the next claim) decides its status.
+        """
+        try:
+            with get_db_connection() as connection:
+                with connection.cursor() as cursor:
+                    cursor.execute("""
+                        UPDATE ingestion_jobs
+                        SET status = 'completed',
+                            chunks_indexed = %s,
+                            pages_processed = COALESCE(pages_total, pages_processed),
+                            finished_at = NOW(),
+                            updated_at = NOW()
+                        WHERE job_id = %s AND status = 'running' AND worker_id = %s
+                    """, (chunks_indexed, job_id, worker_id))
+
+                    updated = cursor.rowcount
+                    connection.commit()
+
+                    return updated > 0
+        except Exception as e:
+            raise Exception(f"Database error completing ingestion job: {str(e)}") from e
+
+
+    # mark the job as failed (or queue it again while attempts remain)
+    def fail(self, job_id: str, worker_id: str, error: str, max_attempts: int) -> Optional[str]:
+        """Record a job failure.
+
+        Args:
+            job_id: The failed job.
+            worker_id: The worker that claimed it.
+            error: Error message to store.
+            max_attempts: Jobs that have been attempted fewer times are re-queued.
+
+        Returns:
+            The job's new status ("queued" or "failed"), or None if the job is
+            no longer running under `worker_id`.
+        """
+        try:
+            with get_db_connection() as connection:
+                with connection.cursor() as cursor:
+                    cursor.execute("""
+                        UPDATE ingestion_jobs
+                        SET status = CASE WHEN attempts < %s THEN 'queued' ELSE 'failed' END,
+                            error = %s,
+                            finished_at = CASE WHEN attempts < %s THEN NULL ELSE NOW() END,
+                            updated_at = NOW()
+                        WHERE job_id = %s AND status = 'running' AND worker_id = %s
+                        RETURNING status
+                    """, (max_attempts, error, max_attempts, job_id, worker_id))
+
+                    job_row = cursor.fetchone()
+                    connection.commit()
+
+                    return job_row["status"] if job_row else None
+        except Exception as e:
+            raise Exception(f"Database error failing ingestion job: {str(e)}") from e
+
+
+    # recover jobs whose worker died
+    def requeue_stale(self, timeout_minutes: int, max_attempts: int) -> int:
+        """Re-queue running jobs that have not reported progress for `timeout_minutes`.
+
+        Returns:
+            Number of jobs re-queued or failed.
+        """
+        try:
+            with get_db_connection() as connection:
+                with connection.cursor() as cursor:
+                    cursor.execute("""
+                        UPDATE ingestion_jobs
+                        SET status = CASE WHEN attempts < %s THEN 'queued' ELSE 'failed' END,
+                            error = 'Worker stopped reporting progress',
+                            finished_at = CASE WHEN attempts < %s THEN NULL ELSE NOW() END,
+                            updated_at = NOW()
+                        WHERE status = 'running'
+                          AND updated_at < NOW() - make_interval(mins => %s::int)
+                    """, (max_attempts, max_attempts, timeout_minutes))
+
+                    recovered = cursor.rowcount
+                    connection.commit()
+
+                    return recovered
+        except Exception as e:
+            raise Exception(f"Database error re-queuing stale ingestion jobs: {str(e)}") from e
+
+
+class AsyncIngestionJobQueue:
+    """Async counterpart of the queue operations used by the API layer."""
+
+    async def enqueue(self, job_id: str, file_id: str, filename: str, file_path: str, user_id: Optional[str] = None, metadata: Optional[dict] = None) -> IngestionJobDB:
+        """Async counterpart of `IngestionJobQueue.enqueue()`."""
+        try:
+            async with get_async_db_connection() as connection:
+                async with connection.cursor() as cursor:
+                    await cursor.execute(_ENQUEUE_QUERY, {
+                        "job_id": job_id, "file_id": file_id, "filename": filename,
+                        "file_path": file_path, "user_id": user_id,
+                        "metadata": json.dumps(metadata or {}),
+                    })
+                    job_row = await cursor.fetchone()
+                    await connection.commit()
+
+                    return _job_from_row(job_row)
+        except Exception as e:
+            raise Exception(f"Database error enqueuing ingestion job: {str(e)}") from e
+
+    async def get_job(self, job_id: str) -> Optional[IngestionJobDB]:
+        """Async counterpart of `IngestionJobQueue.get_job()`."""
+        try:
+            async with get_async_db_connection() as connection:
+                async with connection.cursor() as cursor:
+                    await cursor.execute(_GET_JOB_QUERY, (job_id,))
+                    job_row = await cursor.fetchone()
+                    return _job_from_row(job_row) if job_row else None
+        except Exception as e:
+            raise Exception(f"Database error getting ingestion job: {str(e)}") from e
+
+
+_job_queue: Optional[IngestionJobQueue] = None
+_async_job_queue: Optional[AsyncIngestionJobQueue] = None
+
+def get_job_queue() -> IngestionJobQueue:
+    global _job_queue
+    if _job_queue is None:
+        _job_queue = IngestionJobQueue()
+    return _job_queue
+
+def get_async_job_queue() -> AsyncIngestionJobQueue:
+    global _async_job_queue
+    if _async_job_queue is None:
+        _async_job_queue = AsyncIngestionJobQueue()
+    return _async_job_queue
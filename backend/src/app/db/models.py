@@ -36,6 +36,16 @@ class MessageDB(BaseModel):
     metadata: Dict[str, Any] = Field(default_factory=dict) 
 
 
+class MessagePage(BaseModel):
+    """One page of a conversation's messages, oldest first, with cursors to the adjacent pages."""
+
+    messages: List[MessageDB] = Field(default_factory=list)
+    # pass as `before` to get the older messages (None when this page starts the conversation)
+    before_cursor: Optional[str] = None
+    # pass as `after` to get the newer messages (None when this page is the latest)
+    after_cursor: Optional[str] = None
+
+
 class ConversationDB(BaseModel):
     """Database model for a conversation session."""
 
@@ -48,3 +58,55 @@ class ConversationDB(BaseModel):
     user_id: Optional[str] = None  # Link to user  
     metadata: Dict[str, Any] = Field(default_factory=dict) 
     messages : List[MessageDB] = Field(default_factory=list)
+
+
+class ConversationPage(BaseModel):
+    """One page of a conversation listing, most recently updated first."""
+
+    conversations: List[ConversationDB] = Field(default_factory=list)
+    # pass as `cursor` to get the next page (None when this is the last page)
+    next_cursor: Optional[str] = None
+
+
+class TurnDB(BaseModel):
+    """Result of persisting one question/answer turn."""
+
+    user_message_id: int
+    assistant_message_id: int
+    message_count: int
+
+
+class CheckpointGCResult(BaseModel):
+    """Outcome of one checkpoint maintenance pass."""
+
+    threads_purged: int = 0
+    checkpoints_deleted: int = 0
+    writes_deleted: int = 0
+    blobs_deleted: int = 0
+    bytes_reclaimed: int = 0
+
+    def summary(self) -> str:
+        return (
+            f"purged {self.threads_purged} threads, deleted {self.checkpoints_deleted} checkpoints, "
+            f"{self.writes_deleted} writes and {self.blobs_deleted} blobs "
+            f"(~{self.bytes_reclaimed / (1024 * 1024):.2f} MiB reclaimed)"
+        )
+
+
+class IngestionJobDB(BaseModel):
+    """Database model for a queued PDF indexing job."""
+
+    job_id: str
+    file_id: str
+    user_id: Optional[str] = None
+    filename: str
+    file_path: str
+    status: str = "queued"  # queued, running, completed or failed
+    attempts: int = 0
+    pages_total: Optional[int] = None
+    pages_processed: int = 0
+    chunks_indexed: int = 0
+    error: Optional[str] = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
@@ -0,0 +1,57 @@
+"""Opaque cursors for keyset pagination.
+
+A cursor holds the sort key of the last row of a page (e.g. a message's
+`(timestamp, id)`), so the next page is a range scan that starts after that
+key instead of an OFFSET that reads and throws away every earlier row. Cursors
+are URL-safe base64 of the JSON-encoded key; datetimes round-trip through ISO
+8601 with their microseconds and time zone.
+"""
+
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, Sequence, Tuple
+
+
+class InvalidCursorError(ValueError):
+    """A pagination cursor that was not produced by `encode_cursor` (or has the wrong shape)."""
+
+
+def encode_cursor(*values: Any) -> str:
+    """Encode a sort key as an opaque cursor string."""
+    key = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    return base64.urlsafe_b64encode(json.dumps(key, separators=(",", ":")).encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, types: Sequence[type]) -> Tuple[Any, ...]:
+    """Decode a cursor into its sort key.
+
+    Args:
+        cursor: Cursor returned by an earlier page.
+        types: Expected type of each key value (`datetime`, `int` or `str`).
+
+    Returns:
+        The sort key as a tuple of values of `types`.
+
+    Raises:
+        InvalidCursorError: If the cursor cannot be decoded or does not match `types`.
+    """
+
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        key = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if not isinstance(key, list) or len(key) != len(types):
+            raise ValueError("wrong number of values")
+
+        values = []
+        for value, expected in zip(key, types):
+            if expected is datetime:
+                values.append(datetime.fromisoformat(value))
+            elif isinstance(value, expected) and not isinstance(value, bool):
+                values.append(value)
+            else:
+                raise ValueError(f"expected {expected.__name__}")
+        return tuple(values)
+    except (ValueError, TypeError, UnicodeError, binascii.Error) as e:
+        raise InvalidCursorError(f"Invalid pagination cursor: {cursor!r}") from e
@@ -1,54 +1,93 @@
 import os
+import asyncio
+import contextlib
+import logging
 from fastapi import FastAPI, HTTPException, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from .api.ask import ask_router
 from .api.file import file_router
 from .api.conversation import conversation_router
 from .api.auth import auth_router
 from contextlib import asynccontextmanager
-from .db.connection import init_database, close_connection_pool
-from .db.checkpointer import get_postgres_checkpointer, close_checkpointer
+from .db.connection import init_database, close_connection_pool, get_async_connection_pool, close_async_connection_pool
+from .db.checkpointer import get_postgres_checkpointer, close_checkpointer, get_async_postgres_checkpointer, close_async_checkpointer
+from .core.logging_config import configure_logging
+from .core.tracing import span, render_prometheus
+from .core.llm.factory import get_llm_cache
+
+logger = logging.getLogger(__name__)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     import sys
-    print("=" * 60)
-    print("Starting application...")
-    print(f"Python version: {sys.version}")
-    print(f"Working directory: {os.getcwd()}")
-    print("=" * 60)
+    configure_logging()
+    logger.info("Starting application (Python %s, working directory %s)", sys.version.split()[0], os.getcwd())
+
+    gc_task = None
+    worker_stop = None
 
     try:
         from .core.config import get_settings
         settings = get_settings()
 
-        print("Initializing database...")
+        logger.info("Initializing database...")
         init_database()
-        print("Database initialized")
+        logger.info("Database initialized")
 
-        print("Initializing LangGraph checkpointer...")
+        logger.info("Initializing LangGraph checkpointer...")
         get_postgres_checkpointer()
-        print("LangGraph checkpointer initialized")
+        logger.info("LangGraph checkpointer initialized")
+    
+        logger.info("Initializing async database pool and checkpointer...")
+        await get_async_connection_pool()
+        await get_async_postgres_checkpointer()
+        logger.info("Async database pool and checkpointer initialized")
     
-        from .core.agents.graph import get_qa_graph 
+        from .core.agents.graph import get_qa_graph, get_async_qa_graph, get_stateless_qa_graph
         get_qa_graph()
-        print("QA graph warmed up")
-
-        print("Startup complete!")
+        await get_async_qa_graph()
+        get_stateless_qa_graph()
+        logger.info("QA graph warmed up")
+
+        if settings.checkpoint_gc_interval_minutes > 0:
+            from .db.checkpoint_maintenance import checkpoint_gc_loop
+            gc_task = asyncio.create_task(checkpoint_gc_loop(settings.checkpoint_gc_interval_minutes))
+            logger.info("Checkpoint maintenance scheduled every %s minutes", settings.checkpoint_gc_interval_minutes)
+
+        if settings.ingestion_worker_threads > 0:
+            from .worker import start_worker_threads
+            worker_stop, _ = start_worker_threads(settings.ingestion_worker_threads)
+            logger.info("Started %s in-process ingestion worker(s)", settings.ingestion_worker_threads)
+        else:
+            logger.warning("No in-process ingestion workers: uploads stay queued until `python -m src.app.worker` runs")
+
+        logger.info("Startup complete!")
     except Exception as e:
-        import traceback
-        print(f"STARTUP FAILED: {e}")
-        traceback.print_exc()
+        logger.exception("STARTUP FAILED: %s", e)
         raise
 
     yield
 
-    print("Shutting down application...")
+    logger.info("Shutting down application...")
+    if worker_stop is not None:
+        worker_stop.set()
+    if gc_task is not None:
+        gc_task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await gc_task
+    from .services.pdf_parser import shutdown_pdf_parse_pool
+    shutdown_pdf_parse_pool()
+    from .core.agents.memory import shutdown_memory_summaries
+    await shutdown_memory_summaries()
+    from .core.llm.factory import close_http_clients
+    await close_http_clients()
     close_checkpointer()       
     close_connection_pool()
-    print("Database connections closed!")
+    await close_async_checkpointer()
+    await close_async_connection_pool()
+    logger.info("Database connections closed!")
 
 
 server = FastAPI(
@@ -82,6 +121,8 @@ server.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],  
     allow_headers=["*"], 
+    # pagination cursor of GET /conversations/
+    expose_headers=["X-Next-Cursor"],
 )
 
 @server.get("/health")
@@ -117,6 +158,43 @@ def ping():
     """Lightweight liveness endpoint used by keep-alive probes."""
     return {"status": "alive"}
 
+
+@server.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Span latency histograms, LLM token counts and cache hits in Prometheus text format."""
+    body = render_prometheus()
+    llm_cache = get_llm_cache()
+    if llm_cache is not None:
+        body += llm_cache.render_prometheus()
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4")
+
+
+# tracing
+@server.middleware("http")
+async def trace_requests(request: Request, call_next):
+    """Trace every request as a "request" span, the root of its graph, retrieval and DB spans.
+
+    The span ends once the response body has been sent, so streamed answers
+    are timed in full rather than up to their first byte.
+    """
+    with contextlib.ExitStack() as stack:
+        request_span = stack.enter_context(span(request.method, "request"))
+        response = await call_next(request)
+        if request_span is not None:
+            # name by route template (not the raw path) to keep metric labels bounded
+            route = request.scope.get("route")
+            request_span.name = f"{request.method} {getattr(route, 'path', 'unmatched')}"
+            request_span.set(status_code=response.status_code)
+        response.body_iterator = _close_after_body(response.body_iterator, stack.pop_all())
+        return response
+
+
+async def _close_after_body(body, stack: contextlib.ExitStack):
+    """Pass the response body through, then close the request span."""
+    with stack:
+        async for chunk in body:
+            yield chunk
+
 # exception handling 
 @server.exception_handler(Exception)
 async def unhandled_exception_handler(
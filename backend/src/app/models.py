@@ -1,3 +1,5 @@
+from typing import Literal, Optional
+
 from pydantic import BaseModel
 
 
@@ -9,6 +11,7 @@ class QuestionRequest(BaseModel):
     """
 
     question: str
+    retrieval_mode: Optional[Literal["agentic", "direct"]] = None
 
 
 class QAResponse(BaseModel):
@@ -1,10 +1,43 @@
 """Service layer for managing conversational QA with PostgreSQL persistence."""
 
-from typing import Dict, Any, Optional
+import asyncio
+import logging
+from typing import Dict, Any, AsyncIterator, Iterator, Optional
 from uuid import uuid4
-from datetime import datetime
+from datetime import datetime, timezone
 from ..db.db_service import get_conversation_db_service
-from ..core.agents.graph import run_qa_flow_with_history, get_conversation_state
+from ..db.async_db_service import get_async_conversation_db_service
+from ..db.checkpointer import get_postgres_checkpointer, get_async_postgres_checkpointer
+from ..core.agents.graph import (
+    run_qa_flow_with_history, arun_qa_flow_with_history,
+    stream_qa_flow_with_history, astream_qa_flow_with_history,
+    get_conversation_state, aget_conversation_state,
+)
+from ..core.agents.turns import history_text
+
+logger = logging.getLogger(__name__)
+
+
+class _TurnClock:
+    """Timestamp of a turn's question: the time the turn took the conversation's lock.
+
+    Concurrent turns of one conversation queue on that lock, so their
+    questions are ordered the way the turns ran. A flow that fails before
+    taking the lock falls back to the current time.
+    """
+
+    def __init__(self) -> None:
+        self._asked_at: Optional[datetime] = None
+
+    def start(self, at: datetime) -> None:
+        self._asked_at = at
+
+    @property
+    def asked_at(self) -> datetime:
+        if self._asked_at is None:
+            self._asked_at = datetime.now(timezone.utc)
+        return self._asked_at
+
 
 class ConversationService:
     """Service for managing multi-turn conversations with PostgreSQL persistence.
@@ -15,10 +48,14 @@ class ConversationService:
     
     Each conversation is identified by a session_id (thread_id), and both
     LangGraph and our PostgreSQL database track the conversation history.
+
+    Methods prefixed with `a` are async counterparts used by the API layer;
+    they go through the async connection pool and the async graph.
     """ 
    
     def __init__(self):
         self.db_service = get_conversation_db_service()
+        self.async_db_service = get_async_conversation_db_service()
 
     # create new conversation
     def create_conversation(self, file_id: str = None, user_id: Optional[str] = None) -> str:
@@ -64,86 +101,208 @@ class ConversationService:
         return conversation.user_id == user_id    
         
 
+    # load the conversation for a turn, checking ownership when a user is given
+    def _load_turn_conversation(self, session_id: str, user_id: Optional[str]):
+        if user_id is not None:
+            return self.db_service.get_owned_conversation(session_id, user_id)
+
+        conversation = self.db_service.get_conversation(session_id=session_id)
+        if not conversation:
+            raise ValueError(f"Session {session_id} not found")
+        return conversation
+
+    # keep the question of a turn whose flow failed
+    def _save_unanswered_question(self, session_id: str, question: str, asked_at: datetime) -> None:
+        try:
+            self.db_service.add_message(
+                session_id=session_id,
+                role="USER",
+                content=question,
+                metadata={"timestamp": asked_at.isoformat()}
+            )
+        except Exception as e:
+            logger.warning("Could not store the question of a failed turn in %s: %s", session_id, e)
+
     # ask questions
-    def ask_question(self, session_id: str, question: str) -> Dict[str, Any]:
+    def ask_question(self, session_id: str, question: str, retrieval_mode: Optional[str] = None, user_id: Optional[str] = None) -> Dict[str, Any]:
         """Ask a question within a conversation context.
         
         LangGraph's PostgreSQL checkpointer automatically manages conversation history
         via the thread_id (session_id). We also store messages in our custom database
         for additional querying capabilities.
+
+        The conversation is loaded (and ownership checked) with one query, and
+        both messages of the turn are written in one transaction once the
+        answer is ready. If the flow fails, the question is still stored on
+        its own so it shows up in the history.
         
         Args:
             session_id: The conversation session ID (used as thread_id).
             question: The user's question.
+            retrieval_mode: Optional override ("agentic" or "direct") for this turn.
+            user_id: Optional user ID that must own the conversation.
         
         Returns:
             Dictionary containing answer, context, and session information.
         
         Raises:
-            ValueError: If session_id is not found.
+            ValueError: If session_id is not found (or is deleted during the turn).
+            PermissionError: If user_id does not own the conversation.
         """
 
-        # verify session exists
-        conversation = self.db_service.get_conversation(session_id=session_id)
-        if not conversation:
-            raise ValueError(f"Session {session_id} not found")
-        
-        file_id = conversation.active_file_id
-        
-        # add user msg to db 
-        self.db_service.add_message(
-            session_id=session_id,
-            role="USER",
-            content=question,
-            metadata={"timestamp": datetime.utcnow().isoformat()}
-        )
+        conversation = self._load_turn_conversation(session_id, user_id)
+        clock = _TurnClock()
 
         # Run QA flow with history
-        result = run_qa_flow_with_history(question, thread_id=session_id, file_id=file_id)
+        try:
+            result = run_qa_flow_with_history(
+                question,
+                thread_id=session_id,
+                file_id=conversation.active_file_id,
+                retrieval_mode=retrieval_mode,
+                on_start=clock.start
+            )
+        except Exception:
+            self._save_unanswered_question(session_id, question, clock.asked_at)
+            raise
         answer = result.get("answer", "")
+        asked_at = clock.asked_at
 
-        # Add assistant response to database
-        self.db_service.add_message(
+        # store the question and answer together
+        turn = self.db_service.add_turn(
             session_id=session_id,
-            role="Assistant", 
-            content=answer,
-            metadata={
+            question=question,
+            answer=answer,
+            asked_at=asked_at,
+            user_metadata={"timestamp": asked_at.isoformat()},
+            assistant_metadata={
                 "timestamp": datetime.utcnow().isoformat(),
-                "context": result.get("context", "")[:500]
+                "context": result.get("context", "")[:500],
+                "verification_path": result.get("verification_path"),
+                "grounding_score": result.get("grounding_score")
             }
         )
 
-        updated_conversation = self.db_service.get_conversation(session_id)
-
         return {
             "session_id": session_id,
             "answer": answer,
             "context": result.get("context", ""),
-            "message_count": updated_conversation.message_count if updated_conversation else 0,
-            "conversation_history": result.get("conversation_history", "")
+            "message_count": turn.message_count,
+            "conversation_history": history_text(result)
         }
 
 
-    def get_conversation_history(self, session_id: str, limit:Optional[int] = None ) -> Dict[str, any]:
+    # ask questions (streaming)
+    def stream_question(self, session_id: str, question: str, retrieval_mode: Optional[str] = None, user_id: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """Ask a question within a conversation and stream progress events.
+
+        The session is validated (and ownership checked) before this method
+        returns, so errors surface before any event is sent. The returned
+        iterator yields the graph's stage and token events, stores the turn
+        once the flow finishes, and ends with a `done` event. If the flow fails
+        or the client stops reading first, the question is stored on its own.
+
+        Args:
+            session_id: The conversation session ID (used as thread_id).
+            question: The user's question.
+            retrieval_mode: Optional override ("agentic" or "direct") for this turn.
+            user_id: Optional user ID that must own the conversation.
+
+        Returns:
+            Iterator of event dictionaries with `event` and `data` keys.
+
+        Raises:
+            ValueError: If session_id is not found.
+            PermissionError: If user_id does not own the conversation.
+        """
+
+        conversation = self._load_turn_conversation(session_id, user_id)
+        return self._stream_turn(session_id, question, conversation.active_file_id, retrieval_mode)
+
+    def _stream_turn(self, session_id: str, question: str, file_id: Optional[str], retrieval_mode: Optional[str]) -> Iterator[Dict[str, Any]]:
+        final_state: Dict[str, Any] = {}
+        stored = False
+        clock = _TurnClock()
+
+        try:
+            for event in stream_qa_flow_with_history(
+                question,
+                thread_id=session_id,
+                file_id=file_id,
+                retrieval_mode=retrieval_mode,
+                on_start=clock.start
+            ):
+                if event["event"] == "final":
+                    final_state = event["data"]
+                    continue
+                yield event
+
+            answer = final_state.get("answer", "")
+            asked_at = clock.asked_at
+
+            # store the question and answer together
+            turn = self.db_service.add_turn(
+                session_id=session_id,
+                question=question,
+                answer=answer,
+                asked_at=asked_at,
+                user_metadata={"timestamp": asked_at.isoformat()},
+                assistant_metadata={
+                    "timestamp": datetime.utcnow().isoformat(),
+                    "context": (final_state.get("context") or "")[:500],
+                    "verification_path": final_state.get("verification_path"),
+                    "grounding_score": final_state.get("grounding_score")
+                }
+            )
+            stored = True
+        finally:
+            # the flow failed or the client disconnected before the turn was stored
+            if not stored:
+                self._save_unanswered_question(session_id, question, clock.asked_at)
+
+        yield {
+            "event": "done",
+            "data": {
+                "session_id": session_id,
+                "answer": answer,
+                "context": final_state.get("context", ""),
+                "message_id": turn.assistant_message_id,
+                "message_count": turn.message_count,
+                "conversation_history": history_text(final_state)
+            }
+        }
+
+
+    def get_conversation_history(
+        self,
+        session_id: str,
+        limit: Optional[int] = None,
+        before: Optional[str] = None,
+        after: Optional[str] = None
+    ) -> Dict[str, any]:
          
         """Retrieve the conversation from PostgreSQL database.
         
         Args:
             session_id: The conversation session ID.
-            limit: Optional limit on number of messages to retrieve.
+            limit: Optional limit on number of messages to retrieve (the latest, without a cursor).
+            before: Optional cursor from an earlier page: return older messages.
+            after: Optional cursor from an earlier page: return newer messages.
         
         Returns:
-            Dictionary with session info, messages, and current state.
+            Dictionary with session info, a page of messages with the cursors
+            to the older and newer pages, and current state.
         
         Raises:
             ValueError: If session_id is not found.
+            InvalidCursorError: If a cursor is malformed.
         """
         
-        conversation = self.db_service.get_conversation(session_id, include_messages=True)
+        conversation = self.db_service.get_conversation(session_id)
         if not conversation:
             raise ValueError(f"Session {session_id} not found")
         
-        messages = self.db_service.get_messages(session_id, limit)
+        page = self.db_service.get_message_page(session_id, limit=limit, before=before, after=after)
 
         # get the LangGraph state
         state = get_conversation_state(session_id)   
@@ -168,19 +327,21 @@ class ConversationService:
                     "content": msg.content,
                     "timestamp": msg.timestamp.isoformat()
                 }
-                for msg in messages
+                for msg in page.messages
             ],
+            "before_cursor": page.before_cursor,
+            "after_cursor": page.after_cursor,
             "current_state": state or {},
-            "conversation_history": state.get("conversation_history", "") if state else ""                                                
+            "conversation_history": history_text(state)
         }
 
 
     def delete_conversation(self, session_id: str) -> bool:
         """Delete a conversation session from PostgreSQL.
         
-        Note: This removes the conversation from our database. The LangGraph
-        checkpointer state also persists in PostgreSQL and will be automatically
-        cleaned up or can be managed separately.
+        Removes the conversation (and its messages) from our database, then the
+        thread's LangGraph checkpoints. If dropping the checkpoints fails, the
+        checkpoint maintenance task purges them later.
         
         Args:
             session_id: The conversation session ID.
@@ -188,20 +349,33 @@ class ConversationService:
         Returns:
             True if deleted, False if not found.
         """
-        return self.db_service.delete_conversation(session_id)  
+        deleted = self.db_service.delete_conversation(session_id)
 
+        if deleted:
+            try:
+                get_postgres_checkpointer().delete_thread(session_id)
+            except Exception as e:
+                logger.warning("Could not delete checkpoints for thread %s: %s", session_id, e)
 
-    def list_conversations(self, limit: Optional[int] = None, user_id: Optional[str] = None) -> list[Dict[str, Any]]:
-        """List all conversations from PostgreSQL, optionally filtered by user.
+        return deleted
+
+
+    def list_conversations(self, limit: Optional[int] = None, user_id: Optional[str] = None, cursor: Optional[str] = None) -> Dict[str, Any]:
+        """List conversations from PostgreSQL, most recently updated first, optionally filtered by user.
         
         Args:
             limit: Optional limit on number of conversations to return.
             user_id: Optional user ID to filter conversations.
+            cursor: Optional `next_cursor` of an earlier page: continue after it.
         
         Returns:
-            List of conversation summaries.
+            Dictionary with the page's conversation summaries and the cursor of
+            the next page (None when this is the last page).
+
+        Raises:
+            InvalidCursorError: If the cursor is malformed.
         """
-        conversations = self.db_service.list_conversations(limit=limit, user_id=user_id)
+        page = self.db_service.list_conversation_page(limit=limit, user_id=user_id, cursor=cursor)
 
         result = [
             {
@@ -212,10 +386,230 @@ class ConversationService:
                 "active_file_id": conv.active_file_id,
                 "filename": conv.filename 
             }
-            for conv in conversations
+            for conv in page.conversations
         ]
         
-        return result
+        return {"conversations": result, "next_cursor": page.next_cursor}
+    
+
+    # async counterparts
+    async def acreate_conversation(self, file_id: str = None, user_id: Optional[str] = None) -> str:
+        """Async counterpart of `create_conversation()`."""
+        session_id = str(uuid4())
+
+        await self.async_db_service.create_conversation(
+            session_id=session_id,
+            metadata={"created_at": datetime.utcnow().isoformat()},
+            active_file_id=file_id,
+            user_id=user_id
+        )
+
+        return session_id
+
+    async def averify_conversation_ownership(self, session_id: str, user_id: str) -> bool:
+        """Async counterpart of `verify_conversation_ownership()`."""
+        conversation = await self.async_db_service.get_conversation(session_id=session_id)
+        if not conversation:
+            return False
+        return conversation.user_id == user_id
+
+    async def _aload_turn_conversation(self, session_id: str, user_id: Optional[str]):
+        if user_id is not None:
+            return await self.async_db_service.get_owned_conversation(session_id, user_id)
+
+        conversation = await self.async_db_service.get_conversation(session_id=session_id)
+        if not conversation:
+            raise ValueError(f"Session {session_id} not found")
+        return conversation
+
+    async def _asave_unanswered_question(self, session_id: str, question: str, asked_at: datetime) -> None:
+        try:
+            await self.async_db_service.add_message(
+                session_id=session_id,
+                role="USER",
+                content=question,
+                metadata={"timestamp": asked_at.isoformat()}
+            )
+        except Exception as e:
+            logger.warning("Could not store the question of a failed turn in %s: %s", session_id, e)
+
+    async def aask_question(self, session_id: str, question: str, retrieval_mode: Optional[str] = None, user_id: Optional[str] = None) -> Dict[str, Any]:
+        """Async counterpart of `ask_question()`."""
+        conversation = await self._aload_turn_conversation(session_id, user_id)
+        clock = _TurnClock()
+
+        try:
+            result = await arun_qa_flow_with_history(
+                question,
+                thread_id=session_id,
+                file_id=conversation.active_file_id,
+                retrieval_mode=retrieval_mode,
+                on_start=clock.start
+            )
+        except Exception:
+            await self._asave_unanswered_question(session_id, question, clock.asked_at)
+            raise
+        answer = result.get("answer", "")
+        asked_at = clock.asked_at
+
+        turn = await self.async_db_service.add_turn(
+            session_id=session_id,
+            question=question,
+            answer=answer,
+            asked_at=asked_at,
+            user_metadata={"timestamp": asked_at.isoformat()},
+            assistant_metadata={
+                "timestamp": datetime.utcnow().isoformat(),
+                "context": result.get("context", "")[:500],
+                "verification_path": result.get("verification_path"),
+                "grounding_score": result.get("grounding_score")
+            }
+        )
+
+        return {
+            "session_id": session_id,
+            "answer": answer,
+            "context": result.get("context", ""),
+            "message_count": turn.message_count,
+            "conversation_history": history_text(result)
+        }
+
+    async def astream_question(self, session_id: str, question: str, retrieval_mode: Optional[str] = None, user_id: Optional[str] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Async counterpart of `stream_question()`.
+
+        The session is validated (and ownership checked) before the async
+        iterator is returned.
+        """
+        conversation = await self._aload_turn_conversation(session_id, user_id)
+        return self._astream_turn(session_id, question, conversation.active_file_id, retrieval_mode)
+
+    async def _astream_turn(self, session_id: str, question: str, file_id: Optional[str], retrieval_mode: Optional[str]) -> AsyncIterator[Dict[str, Any]]:
+        final_state: Dict[str, Any] = {}
+        stored = False
+        clock = _TurnClock()
+
+        try:
+            async for event in astream_qa_flow_with_history(
+                question,
+                thread_id=session_id,
+                file_id=file_id,
+                retrieval_mode=retrieval_mode,
+                on_start=clock.start
+            ):
+                if event["event"] == "final":
+                    final_state = event["data"]
+                    continue
+                yield event
+
+            answer = final_state.get("answer", "")
+            asked_at = clock.asked_at
+
+            turn = await self.async_db_service.add_turn(
+                session_id=session_id,
+                question=question,
+                answer=answer,
+                asked_at=asked_at,
+                user_metadata={"timestamp": asked_at.isoformat()},
+                assistant_metadata={
+                    "timestamp": datetime.utcnow().isoformat(),
+                    "context": (final_state.get("context") or "")[:500],
+                    "verification_path": final_state.get("verification_path"),
+                    "grounding_score": final_state.get("grounding_score")
+                }
+            )
+            stored = True
+        finally:
+            # the flow failed or the client disconnected before the turn was stored
+            if not stored:
+                await asyncio.shield(self._asave_unanswered_question(session_id, question, clock.asked_at))
+
+        yield {
+            "event": "done",
+            "data": {
+                "session_id": session_id,
+                "answer": answer,
+                "context": final_state.get("context", ""),
+                "message_id": turn.assistant_message_id,
+                "message_count": turn.message_count,
+                "conversation_history": history_text(final_state)
+            }
+        }
+
+    async def aget_conversation_history(
+        self,
+        session_id: str,
+        limit: Optional[int] = None,
+        before: Optional[str] = None,
+        after: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Async counterpart of `get_conversation_history()`."""
+        conversation = await self.async_db_service.get_conversation(session_id)
+        if not conversation:
+            raise ValueError(f"Session {session_id} not found")
+
+        page = await self.async_db_service.get_message_page(session_id, limit=limit, before=before, after=after)
+
+        # get the LangGraph state
+        state = await aget_conversation_state(session_id)
+
+        filename = None
+        if conversation.active_file_id:
+            file_record = await self.async_db_service.get_file_record(conversation.active_file_id)
+            if file_record:
+                filename = file_record.filename
+
+        return {
+            "session_id": session_id,
+            "created_at": conversation.created_at.isoformat(),
+            "updated_at": conversation.updated_at.isoformat(),
+            "message_count": conversation.message_count,
+            "active_file_id": conversation.active_file_id,
+            "filename": filename,
+            "messages": [
+                {
+                    "role": msg.role,
+                    "content": msg.content,
+                    "timestamp": msg.timestamp.isoformat()
+                }
+                for msg in page.messages
+            ],
+            "before_cursor": page.before_cursor,
+            "after_cursor": page.after_cursor,
+            "current_state": state or {},
+            "conversation_history": history_text(state)
+        }
+
+    async def adelete_conversation(self, session_id: str) -> bool:
+        """Async counterpart of `delete_conversation()`."""
+        deleted = await self.async_db_service.delete_conversation(session_id)
+
+        if deleted:
+            try:
+                checkpointer = await get_async_postgres_checkpointer()
+                await checkpointer.adelete_thread(session_id)
+            except Exception as e:
+                logger.warning("Could not delete checkpoints for thread %s: %s", session_id, e)
+
+        return deleted
+
+    async def alist_conversations(self, limit: Optional[int] = None, user_id: Optional[str] = None, cursor: Optional[str] = None) -> Dict[str, Any]:
+        """Async counterpart of `list_conversations()`."""
+        page = await self.async_db_service.list_conversation_page(limit=limit, user_id=user_id, cursor=cursor)
+
+        return {
+            "conversations": [
+                {
+                    "session_id": conv.session_id,
+                    "created_at": conv.created_at.isoformat(),
+                    "updated_at": conv.updated_at.isoformat(),
+                    "message_count": conv.message_count,
+                    "active_file_id": conv.active_file_id,
+                    "filename": conv.filename
+                }
+                for conv in page.conversations
+            ],
+            "next_cursor": page.next_cursor
+        }
     
 
 _conversation_service : Optional[ConversationService] = None
@@ -1,29 +1,105 @@
 """Service functions for indexing documents into the vector database."""
 
-from typing import Optional
-from langchain_community.document_loaders import PyPDFLoader
+import asyncio
+from typing import Callable, Iterator, Optional
+from langchain_core.documents import Document
 from ..core.retrieval.vector_store import index_documents
+from .pdf_parser import iter_pdf_pages
 from ..db.db_service import get_conversation_db_service
+from ..db.async_db_service import get_async_conversation_db_service
 from datetime import datetime
 
-def index_pdf_file(file_path: str, file_id: str, filename: str, user_id: Optional[str] = None) -> int:
+# progress_callback(pages_processed, pages_total, chunks_indexed)
+ProgressCallback = Callable[[int, Optional[int], int], None]
+
+def index_pdf_file(
+    file_path: str,
+    file_id: str,
+    filename: str,
+    user_id: Optional[str] = None,
+    register_file: bool = True,
+    progress_callback: Optional[ProgressCallback] = None,
+) -> int:
     """Load a PDF from disk and index it into the vector DB with file tracking.
 
+    Pages are parsed in a process pool (see `iter_pdf_pages`), streamed in page
+    order and indexed in batches (see `index_documents`), so memory stays
+    bounded for large documents and every chunk keeps the number of the page
+    it came from.
+
     Args:
         file_path: Path to the PDF file on disk.
         file_id: Unique identifier for this file.
         filename: Original filename for tracking.
         user_id: User ID who uploaded the file.
+        register_file: Create the `files` record (False when it was created
+            together with an ingestion job).
+        progress_callback: Optional callable receiving
+            (pages_processed, pages_total, chunks_indexed) after every batch.
 
     Returns:
         Number of document chunks indexed.
     """
-    loader = PyPDFLoader(str(file_path), mode="single")
-    docs = loader.load()
 
     # Store file metadata in database
-    db_service = get_conversation_db_service()
-    db_service.create_file_record(
+    if register_file:
+        db_service = get_conversation_db_service()
+        db_service.create_file_record(
+            file_id=file_id,
+            filename=filename,
+            file_path=str(file_path),
+            user_id=user_id,
+            metadata={"uploaded_at": datetime.utcnow().isoformat()}
+        )
+
+    pages_total: dict = {"value": None}
+
+    def on_progress(pages_processed: int, chunks_indexed: int) -> None:
+        if progress_callback:
+            progress_callback(pages_processed, pages_total["value"], chunks_indexed)
+
+    # Index pages with file_id metadata
+    return index_documents(
+        _load_pages(file_path, pages_total),
+        file_id=file_id,
+        filename=filename,
+        on_progress=on_progress
+    )
+
+
+def _load_pages(file_path: str, pages_total: dict) -> Iterator[Document]:
+    """Yield the PDF one page at a time, recording the page count as it is read."""
+    for page in iter_pdf_pages(str(file_path)):
+        pages_total["value"] = page.metadata.get("total_pages", pages_total["value"])
+        yield page
+
+
+async def aindex_pdf_file(
+    file_path: str,
+    file_id: str,
+    filename: str,
+    user_id: Optional[str] = None,
+    progress_callback: Optional[ProgressCallback] = None,
+) -> int:
+    """Async counterpart of `index_pdf_file()`.
+
+    The file record is awaited on the event loop; parsing, embedding and
+    upserting run as the streaming pipeline in a worker thread.
+
+    Args:
+        file_path: Path to the PDF file on disk.
+        file_id: Unique identifier for this file.
+        filename: Original filename for tracking.
+        user_id: User ID who uploaded the file.
+        progress_callback: Optional progress callable (see `index_pdf_file`).
+
+    Returns:
+        Number of document chunks indexed.
+    """
+
+    # Store file metadata in database
+    db_service = get_async_conversation_db_service()
+    await db_service.create_file_record(
         file_id=file_id,
         filename=filename,
         file_path=str(file_path),
@@ -31,5 +107,12 @@ def index_pdf_file(file_path: str, file_id: str, filename: str, user_id: Optiona
         metadata={"uploaded_at": datetime.utcnow().isoformat()}
     )
 
-    # Index documents with file_id metadata
-    return index_documents(docs, file_id=file_id, filename=filename)
\ No newline at end of file
+    return await asyncio.to_thread(
+        index_pdf_file,
+        file_path,
+        file_id=file_id,
+        filename=filename,
+        user_id=user_id,
+        register_file=False,
+        progress_callback=progress_callback,
+    )
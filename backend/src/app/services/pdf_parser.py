@@ -0,0 +1,141 @@
+"""Parallel PDF text extraction.
+
+pypdf text extraction is pure Python and CPU-bound, so parsing a large PDF in
+the API process holds the GIL for the whole document. `iter_pdf_pages` splits
+the document into page ranges, extracts them in a shared process pool and
+yields the pages back in order, producing the same per-page Documents as
+`PyPDFLoader(mode="page")`.
+
+Only a few ranges are in flight at a time, so pages are still streamed to the
+indexing pipeline instead of being held in memory all at once.
+"""
+
+import multiprocessing
+import os
+import threading
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Deque, Dict, Iterator, List, Optional, Tuple
+
+from langchain_core.documents import Document
+from pypdf import PdfReader
+
+from ..core.config import get_settings
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+# upper bound for the automatic worker count
+_MAX_AUTO_WORKERS = 4
+
+
+def _extract_pages(file_path: str, start: int, end: int) -> List[Tuple[int, str, str]]:
+    """Extract (page index, text, page label) for pages [start, end). Runs in a pool process."""
+    reader = PdfReader(file_path)
+    labels = reader.page_labels
+    return [
+        (index, reader.pages[index].extract_text(extraction_mode="plain").strip(), labels[index])
+        for index in range(start, end)
+    ]
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    """Get the shared parsing pool, recreating it if the worker count changed."""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False, cancel_futures=True)
+            # spawn, not fork: the API process runs threads (and DB pools) that must not be forked
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            _pool_workers = workers
+        return _pool
+
+
+def shutdown_pdf_parse_pool() -> None:
+    """Stop the shared parsing pool (called on application shutdown)."""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+            _pool_workers = 0
+
+
+def _resolve_workers(workers: int) -> int:
+    """Turn the configured worker count into a pool size (0 = one per spare CPU, capped)."""
+    if workers > 0:
+        return workers
+    return max(1, min(_MAX_AUTO_WORKERS, (os.cpu_count() or 1) - 1))
+
+
+def _document_metadata(reader: PdfReader, file_path: str) -> Dict[str, object]:
+    """Document-level metadata in the shape PyPDFLoader produces."""
+    metadata: Dict[str, object] = {"producer": "PyPDF", "creator": "PyPDF", "creationdate": ""}
+    for key, value in (reader.metadata or {}).items():
+        metadata[str(key).lstrip("/").lower()] = str(value)
+    metadata["source"] = file_path
+    metadata["total_pages"] = len(reader.pages)
+    return metadata
+
+
+def iter_pdf_pages(file_path: str, workers: Optional[int] = None, pages_per_task: Optional[int] = None) -> Iterator[Document]:
+    """Yield one Document per PDF page, in page order, parsing page ranges in parallel.
+
+    Args:
+        file_path: Path to the PDF file on disk.
+        workers: Parsing processes (defaults to `settings.pdf_parse_workers`; 0 sizes
+            the pool from the CPU count). With 1, pages are parsed in the calling thread.
+        pages_per_task: Pages per range handed to a process
+            (defaults to `settings.pdf_parse_pages_per_task`).
+
+    Yields:
+        Documents with `page`, `page_label`, `total_pages` and `source` metadata.
+    """
+    if workers is None or pages_per_task is None:
+        settings = get_settings()
+        workers = settings.pdf_parse_workers if workers is None else workers
+        pages_per_task = settings.pdf_parse_pages_per_task if pages_per_task is None else pages_per_task
+    workers = _resolve_workers(workers)
+    pages_per_task = max(1, pages_per_task)
+    file_path = str(file_path)
+
+    reader = PdfReader(file_path)
+    total_pages = len(reader.pages)
+    metadata = _document_metadata(reader, file_path)
+
+    # a single range is not worth a round trip through the pool
+    if workers <= 1 or total_pages <= pages_per_task:
+        labels = reader.page_labels
+        for index, page in enumerate(reader.pages):
+            text = page.extract_text(extraction_mode="plain").strip()
+            yield Document(page_content=text, metadata={**metadata, "page": index, "page_label": labels[index]})
+        return
+
+    ranges = iter([(start, min(start + pages_per_task, total_pages)) for start in range(0, total_pages, pages_per_task)])
+    pool = _get_pool(workers)
+    pending: Deque[Future] = deque()
+
+    def submit_next() -> None:
+        page_range = next(ranges, None)
+        if page_range is not None:
+            pending.append(pool.submit(_extract_pages, file_path, *page_range))
+
+    # keep every process busy plus one queued range each, without parsing far ahead of the consumer
+    for _ in range(workers * 2):
+        submit_next()
+
+    try:
+        while pending:
+            pages = pending.popleft().result()
+            submit_next()
+            for index, text, label in pages:
+                yield Document(page_content=text, metadata={**metadata, "page": index, "page_label": label})
+    except BrokenProcessPool:
+        shutdown_pdf_parse_pool()
+        raise
+    finally:
+        for future in pending:
+            future.cancel()
@@ -5,17 +5,32 @@ with the multi-agent RAG pipeline without depending directly on LangGraph
 or agent implementation details.
 """
 from typing import Dict, Any
-from ..core.agents.graph import run_qa_flow
+from ..core.agents.graph import run_qa_flow, arun_qa_flow
 
-def answer_question(question: str) -> Dict[str, Any]:
+def answer_question(question: str, retrieval_mode: str | None = None) -> Dict[str, Any]:
     """Run the multi-agent QA flow for a given question.
 
     Args:
         question: User's natural language question about the vector databases paper.
+        retrieval_mode: Optional override ("agentic" or "direct") for this request.
 
     Returns:
         Dictionary containing at least `answer` and `context` keys.
     """
 
     # run the qa flow
-    return run_qa_flow(question)
+    return run_qa_flow(question, retrieval_mode=retrieval_mode)
+
+
+async def aanswer_question(question: str, retrieval_mode: str | None = None) -> Dict[str, Any]:
+    """Async counterpart of `answer_question()` for use from async endpoints.
+
+    Args:
+        question: User's natural language question about the vector databases paper.
+        retrieval_mode: Optional override ("agentic" or "direct") for this request.
+
+    Returns:
+        Dictionary containing at least `answer` and `context` keys.
+    """
+
+    return await arun_qa_flow(question, retrieval_mode=retrieval_mode)
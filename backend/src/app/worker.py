@@ -0,0 +1,176 @@
+"""Worker that processes queued PDF ingestion jobs.
+
+Workers poll the `ingestion_jobs` table and run `index_pdf_file` for each job
+they claim. They only need the database, the vector store and access to the
+uploaded files, so ingestion can be scaled by running more of them:
+
+    python -m src.app.worker
+
+The API can also run workers in-process (`INGESTION_WORKER_THREADS`), which is
+the default for single-instance deployments.
+"""
+
+import argparse
+import logging
+import os
+import socket
+import threading
+import uuid
+from typing import List, Optional, Tuple
+
+from .core.config import get_settings
+from .core.logging_config import configure_logging
+from .db.connection import init_database, close_connection_pool
+from .db.job_queue import get_job_queue
+from .db.models import IngestionJobDB
+from .services.indexing_service import index_pdf_file
+from .services.pdf_parser import shutdown_pdf_parse_pool
+
+logger = logging.getLogger(__name__)
+
+
+def _default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class JobLostError(Exception):
+    """The job went stale and was re-queued while this worker was still on it."""
+
+
+def process_job(job: IngestionJobDB, worker_id: str) -> int:
+    """Index a claimed job's PDF, reporting progress to the queue.
+
+    Args:
+        job: The claimed job.
+        worker_id: The worker that claimed it.
+
+    Returns:
+        Number of document chunks indexed.
+
+    Raises:
+        JobLostError: The job is no longer held by `worker_id`. Indexing stops
+            at the next progress report; chunks already written are upserted by
+            id, so the job's next attempt does not duplicate them.
+    """
+    queue = get_job_queue()
+
+    def report(pages_processed: int, pages_total: Optional[int], chunks_indexed: int) -> None:
+        if not queue.update_progress(job.job_id, worker_id, pages_processed, pages_total, chunks_indexed):
+            raise JobLostError(f"Ingestion job {job.job_id} is no longer held by {worker_id}")
+
+    chunks_indexed = index_pdf_file(
+        job.file_path,
+        file_id=job.file_id,
+        filename=job.filename,
+        user_id=job.user_id,
+        register_file=False,
+        progress_callback=report,
+    )
+    if not queue.complete(job.job_id, worker_id, chunks_indexed):
+        raise JobLostError(f"Ingestion job {job.job_id} is no longer held by {worker_id}")
+    return chunks_indexed
+
+
+def run_worker(
+    worker_id: Optional[str] = None,
+    poll_interval: Optional[float] = None,
+    stop_event: Optional[threading.Event] = None,
+    once: bool = False,
+) -> int:
+    """Claim and process jobs until stopped.
+
+    Args:
+        worker_id: Identifier stored on claimed jobs (defaults to host:pid:random).
+        poll_interval: Seconds to wait when the queue is empty
+            (defaults to `settings.ingestion_poll_interval_seconds`).
+        stop_event: Event that stops the loop once set.
+        once: Exit as soon as the queue is empty instead of polling.
+
+    Returns:
+        Number of jobs processed.
+    """
+    settings = get_settings()
+    worker_id = worker_id or _default_worker_id()
+    poll_interval = settings.ingestion_poll_interval_seconds if poll_interval is None else poll_interval
+    stop_event = stop_event or threading.Event()
+    queue = get_job_queue()
+    processed = 0
+
+    logger.info("Ingestion worker %s started", worker_id)
+
+    while not stop_event.is_set():
+        try:
+            job = queue.claim_next(worker_id)
+        except Exception as e:
+            logger.warning("Ingestion worker %s could not claim a job: %s", worker_id, e)
+            stop_event.wait(poll_interval)
+            continue
+
+        if job is None:
+            try:
+                queue.requeue_stale(settings.ingestion_job_timeout_minutes, settings.ingestion_max_attempts)
+            except Exception as e:
+                logger.warning("Ingestion worker %s could not re-queue stale jobs: %s", worker_id, e)
+            if once:
+                break
+            stop_event.wait(poll_interval)
+            continue
+
+        logger.info("Processing ingestion job %s (%s, attempt %s)", job.job_id, job.filename, job.attempts)
+        try:
+            chunks_indexed = process_job(job, worker_id)
+            logger.info("Ingestion job %s completed: %s chunks", job.job_id, chunks_indexed)
+        except JobLostError:
+            # whoever holds the job now (or requeue_stale) decides its status
+            logger.warning("Ingestion job %s was re-queued while running; result not recorded", job.job_id)
+        except Exception as e:
+            try:
+                status = queue.fail(job.job_id, worker_id, str(e), settings.ingestion_max_attempts)
+            except Exception as fail_error:
+                # the job stays claimed and is re-queued once it goes stale
+                status = "unrecorded"
+                logger.error("Ingestion job %s could not be marked failed: %s", job.job_id, fail_error)
+            if status is None:
+                status = "re-queued while running, not recorded"
+            logger.warning("Ingestion job %s failed (%s): %s", job.job_id, status, e)
+        processed += 1
+
+    logger.info("Ingestion worker %s stopped", worker_id)
+    return processed
+
+
+def start_worker_threads(count: int) -> Tuple[threading.Event, List[threading.Thread]]:
+    """Start `count` in-process worker threads sharing one stop event."""
+    stop_event = threading.Event()
+    threads = []
+    for index in range(count):
+        thread = threading.Thread(
+            target=run_worker,
+            kwargs={"stop_event": stop_event},
+            name=f"ingestion-worker-{index}",
+            daemon=True,
+        )
+        thread.start()
+        threads.append(thread)
+    return stop_event, threads
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Process queued PDF ingestion jobs.")
+    parser.add_argument("--poll-interval", type=float, default=None, help="seconds to wait when the queue is empty")
+    parser.add_argument("--once", action="store_true", help="exit when the queue is empty")
+    args = parser.parse_args(argv)
+
+    configure_logging()
+    init_database()
+    try:
+        run_worker(poll_interval=args.poll_interval, once=args.once)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        shutdown_pdf_parse_pool()
+        close_connection_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,15 @@
+"""Shared test setup: offline settings, so no API key or server is needed.
+
+Tests that need Postgres run against `TEST_DATABASE_URL` and are skipped when
+it is not set. The database's tables are created on first use and the tests
+write to them, so point it at a throwaway database.
+"""
+
+import os
+
+os.environ.update(
+    LLM_PROVIDER="fake",
+    EMBEDDING_PROVIDER="fake",
+    DATABASE_URL=os.environ.get("TEST_DATABASE_URL", "postgresql://localhost/unused"),
+    JWT_SECRET_KEY="test-jwt-secret-key-not-for-production",
+)
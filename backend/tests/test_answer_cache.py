@@ -0,0 +1,102 @@
+import asyncio
+
+from langchain_core.embeddings import Embeddings
+
+from src.app.core.cache.answer_cache import SemanticAnswerCache
+
+VECTORS = {
+    "What is HNSW?": [1.0, 0.0, 0.0],
+    "what's HNSW": [0.99, 0.1, 0.0],
+    "How do I bake bread?": [0.0, 0.0, 1.0],
+}
+
+
+class TableEmbeddings(Embeddings):
+    def embed_documents(self, texts):
+        return [VECTORS[text] for text in texts]
+
+    def embed_query(self, text):
+        return VECTORS[text]
+
+
+class MemoryGenerations:
+    """Stand-in for the shared Postgres counters."""
+
+    def __init__(self):
+        self.rows = {}
+
+    def get(self, scope):
+        return self.rows.get(scope, 0)
+
+    async def aget(self, scope):
+        return self.get(scope)
+
+    def bump(self, scopes):
+        for scope in set(scopes):
+            self.rows[scope] = self.rows.get(scope, 0) + 1
+        return {scope: self.rows[scope] for scope in set(scopes)}
+
+
+ANSWER = {"context": "ctx", "draft_answer": "draft", "answer": "HNSW is a graph index."}
+
+
+def _cache(generations=None):
+    return SemanticAnswerCache(TableEmbeddings(), threshold=0.95, generations=generations)
+
+
+def test_rephrased_question_hits_in_the_same_scope_only():
+    cache = _cache()
+    cache.store(cache.lookup("What is HNSW?", "file-a"), ANSWER)
+
+    assert cache.lookup("what's HNSW", "file-a").values["answer"] == ANSWER["answer"]
+    assert not cache.lookup("what's HNSW", "file-b").hit
+    assert not cache.lookup("How do I bake bread?", "file-a").hit
+
+
+def test_invalidating_a_file_drops_its_scope_and_the_global_scope():
+    cache = _cache()
+    for scope in ("file-a", "file-b", None):
+        cache.store(cache.lookup("What is HNSW?", scope), ANSWER)
+
+    cache.invalidate_file("file-a")
+    assert not cache.lookup("What is HNSW?", "file-a").hit
+    assert not cache.lookup("What is HNSW?", None).hit
+    assert cache.lookup("What is HNSW?", "file-b").hit
+
+
+def test_answer_computed_across_an_invalidation_is_not_stored():
+    cache = _cache()
+    lookup = cache.lookup("What is HNSW?", "file-a")
+    cache.invalidate_file("file-a")
+    cache.store(lookup, ANSWER)
+    assert len(cache) == 0
+
+
+def test_invalidation_by_another_process_is_seen():
+    generations = MemoryGenerations()
+    api = _cache(generations)
+    api.store(api.lookup("What is HNSW?", "file-a"), ANSWER)
+    api.store(api.lookup("What is HNSW?", None), ANSWER)
+    assert api.lookup("What is HNSW?", "file-a").hit
+
+    # an ingestion worker re-indexes the file without ever using the cache
+    generations.bump({"file-a", None})
+    assert not api.lookup("What is HNSW?", "file-a").hit
+    assert not asyncio.run(api.alookup("What is HNSW?", None)).hit
+
+    # and an answer that was being computed meanwhile is dropped
+    lookup = api.lookup("What is HNSW?", "file-a")
+    generations.bump({"file-a", None})
+    asyncio.run(api.astore(lookup, ANSWER))
+    assert not api.lookup("What is HNSW?", "file-a").hit
+
+
+def test_failing_shared_counters_skip_storing():
+    class Down(MemoryGenerations):
+        def get(self, scope):
+            raise ConnectionError("database is down")
+
+    cache = _cache(Down())
+    lookup = cache._match("file-a", [1.0, 0.0, 0.0])
+    cache.store(lookup, ANSWER)
+    assert len(cache) == 0
@@ -0,0 +1,59 @@
+import threading
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from src.app.core.agents import graph
+from src.app.services.conversation_service import ConversationService
+
+
+class MemoryConversations:
+    """Stands in for the conversation db service: one conversation, turns kept in memory."""
+
+    def __init__(self):
+        self.turns = []
+
+    def get_conversation(self, session_id):
+        return SimpleNamespace(active_file_id=None)
+
+    def add_turn(self, **turn):
+        self.turns.append(turn)
+        return SimpleNamespace(message_count=2 * len(self.turns), assistant_message_id=len(self.turns))
+
+    def add_message(self, **message):
+        raise AssertionError("no turn should fail")
+
+
+def test_queued_turn_is_timestamped_when_it_takes_the_lock(monkeypatch):
+    first_running = threading.Event()
+    release_first = threading.Event()
+    finished = {}
+
+    def run_history_turn(question, thread_id, file_id, retrieval_mode):
+        if question == "first":
+            first_running.set()
+            release_first.wait(5)
+        finished[question] = datetime.now(timezone.utc)
+        return {"answer": question, "context": "", "conversation_turns": []}
+
+    monkeypatch.setattr(graph, "_run_history_turn", run_history_turn)
+    monkeypatch.setattr(graph, "schedule_memory_summary", lambda *args: None)
+    monkeypatch.setattr(graph, "get_qa_graph", lambda: None)
+
+    service = ConversationService.__new__(ConversationService)
+    service.db_service = MemoryConversations()
+
+    first = threading.Thread(target=service.ask_question, args=("s1", "first"))
+    first.start()
+    assert first_running.wait(5)
+
+    # asked while the first turn holds the conversation's lock
+    second = threading.Thread(target=service.ask_question, args=("s1", "second"))
+    second.start()
+    time.sleep(0.05)
+    release_first.set()
+    first.join(5)
+    second.join(5)
+
+    asked_at = {turn["question"]: turn["asked_at"] for turn in service.db_service.turns}
+    assert asked_at["first"] < finished["first"] <= asked_at["second"]
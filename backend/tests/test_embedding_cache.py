@@ -0,0 +1,75 @@
+from langchain_core.embeddings import Embeddings
+
+from src.app.core.cache.embedding_cache import CachedEmbeddings
+
+
+class CountingEmbeddings(Embeddings):
+    def __init__(self):
+        self.calls = []
+
+    def embed_documents(self, texts):
+        self.calls.append(list(texts))
+        return [[float(len(text)), 1.0] for text in texts]
+
+    def embed_query(self, text):
+        self.calls.append([text])
+        return [float(len(text)), 1.0]
+
+
+class MemoryStore:
+    """Stand-in for the Postgres tier."""
+
+    def __init__(self, fail=False):
+        self.rows = {}
+        self.fail = fail
+
+    def mget(self, model, text_hashes):
+        if self.fail:
+            raise ConnectionError("database is down")
+        return {h: self.rows[(model, h)] for h in text_hashes if (model, h) in self.rows}
+
+    def mset(self, model, items):
+        if self.fail:
+            raise ConnectionError("database is down")
+        self.rows.update({(model, h): vector for h, vector in items.items()})
+
+
+def test_repeated_texts_are_embedded_once():
+    underlying = CountingEmbeddings()
+    cached = CachedEmbeddings(underlying, "model-a")
+
+    first = cached.embed_documents(["alpha", "beta", "alpha"])
+    second = cached.embed_documents(["beta", "alpha"])
+    assert underlying.calls == [["alpha", "beta"]]
+    assert first == [[5.0, 1.0], [4.0, 1.0], [5.0, 1.0]]
+    assert second == [first[1], first[0]]
+
+    assert cached.embed_query("alpha") == [5.0, 1.0]
+    assert len(underlying.calls) == 1
+
+
+def test_persistent_tier_is_shared_between_workers():
+    store = MemoryStore()
+    CachedEmbeddings(CountingEmbeddings(), "model-a", store=store).embed_documents(["alpha"])
+
+    underlying = CountingEmbeddings()
+    other_worker = CachedEmbeddings(underlying, "model-a", store=store)
+    assert other_worker.embed_documents(["alpha"]) == [[5.0, 1.0]]
+    assert underlying.calls == []
+
+
+def test_keys_include_the_model():
+    store = MemoryStore()
+    CachedEmbeddings(CountingEmbeddings(), "model-a", store=store).embed_query("alpha")
+
+    underlying = CountingEmbeddings()
+    CachedEmbeddings(underlying, "model-b", store=store).embed_query("alpha")
+    assert underlying.calls == [["alpha"]]
+
+
+def test_failing_store_falls_back_to_the_model():
+    underlying = CountingEmbeddings()
+    cached = CachedEmbeddings(underlying, "model-a", store=MemoryStore(fail=True))
+    assert cached.embed_documents(["alpha"]) == [[5.0, 1.0]]
+    assert cached.embed_documents(["alpha"]) == [[5.0, 1.0]]
+    assert underlying.calls == [["alpha"]]
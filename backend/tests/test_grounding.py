@@ -0,0 +1,46 @@
+import pytest
+
+from src.app.core.agents.grounding import grounding_score, is_refusal
+from src.app.core.agents.prompts import OFF_TOPIC_ANSWER
+
+CONTEXT = """
+[Chunk 1] Refunds are issued within thirty days of purchase for unused items.
+Shipping costs are not refunded unless the item arrived damaged.
+"""
+
+
+def test_draft_lifted_from_the_context_scores_one():
+    draft = "Refunds are issued within thirty days of purchase. Shipping costs are not refunded."
+    assert grounding_score(draft, CONTEXT) == 1.0
+
+
+def test_unsupported_sentences_lower_the_score():
+    draft = (
+        "Refunds are issued within thirty days of purchase. "
+        "Customers also receive loyalty points redeemable at partner stores worldwide."
+    )
+    assert grounding_score(draft, CONTEXT) == pytest.approx(0.5)
+
+
+def test_sentences_without_claims_are_ignored():
+    draft = "Yes. Refunds are issued within thirty days of purchase."
+    assert grounding_score(draft, CONTEXT) == 1.0
+
+
+@pytest.mark.parametrize("draft, context", [("", CONTEXT), (None, CONTEXT), ("Refunds are issued.", ""), ("Yes.", CONTEXT)])
+def test_empty_draft_context_or_claims_score_zero(draft, context):
+    assert grounding_score(draft, context) == 0.0
+
+
+def test_sentence_support_threshold():
+    # three of the four content words appear in the context
+    draft = "Refunds issued thirty weeks."
+    assert grounding_score(draft, CONTEXT, sentence_support=0.75) == 1.0
+    assert grounding_score(draft, CONTEXT, sentence_support=0.8) == 0.0
+
+
+def test_refusal_is_recognised_with_or_without_quotes():
+    assert is_refusal(OFF_TOPIC_ANSWER)
+    assert is_refusal(f'  "{OFF_TOPIC_ANSWER}"\n')
+    assert not is_refusal("Refunds are issued within thirty days.")
+    assert not is_refusal(None)
@@ -0,0 +1,219 @@
+import os
+import uuid
+
+import pytest
+
+from src.app import worker
+from src.app.db.models import IngestionJobDB
+
+
+# worker transitions, against an in-memory queue
+class MemoryQueue:
+    """Mimics the status transitions of `IngestionJobQueue`."""
+
+    def __init__(self, *jobs, fail_raises=False):
+        self.jobs = {job.job_id: job for job in jobs}
+        self.fail_raises = fail_raises
+        self.requeue_calls = 0
+
+        self.owners = {}
+
+    def claim_next(self, worker_id):
+        for job in self.jobs.values():
+            if job.status == "queued":
+                job.status, job.attempts = "running", job.attempts + 1
+                self.owners[job.job_id] = worker_id
+                return job.model_copy()
+        return None
+
+    def _held(self, job_id, worker_id):
+        return self.jobs[job_id].status == "running" and self.owners.get(job_id) == worker_id
+
+    def update_progress(self, job_id, worker_id, pages_processed, pages_total, chunks_indexed):
+        return self._held(job_id, worker_id)
+
+    def complete(self, job_id, worker_id, chunks_indexed):
+        if not self._held(job_id, worker_id):
+            return False
+        self.jobs[job_id].status = "completed"
+        self.jobs[job_id].chunks_indexed = chunks_indexed
+        return True
+
+    def fail(self, job_id, worker_id, error, max_attempts):
+        if self.fail_raises:
+            raise Exception("Database error failing ingestion job: connection lost")
+        if not self._held(job_id, worker_id):
+            return None
+        job = self.jobs[job_id]
+        job.status, job.error = ("queued" if job.attempts < max_attempts else "failed"), error
+        return job.status
+
+    def requeue(self, job_id):
+        """What `requeue_stale` does to a job whose worker stopped reporting."""
+        self.jobs[job_id].status = "queued"
+
+    def requeue_stale(self, timeout_minutes, max_attempts):
+        self.requeue_calls += 1
+        return 0
+
+
+def _job():
+    return IngestionJobDB(job_id=uuid.uuid4().hex, file_id="file-1", filename="a.pdf", file_path="/tmp/a.pdf")
+
+
+def _run(monkeypatch, queue, process_job):
+    monkeypatch.setattr(worker, "get_job_queue", lambda: queue)
+    monkeypatch.setattr(worker, "process_job", process_job)
+    return worker.run_worker(worker_id="test", poll_interval=0, once=True)
+
+
+def test_completed_job_is_processed_once(monkeypatch):
+    job = _job()
+    queue = MemoryQueue(job)
+
+    def process(claimed, worker_id):
+        queue.complete(claimed.job_id, worker_id, 3)
+        return 3
+
+    assert _run(monkeypatch, queue, process) == 1
+    assert queue.jobs[job.job_id].status == "completed"
+    assert queue.requeue_calls == 1
+
+
+def test_failing_job_is_retried_until_it_runs_out_of_attempts(monkeypatch):
+    job = _job()
+    queue = MemoryQueue(job)
+    monkeypatch.setattr(worker.get_settings(), "ingestion_max_attempts", 3)
+
+    def process(claimed, worker_id):
+        raise RuntimeError(f"attempt {claimed.attempts} failed")
+
+    assert _run(monkeypatch, queue, process) == 3
+    failed = queue.jobs[job.job_id]
+    assert (failed.status, failed.attempts, failed.error) == ("failed", 3, "attempt 3 failed")
+
+
+def test_worker_survives_a_failing_fail(monkeypatch, caplog):
+    first, second = _job(), _job()
+    queue = MemoryQueue(first, second, fail_raises=True)
+
+    def process(claimed, worker_id):
+        raise RuntimeError("parse error")
+
+    assert _run(monkeypatch, queue, process) == 2
+    assert "could not be marked failed" in caplog.text
+    # the jobs stay claimed until requeue_stale picks them up
+    assert {job.status for job in queue.jobs.values()} == {"running"}
+
+
+def test_job_requeued_while_running_is_left_to_its_next_attempt(monkeypatch):
+    job = _job()
+    queue = MemoryQueue(job)
+    monkeypatch.setattr(worker, "get_job_queue", lambda: queue)
+
+    def index_pdf_file(path, progress_callback, **kwargs):
+        queue.requeue(job.job_id)
+        progress_callback(1, 2, 5)
+        raise AssertionError("indexing continued after the job was lost")
+
+    monkeypatch.setattr(worker, "index_pdf_file", index_pdf_file)
+    claimed = queue.claim_next("worker-1")
+    with pytest.raises(worker.JobLostError):
+        worker.process_job(claimed, "worker-1")
+    assert queue.jobs[job.job_id].status == "queued"
+
+
+
+def test_lost_job_is_not_marked_failed(monkeypatch, caplog):
+    job = _job()
+    queue = MemoryQueue(job)
+
+    def process(claimed, worker_id):
+        raise worker.JobLostError("gone")
+
+    assert _run(monkeypatch, queue, process) == 1
+    assert queue.jobs[job.job_id].status == "running"
+    assert "result not recorded" in caplog.text
+
+# status transitions of the Postgres queue
+postgres = pytest.mark.skipif(not os.environ.get("TEST_DATABASE_URL"), reason="TEST_DATABASE_URL is not set")
+
+
+@pytest.fixture
+def job_queue():
+    from src.app.db.connection import close_connection_pool, get_db_connection, init_database
+    from src.app.db.job_queue import get_job_queue
+
+    init_database()
+    with get_db_connection() as connection:
+        connection.execute("DELETE FROM ingestion_jobs")
+        connection.commit()
+    yield get_job_queue()
+    close_connection_pool()
+
+
+def _enqueue(queue):
+    file_id = uuid.uuid4().hex
+    return queue.enqueue(uuid.uuid4().hex, file_id, "a.pdf", f"/tmp/{file_id}.pdf")
+
+
+@postgres
+def test_claim_marks_the_oldest_queued_job_running(job_queue):
+    first, second = _enqueue(job_queue), _enqueue(job_queue)
+
+    claimed = job_queue.claim_next("worker-1")
+    assert (claimed.job_id, claimed.status, claimed.attempts) == (first.job_id, "running", 1)
+    assert job_queue.claim_next("worker-2").job_id == second.job_id
+    assert job_queue.claim_next("worker-3") is None
+
+
+@postgres
+def test_fail_requeues_until_max_attempts(job_queue):
+    job = _enqueue(job_queue)
+
+    job_queue.claim_next("worker-1")
+    assert job_queue.fail(job.job_id, "worker-1", "boom", max_attempts=2) == "queued"
+    assert job_queue.claim_next("worker-1").attempts == 2
+    assert job_queue.fail(job.job_id, "worker-1", "boom again", max_attempts=2) == "failed"
+
+    failed = job_queue.get_job(job.job_id)
+    assert (failed.status, failed.error) == ("failed", "boom again")
+    assert failed.finished_at is not None
+    assert job_queue.claim_next("worker-1") is None
+
+
+@postgres
+def test_requeue_stale_recovers_jobs_that_stopped_reporting(job_queue):
+    from src.app.db.connection import get_db_connection
+
+    stale, fresh = _enqueue(job_queue), _enqueue(job_queue)
+    job_queue.claim_next("worker-1")
+    job_queue.claim_next("worker-2")
+    with get_db_connection() as connection:
+        connection.execute(
+            "UPDATE ingestion_jobs SET updated_at = NOW() - INTERVAL '1 hour' WHERE job_id = %s", (stale.job_id,)
+        )
+        connection.commit()
+
+    assert job_queue.requeue_stale(timeout_minutes=30, max_attempts=3) == 1
+    assert job_queue.get_job(stale.job_id).status == "queued"
+    assert job_queue.get_job(fresh.job_id).status == "running"
+
+
+@postgres
+def test_updates_from_a_worker_that_lost_the_job_are_ignored(job_queue):
+    job = _enqueue(job_queue)
+    job_queue.claim_next("worker-1")
+    job_queue.fail(job.job_id, "worker-1", "boom", max_attempts=3)
+    job_queue.claim_next("worker-2")
+
+    assert job_queue.update_progress(job.job_id, "worker-1", 1, 2, 5) is False
+    assert job_queue.complete(job.job_id, "worker-1", 5) is False
+    assert job_queue.fail(job.job_id, "worker-1", "late error", max_attempts=3) is None
+    assert job_queue.get_job(job.job_id).status == "running"
+
+    assert job_queue.update_progress(job.job_id, "worker-2", 2, 2, 8) is True
+    assert job_queue.complete(job.job_id, "worker-2", 8) is True
+    completed = job_queue.get_job(job.job_id)
+    assert (completed.status, completed.chunks_indexed) == ("completed", 8)
+    assert job_queue.fail(job.job_id, "worker-2", "after completion", max_attempts=3) is None
@@ -0,0 +1,50 @@
+import os
+import uuid
+
+import pytest
+from langchain_core.documents import Document
+
+# lexical search, against the Postgres full-text index
+postgres = pytest.mark.skipif(not os.environ.get("TEST_DATABASE_URL"), reason="TEST_DATABASE_URL is not set")
+
+
+@pytest.fixture
+def chunk_store():
+    from src.app.core.retrieval.lexical_store import get_chunk_store
+    from src.app.db.connection import close_connection_pool, init_database
+
+    init_database()
+    yield get_chunk_store()
+    close_connection_pool()
+
+
+def _add(store, file_id, *texts):
+    docs = [Document(id=uuid.uuid4().hex, page_content=text, metadata={"file_id": file_id}) for text in texts]
+    store.add_chunks(docs)
+    return [doc.id for doc in docs]
+
+
+@postgres
+def test_any_query_term_may_match(chunk_store):
+    file_id = uuid.uuid4().hex
+    both, one, neither = _add(
+        chunk_store, file_id,
+        "The XR-7 gasket is rated for 300 kPa.",
+        "Replace the gasket every year.",
+        "Unrelated maintenance notes.",
+    )
+
+    found = [doc.id for doc in chunk_store.search("what pressure is the XR-7 gasket rated for?", k=5, file_id=file_id)]
+    assert found == [both, one]
+    assert neither not in found
+
+
+@postgres
+def test_lexemes_with_tsquery_operators_are_matched_whole(chunk_store):
+    file_id = uuid.uuid4().hex
+    (chunk_id,) = _add(chunk_store, file_id, "The export is at mirror.org/report?year=2024&part=2 now.")
+
+    # the URL's path lexeme contains `&`; it must stay one term
+    found = chunk_store.search("example.com/report?year=2024&part=2", k=5, file_id=file_id)
+    assert [doc.id for doc in found] == [chunk_id]
+    assert chunk_store.search("the and of", k=5, file_id=file_id) == []
@@ -0,0 +1,63 @@
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration
+
+from src.app.core.cache.llm_cache import TwoTierLLMCache
+
+
+class MemoryStore:
+    """Stand-in for the Postgres tier."""
+
+    def __init__(self, fail=False):
+        self.rows = {}
+        self.fail = fail
+
+    def get(self, key):
+        if self.fail:
+            raise ConnectionError("database is down")
+        return self.rows.get(key)
+
+    def set(self, key, model, response):
+        if self.fail:
+            raise ConnectionError("database is down")
+        self.rows[key] = response
+
+    def clear(self):
+        self.rows.clear()
+
+
+def _generations(text):
+    return [ChatGeneration(message=AIMessage(content=text), generation_info={"finish_reason": "stop"})]
+
+
+def test_memory_tier_round_trip():
+    cache = TwoTierLLMCache()
+    assert cache.lookup("prompt", "model-a") is None
+
+    cache.update("prompt", "model-a", _generations("answer"))
+    cached = cache.lookup("prompt", "model-a")
+    assert cached[0].message.content == "answer"
+    assert cached[0].generation_info == {"finish_reason": "stop"}
+
+    # the model configuration is part of the key
+    assert cache.lookup("prompt", "model-b") is None
+
+    stats = cache.stats()
+    assert (stats["memory_hits"], stats["store_hits"], stats["misses"]) == (1, 0, 2)
+    assert stats["memory_entries"] == 1
+
+
+def test_store_tier_is_shared_between_processes():
+    store = MemoryStore()
+    TwoTierLLMCache(store=store).update("prompt", "model-a", _generations("answer"))
+
+    other = TwoTierLLMCache(store=store)
+    assert other.lookup("prompt", "model-a")[0].message.content == "answer"
+    assert other.lookup("prompt", "model-a")[0].message.content == "answer"
+    assert (other.store_hits, other.memory_hits) == (1, 1)
+
+
+def test_failing_store_falls_back_to_the_model():
+    cache = TwoTierLLMCache(store=MemoryStore(fail=True))
+    cache.update("prompt", "model-a", _generations("answer"))
+    assert cache.lookup("prompt", "model-a")[0].message.content == "answer"
+    assert cache.lookup("prompt", "model-b") is None
@@ -0,0 +1,129 @@
+import numpy as np
+import pytest
+from langchain_core.embeddings import Embeddings
+
+from src.app.core.retrieval.local_store import LocalVectorStore
+
+DIM = 16
+
+
+class SeededEmbeddings(Embeddings):
+    """Deterministic random vectors per text, counting how many texts were embedded."""
+
+    def __init__(self):
+        self.embedded = 0
+
+    def _vector(self, text):
+        seed = int.from_bytes(text.encode("utf-8")[:8].ljust(8, b"\0"), "little") ^ len(text)
+        return np.random.default_rng(seed).standard_normal(DIM).tolist()
+
+    def embed_documents(self, texts):
+        self.embedded += len(texts)
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text):
+        return self._vector(text)
+
+
+TEXTS = [f"chunk {index} of the handbook" for index in range(12)]
+
+
+def _store(tmp_path, quantize=False):
+    embeddings = SeededEmbeddings()
+    store = LocalVectorStore(embeddings, path=tmp_path / ("int8" if quantize else "float32"), quantize=quantize)
+    store.add_texts(
+        TEXTS,
+        metadatas=[{"file_id": "file-a" if index % 2 == 0 else "file-b"} for index in range(len(TEXTS))],
+        ids=[f"id-{index}" for index in range(len(TEXTS))],
+    )
+    return store, embeddings
+
+
+def _files(results):
+    return {doc.metadata["file_id"] for doc, _ in results}
+
+
+@pytest.mark.parametrize("filter", [{"file_id": "file-a"}, {"file_id": {"$eq": "file-a"}}, {"file_id": {"$in": ["file-a"]}}])
+def test_file_filters_only_search_that_file(tmp_path, filter):
+    store, _ = _store(tmp_path)
+    results = store.similarity_search_with_score(TEXTS[1], k=4, filter=filter)
+    assert len(results) == 4
+    assert _files(results) == {"file-a"}
+
+
+def test_unfiltered_search_scans_every_file_and_ranks_the_exact_text_first(tmp_path):
+    store, _ = _store(tmp_path)
+    results = store.similarity_search_with_score(TEXTS[3], k=len(TEXTS))
+    assert _files(results) == {"file-a", "file-b"}
+    assert results[0][0].id == "id-3"
+    assert results[0][1] == pytest.approx(1.0, abs=1e-5)
+    scores = [score for _, score in results]
+    assert scores == sorted(scores, reverse=True)
+
+
+def test_unknown_file_returns_nothing(tmp_path):
+    store, _ = _store(tmp_path)
+    assert store.similarity_search("anything", filter={"file_id": "missing"}) == []
+
+
+@pytest.mark.parametrize("filter", [{"filename": "a.pdf"}, {"file_id": {"$ne": "file-a"}}])
+def test_unsupported_filters_raise(tmp_path, filter):
+    store, _ = _store(tmp_path)
+    with pytest.raises(ValueError):
+        store.similarity_search("anything", filter=filter)
+
+
+def test_quantized_scores_match_float32_scores(tmp_path):
+    exact, _ = _store(tmp_path)
+    quantized, _ = _store(tmp_path, quantize=True)
+
+    for query in (TEXTS[0], "an unrelated question"):
+        expected = {doc.id: score for doc, score in exact.similarity_search_with_score(query, k=len(TEXTS))}
+        actual = {doc.id: score for doc, score in quantized.similarity_search_with_score(query, k=len(TEXTS))}
+        assert actual.keys() == expected.keys()
+        for doc_id, score in expected.items():
+            assert actual[doc_id] == pytest.approx(score, abs=0.02)
+
+    assert quantized.similarity_search(TEXTS[0], k=1)[0].id == "id-0"
+
+
+def test_rows_with_stored_ids_are_not_added_twice(tmp_path):
+    store, embeddings = _store(tmp_path)
+    embedded = embeddings.embedded
+
+    store.add_texts(TEXTS[:2], metadatas=[{"file_id": "file-a"}, {"file_id": "file-b"}], ids=["id-0", "id-1"])
+    assert embeddings.embedded == embedded
+    assert len(store.similarity_search(TEXTS[0], k=len(TEXTS))) == len(TEXTS)
+
+
+
+def test_stored_ids_are_read_from_disk_only_after_another_writer(tmp_path, monkeypatch):
+    store, embeddings = _store(tmp_path)
+    reads = []
+
+    def counting_open(file, mode="r", *args, **kwargs):
+        if mode == "r" and str(file).endswith("docs.jsonl"):
+            reads.append(file)
+        return open(file, mode, *args, **kwargs)
+
+    monkeypatch.setattr("src.app.core.retrieval.local_store.open", counting_open, raising=False)
+    for batch in range(3):
+        store.add_texts([f"new chunk {batch}"], metadatas=[{"file_id": "file-a"}], ids=[f"new-{batch}"])
+    assert reads == []
+
+    # a second store stands in for another process appending to the same partition
+    other = LocalVectorStore(SeededEmbeddings(), path=tmp_path / "float32")
+    other.add_texts(["from elsewhere"], metadatas=[{"file_id": "file-a"}], ids=["other-0"])
+    reads.clear()
+
+    embedded = embeddings.embedded
+    store.add_texts(["from elsewhere"], metadatas=[{"file_id": "file-a"}], ids=["other-0"])
+    assert embeddings.embedded == embedded
+    assert len(reads) == 1
+
+
+def test_delete_file_drops_only_that_file(tmp_path):
+    store, _ = _store(tmp_path)
+    assert store.delete_file("file-a") is True
+    assert store.delete_file("file-a") is False
+    assert _files(store.similarity_search_with_score(TEXTS[0], k=len(TEXTS))) == {"file-b"}
@@ -0,0 +1,74 @@
+import pytest
+
+from src.app.core.cache.lru import LRUCache
+
+
+def test_entry_budget_evicts_the_least_recently_used():
+    cache = LRUCache(max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1  # "b" is now the least recently used
+    cache.put("c", 3)
+
+    assert "b" not in cache
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert len(cache) == 2
+
+
+def test_byte_budget_evicts_until_the_total_fits():
+    cache = LRUCache(max_bytes=10, sizeof=len)
+    cache.put("a", "xxxx")
+    cache.put("b", "xxxx")
+    cache.put("c", "xxxxxx")
+
+    assert "a" not in cache
+    assert "b" in cache and "c" in cache
+    assert cache.total_bytes == 10
+
+    cache.put("d", "xxxxxxx")
+    assert list(key for key in "bcd" if key in cache) == ["d"]
+    assert cache.total_bytes == 7
+
+
+def test_replacing_a_value_updates_the_byte_total():
+    cache = LRUCache(max_bytes=10, sizeof=len)
+    cache.put("a", "xxxxxxxx")
+    cache.put("a", "xx")
+    assert cache.total_bytes == 2
+    assert cache.get("a") == "xx"
+
+
+def test_value_larger_than_the_budget_is_not_cached():
+    cache = LRUCache(max_bytes=4, sizeof=len)
+    cache.put("a", "xx")
+    cache.put("big", "xxxxxxxx")
+    assert "big" not in cache
+    assert cache.get("a") == "xx"
+
+
+def test_both_budgets_apply():
+    cache = LRUCache(max_entries=3, max_bytes=5, sizeof=len)
+    for key in "abcd":
+        cache.put(key, "x")
+    assert list(key for key in "abcd" if key in cache) == ["b", "c", "d"]
+    cache.put("e", "xxx")
+    assert list(key for key in "bcde" if key in cache) == ["c", "d", "e"]
+    assert cache.total_bytes == 5
+
+
+def test_pop_clear_and_hit_counters():
+    cache = LRUCache(max_bytes=10, sizeof=len)
+    cache.put("a", "xxx")
+    assert cache.get("missing", "default") == "default"
+    assert cache.pop("a") == "xxx"
+    assert cache.total_bytes == 0
+    cache.put("b", "xx")
+    cache.clear()
+    assert len(cache) == 0 and cache.total_bytes == 0
+    assert (cache.hits, cache.misses) == (0, 1)
+
+
+def test_byte_budget_requires_sizeof():
+    with pytest.raises(ValueError):
+        LRUCache(max_bytes=10)
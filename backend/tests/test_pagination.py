@@ -0,0 +1,156 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from src.app.db.db_service import _conversation_page, _conversation_page_query, _message_page, _message_page_query
+from src.app.db.pagination import InvalidCursorError, decode_cursor, encode_cursor
+
+START = datetime(2026, 1, 1, 12, 0, 0, 123456, tzinfo=timezone.utc)
+
+
+# cursors
+def test_cursor_round_trips_datetime_int_and_str():
+    cursor = encode_cursor(START, 42, "session-1")
+    assert "=" not in cursor
+    assert decode_cursor(cursor, (datetime, int, str)) == (START, 42, "session-1")
+
+
+@pytest.mark.parametrize("cursor", ["", "not a cursor", "!!!", encode_cursor(START)])
+def test_malformed_cursor_is_rejected(cursor):
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(cursor, (datetime, int))
+
+
+def test_cursor_with_wrong_value_types_is_rejected():
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(encode_cursor(START, "42"), (datetime, int))
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(encode_cursor(START, True), (datetime, int))
+
+
+# message pages: the query's keyset conditions are applied to an in-memory table
+def _messages(count, same_timestamp_every=1):
+    return [
+        {
+            "id": index + 1,
+            "session_id": "s",
+            "role": "USER" if index % 2 == 0 else "Assistant",
+            "content": f"message {index + 1}",
+            "timestamp": START + timedelta(seconds=index // same_timestamp_every),
+            "metadata": {},
+        }
+        for index in range(count)
+    ]
+
+
+def _fetch_messages(table, limit=None, before=None, after=None):
+    query, params, newest_first = _message_page_query("s", limit, before, after)
+    rows = sorted(table, key=lambda row: (row["timestamp"], row["id"]), reverse=newest_first)
+    if before:
+        key = tuple(params[1:3])
+        rows = [row for row in rows if (row["timestamp"], row["id"]) < key]
+    if after:
+        key = tuple(params[1:3])
+        rows = [row for row in rows if (row["timestamp"], row["id"]) > key]
+    if limit:
+        assert params[-1] == limit + 1
+        rows = rows[:limit + 1]
+    return _message_page(rows, limit, before, after, newest_first)
+
+
+def _ids(page):
+    return [message.id for message in page.messages]
+
+
+def test_latest_page_has_only_an_older_cursor():
+    page = _fetch_messages(_messages(10), limit=4)
+    assert _ids(page) == [7, 8, 9, 10]
+    assert page.before_cursor is not None
+    assert page.after_cursor is None
+
+
+def test_paging_back_and_forth_visits_every_message_once():
+    # ties on timestamp are broken by id
+    table = _messages(11, same_timestamp_every=3)
+
+    pages, page = [], _fetch_messages(table, limit=4)
+    pages.append(_ids(page))
+    while page.before_cursor:
+        page = _fetch_messages(table, limit=4, before=page.before_cursor)
+        pages.append(_ids(page))
+    assert pages == [[8, 9, 10, 11], [4, 5, 6, 7], [1, 2, 3]]
+    assert page.after_cursor is not None
+
+    forward = []
+    while page.after_cursor:
+        page = _fetch_messages(table, limit=4, after=page.after_cursor)
+        forward.append(_ids(page))
+    assert forward == [[4, 5, 6, 7], [8, 9, 10, 11]]
+
+
+def test_page_that_exactly_fills_the_limit_has_no_older_cursor():
+    page = _fetch_messages(_messages(4), limit=4)
+    assert _ids(page) == [1, 2, 3, 4]
+    assert page.before_cursor is None
+
+
+def test_empty_page_keeps_the_cursor_that_leads_back():
+    table = _messages(3)
+    oldest = _fetch_messages(table, limit=3)
+    first = oldest.messages[0]
+    before_first = encode_cursor(first.timestamp, first.id)
+
+    page = _fetch_messages(table, limit=3, before=before_first)
+    assert page.messages == []
+    assert page.before_cursor is None
+    assert page.after_cursor == before_first
+
+
+def test_before_and_after_together_are_rejected():
+    cursor = encode_cursor(START, 1)
+    with pytest.raises(InvalidCursorError):
+        _message_page_query("s", 10, cursor, cursor)
+
+
+# conversation pages
+def _conversations(count):
+    return [
+        {
+            "session_id": f"session-{index:02d}",
+            "created_at": START,
+            # pairs of conversations share an updated_at, so the session id breaks the tie
+            "updated_at": START + timedelta(minutes=index // 2),
+            "message_count": index,
+            "active_file_id": None,
+            "user_id": "user-1",
+            "filename": None,
+        }
+        for index in range(count)
+    ]
+
+
+def _fetch_conversations(table, limit, cursor=None):
+    query, params = _conversation_page_query(limit, "user-1", cursor)
+    rows = sorted(table, key=lambda row: (row["updated_at"], row["session_id"]), reverse=True)
+    if cursor:
+        key = tuple(params[1:3])
+        rows = [row for row in rows if (row["updated_at"], row["session_id"]) < key]
+    return _conversation_page(rows[:params[-1]], limit)
+
+
+def test_conversation_listing_walks_every_conversation_once():
+    table = _conversations(7)
+
+    seen, page = [], _fetch_conversations(table, limit=3)
+    seen.extend(c.session_id for c in page.conversations)
+    while page.next_cursor:
+        page = _fetch_conversations(table, limit=3, cursor=page.next_cursor)
+        seen.extend(c.session_id for c in page.conversations)
+
+    assert seen == [f"session-{index:02d}" for index in range(6, -1, -1)]
+
+
+def test_last_conversation_page_has_no_cursor():
+    page = _fetch_conversations(_conversations(3), limit=3)
+    assert len(page.conversations) == 3
+    assert page.next_cursor is None
@@ -0,0 +1,108 @@
+import pytest
+
+from src.app.core.agents import prompt_budget
+from src.app.core.agents.prompt_budget import assemble_prompt
+from src.app.core.config import get_settings
+from src.app.core.tracing import span
+
+CONTEXT = "\n\n".join(f"Chunk {index} (page={index}):\n" + " ".join(["word"] * 10) for index in range(1, 4))
+
+
+@pytest.fixture(autouse=True)
+def word_counts(monkeypatch):
+    """Count one token per word, and start every test with empty per-turn caches."""
+    counted = []
+
+    def count(text):
+        counted.append(text)
+        return len(text.split())
+
+    monkeypatch.setattr(prompt_budget, "_count", count)
+    monkeypatch.setattr(prompt_budget, "count_tokens", count)
+    prompt_budget._turn_tokens_cache.clear()
+    prompt_budget._context_chunks.cache_clear()
+    yield counted
+    prompt_budget._context_chunks.cache_clear()
+
+
+def _turn(turn_id, tokens):
+    return {"id": turn_id, "question": f"question {turn_id}", "answer": f"answer {turn_id}", "tokens": tokens}
+
+
+def _state(**values):
+    return {
+        "question": "what is hnsw",
+        "conversation_turns": [_turn("old", 30), _turn("mid", 20), _turn("new", 10)],
+        "conversation_summary": "",
+        "context": CONTEXT,
+        "draft_answer": None,
+        **values,
+    }
+
+
+def _budget(monkeypatch, node, budget, history_share=0.4):
+    settings = get_settings()
+    monkeypatch.setattr(settings, f"{node}_prompt_token_budget", budget)
+    monkeypatch.setattr(settings, "prompt_history_max_share", history_share)
+
+
+def test_unlimited_budget_keeps_everything(monkeypatch):
+    _budget(monkeypatch, "summarization", 0)
+    prompt = assemble_prompt(_state(), "summarization")
+    assert prompt.context == CONTEXT
+    assert (prompt.dropped_turns, prompt.dropped_chunks) == (0, 0)
+    assert prompt.tokens == 3 + 60 + 3 * 13
+
+
+def test_budget_drops_the_oldest_turns_and_lowest_ranked_chunks(monkeypatch):
+    # 3 question tokens leave 100; history may use 40 of them
+    _budget(monkeypatch, "summarization", 103)
+    prompt = assemble_prompt(_state(), "summarization")
+    assert prompt.dropped_turns == 1
+    assert "question old" not in prompt.conversation_context
+    assert "question new" in prompt.conversation_context
+    # 70 tokens are left for chunks of 13 tokens each
+    assert prompt.dropped_chunks == 0
+    assert prompt.tokens == 3 + 30 + 39
+
+    # 40 left: 16 for history (the newest turn), 30 for chunks (two of them)
+    _budget(monkeypatch, "summarization", 43)
+    prompt = assemble_prompt(_state(), "summarization")
+    assert (prompt.dropped_turns, prompt.dropped_chunks) == (2, 1)
+    assert prompt.context.startswith("Chunk 1") and "Chunk 3" not in prompt.context
+
+
+def test_top_ranked_chunk_is_kept_over_budget(monkeypatch):
+    _budget(monkeypatch, "verification", 5)
+    prompt = assemble_prompt(_state(draft_answer="a draft"), "verification")
+    assert prompt.dropped_turns == 3
+    assert prompt.dropped_chunks == 2
+    assert prompt.context.startswith("Chunk 1")
+
+
+def test_retrieval_history_may_use_the_whole_budget(monkeypatch):
+    _budget(monkeypatch, "retrieval", 33)
+    prompt = assemble_prompt(_state(), "retrieval", include_context=False)
+    assert prompt.context == ""
+    assert prompt.dropped_turns == 1
+
+
+def test_drops_are_recorded_on_the_node_span(monkeypatch):
+    monkeypatch.setattr(get_settings(), "tracing_enabled", True)
+    _budget(monkeypatch, "summarization", 43)
+    with span("summarization_node", "node") as node_span:
+        assemble_prompt(_state(), "summarization")
+    assert node_span.attributes["prompt_budget"] == 43
+    assert (node_span.attributes["dropped_turns"], node_span.attributes["dropped_chunks"]) == (2, 1)
+
+
+def test_turn_is_counted_once_for_every_node(monkeypatch, word_counts):
+    for node in prompt_budget.PROMPT_NODES:
+        _budget(monkeypatch, node, 50)
+    state = _state(draft_answer="a draft")
+
+    assemble_prompt(state, "retrieval", include_context=False)
+    assemble_prompt(state, "summarization")
+    assemble_prompt(state, "verification")
+    assert word_counts.count(state["question"]) == 1
+    assert len([text for text in word_counts if text.startswith("Chunk")]) == 3
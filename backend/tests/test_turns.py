@@ -0,0 +1,72 @@
+import builtins
+
+from src.app.core.agents import turns
+from src.app.core.agents.turns import make_turn, merge_turns, remove_turns
+
+
+def _turn(turn_id, question="q", answer="a"):
+    return {"id": turn_id, "question": question, "answer": answer, "tokens": 1}
+
+
+def test_new_turns_are_appended_in_order():
+    assert merge_turns([_turn("a")], [_turn("b"), _turn("c")]) == [_turn("a"), _turn("b"), _turn("c")]
+
+
+def test_empty_update_returns_a_copy():
+    existing = [_turn("a")]
+    merged = merge_turns(existing, None)
+    assert merged == existing
+    assert merged is not existing
+    assert merge_turns(None, []) == []
+
+
+def test_known_ids_are_replaced_in_place():
+    merged = merge_turns([_turn("a"), _turn("b")], [_turn("a", answer="edited")])
+    assert [turn["id"] for turn in merged] == ["a", "b"]
+    assert merged[0]["answer"] == "edited"
+
+
+def test_passing_the_previous_turns_back_is_a_no_op():
+    existing = [_turn("a"), _turn("b")]
+    assert merge_turns(existing, list(existing)) == existing
+
+
+def test_removal_markers_drop_turns():
+    existing = [_turn("a"), _turn("b"), _turn("c")]
+    assert merge_turns(existing, remove_turns(existing[:2])) == [_turn("c")]
+
+
+def test_removal_of_unknown_ids_is_ignored():
+    assert merge_turns([_turn("a")], [{"id": "missing", "remove": True}]) == [_turn("a")]
+
+
+def test_removal_and_append_in_one_update():
+    # the background summarizer's removals can land together with a new turn
+    existing = [_turn("a"), _turn("b")]
+    merged = merge_turns(existing, remove_turns([existing[0]]) + [_turn("c")])
+    assert [turn["id"] for turn in merged] == ["b", "c"]
+
+
+def test_make_turn_counts_tokens_once():
+    turn = make_turn("What is the refund window?", "Thirty days.")
+    assert turn["tokens"] > 0
+    assert make_turn("q", "a")["id"] != make_turn("q", "a")["id"]
+
+
+
+def test_fake_provider_counts_tokens_without_tiktoken(monkeypatch):
+    real_import = builtins.__import__
+    imported = []
+
+    def tracking_import(name, *args, **kwargs):
+        imported.append(name)
+        return real_import(name, *args, **kwargs)
+
+    monkeypatch.setattr(builtins, "__import__", tracking_import)
+    turns._get_encoding.cache_clear()
+    try:
+        # the length estimate: about 4 characters per token
+        assert turns.count_tokens("x" * 40) == 11
+    finally:
+        turns._get_encoding.cache_clear()
+    assert "tiktoken" not in imported
@@ -1,6 +1,54 @@
 import api from "../../utils/axios";
 import { createAsyncThunk, createSlice } from "@reduxjs/toolkit";
-import type { FilesListResponse, FileUploadResponse } from "../../types/file";
+import type {
+    FilesListResponse,
+    FileUploadResponse,
+    IngestionJob,
+} from "../../types/file";
+
+const JOB_POLL_INTERVAL_MS = 1500;
+// a job nobody has claimed by then most likely has no worker to run it
+const JOB_QUEUED_TIMEOUT_MS = 60 * 1000;
+// give up polling a job whose progress has not moved for this long
+const JOB_STALLED_TIMEOUT_MS = 10 * 60 * 1000;
+
+const sleep = (ms: number) => new Promise((resolve) => setTimeout(resolve, ms));
+
+class IngestionJobTimeoutError extends Error {}
+
+// wait for a queued indexing job to finish
+const waitForIngestionJob = async (jobId: string): Promise<IngestionJob> => {
+    let lastProgress = "";
+    let lastProgressAt = Date.now();
+
+    for (;;) {
+        const response = await api.get<IngestionJob>(`/files/jobs/${jobId}`);
+        const job = response.data;
+        if (job.status === "completed" || job.status === "failed") {
+            return job;
+        }
+
+        const progress = `${job.status}:${job.attempts}:${job.pages_processed}:${job.chunks_indexed}`;
+        if (progress !== lastProgress) {
+            lastProgress = progress;
+            lastProgressAt = Date.now();
+        }
+
+        const idleFor = Date.now() - lastProgressAt;
+        if (job.status === "queued" && idleFor > JOB_QUEUED_TIMEOUT_MS) {
+            throw new IngestionJobTimeoutError(
+                `PDF '${job.filename}' is still waiting for an indexing worker. It will be indexed once one is running.`,
+            );
+        }
+        if (idleFor > JOB_STALLED_TIMEOUT_MS) {
+            throw new IngestionJobTimeoutError(
+                `Indexing PDF '${job.filename}' has made no progress for a while. It will be retried automatically.`,
+            );
+        }
+
+        await sleep(JOB_POLL_INTERVAL_MS);
+    }
+};
 
 interface FileState {
     uploading: boolean;
@@ -38,8 +86,27 @@ export const uploadFile = createAsyncThunk<
                 },
             },
         );
-        return response.data;
+
+        if (!response.data.job_id) {
+            return response.data;
+        }
+
+        // indexing runs in the background; resolve once it has finished
+        const job = await waitForIngestionJob(response.data.job_id);
+        if (job.status === "failed") {
+            return rejectWithValue(job.error || "File indexing failed");
+        }
+
+        return {
+            ...response.data,
+            status: "success",
+            message: `PDF '${job.filename}' uploaded and indexed successfully`,
+            chunks_indexed: job.chunks_indexed,
+        };
     } catch (error: any) {
+        if (error instanceof IngestionJobTimeoutError) {
+            return rejectWithValue(error.message);
+        }
         return rejectWithValue(
             error.response?.data?.message || "File upload failed",
         );
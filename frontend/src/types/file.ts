@@ -3,6 +3,24 @@ export interface FileUploadResponse {
     message: string;
     chunks_indexed: number;
     file_id: string;
+    job_id?: string;
+}
+
+export type IngestionJobStatus = "queued" | "running" | "completed" | "failed";
+
+export interface IngestionJob {
+    job_id: string;
+    file_id: string;
+    filename: string;
+    status: IngestionJobStatus;
+    attempts: number;
+    pages_total: number | null;
+    pages_processed: number;
+    chunks_indexed: number;
+    error: string | null;
+    created_at: string;
+    started_at: string | null;
+    finished_at: string | null;
 }
 
 export interface FileListItem {